@@ -0,0 +1,205 @@
+"""Benchmarks for the analyzer, predictor and chart entry points
+
+Run from the project root:
+
+    python benchmarks/run_benchmarks.py --sizes 1000 100000 1000000
+    python benchmarks/run_benchmarks.py --baseline benchmarks/results/baseline.json --threshold 0.25
+
+Each case is timed on synthetic OHLCV data of every requested size and the
+results are written as JSON. With --baseline, the run fails (exit status 1)
+when a case's median time exceeds the baseline's by more than the
+threshold, when a case raises an error, or when a case timed in the
+baseline has no timing in this run.
+"""
+import os
+import io
+import sys
+import json
+import time
+import platform
+import argparse
+import warnings
+import contextlib
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'src'))
+sys.path.append(os.path.join(ROOT, 'netlify', 'functions', 'python'))
+sys.path.append(os.path.join(ROOT, 'netlify', 'functions'))
+
+from models.smc_analyzer import SMCAnalyzer
+from models.ai_predictor import AIPredictor
+from models.bar_aggregator import to_indicator_input
+from trading_advisor import TradingAdvisor
+
+DEFAULT_SIZES = [1_000, 100_000, 1_000_000]
+DEFAULT_OUTPUT = os.path.join(ROOT, 'benchmarks', 'results', 'latest.json')
+
+
+def synthetic_ohlcv(n, seed=0):
+    """Random-walk OHLCV minute bars with the columns the analyzers expect"""
+    rng = np.random.default_rng(seed)
+    close = 20_000 * np.exp(np.cumsum(rng.normal(0, 0.002, n)))
+    open_ = np.concatenate([[close[0]], close[:-1]])
+    spread = close * rng.uniform(0, 0.004, n)
+    return pd.DataFrame({
+        'date': pd.date_range('2000-01-03', periods=n, freq='min'),
+        'open': open_,
+        'high': np.maximum(open_, close) + spread,
+        'low': np.minimum(open_, close) - spread,
+        'close': close,
+        'volume': rng.integers(100_000, 5_000_000, n).astype(np.float64)
+    })
+
+
+def trained_predictor(data, model_type='mlp'):
+    predictor = AIPredictor(model_type=model_type)
+    predictor.train(data.tail(1_000))
+    return predictor
+
+
+def trained_advisor(data):
+    advisor = TradingAdvisor()
+    advisor.ai_predictor = trained_predictor(data)
+    return advisor
+
+
+def netlify_case(module_name, class_name):
+    """Setup for a netlify analyzer: data is loaded untimed, analyze() is timed"""
+    def setup(data):
+        module = __import__(module_name)
+        analyzer = getattr(module, class_name)()
+        analyzer.load_data(to_indicator_input(data))
+        return analyzer.analyze
+    return setup
+
+
+def generate_charts_case(data):
+    import charts
+    payload = to_indicator_input(data)
+    return lambda: charts.generate_charts(payload)
+
+
+# name -> (setup(data) returning the timed zero-argument callable, largest size to run)
+# The caps keep pure-Python per-bar loops and model training from running for hours.
+CASES = {
+    'smc.analyze_market_structure': (lambda data: lambda: SMCAnalyzer().analyze_market_structure(data), 100_000),
+    'ai.prepare_data': (lambda data: lambda: AIPredictor().prepare_data(data), None),
+    'ai.train': (lambda data: lambda: AIPredictor().train(data), 100_000),
+    'ai.predict': (lambda data: (lambda predictor: lambda: predictor.predict(data))(trained_predictor(data)),
+                   None),
+    'advisor.analyze_trade_setup': (lambda data: (lambda advisor: lambda: advisor.analyze_trade_setup(data))(
+        trained_advisor(data)), 100_000),
+    'netlify.smc.analyze': (netlify_case('analyzer', 'SMCAnalyzer'), None),
+    'netlify.technical.analyze': (netlify_case('technical', 'TechnicalAnalyzer'), None),
+    'netlify.pattern.analyze': (netlify_case('pattern', 'PatternAnalyzer'), None),
+    'netlify.trend.analyze': (netlify_case('trend', 'TrendAnalyzer'), None),
+    'netlify.chart.analyze': (netlify_case('chart', 'ChartAnalyzer'), None),
+    'netlify.generate_charts': (generate_charts_case, None)
+}
+
+
+def time_case(func, repeat, budget):
+    """Time func up to repeat times, stopping early once budget seconds are spent"""
+    times = []
+    while len(times) < repeat:
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+        if sum(times) > budget:
+            break
+    return {'median_s': float(np.median(times)), 'min_s': float(min(times)), 'runs': len(times)}
+
+
+def run(sizes, cases, repeat=5, budget=10.0, force=False):
+    """Run the selected cases at every size; returns {'<case>@<size>': timing}"""
+    results = {}
+    for size in sizes:
+        data = synthetic_ohlcv(size)
+        for name in cases:
+            setup, max_size = CASES[name]
+            key = f'{name}@{size}'
+            if max_size is not None and size > max_size and not force:
+                results[key] = {'skipped': f'skipped above the {max_size} bar cap (use --force)'}
+                print(f"{key:<45} skipped", file=sys.stderr)
+                continue
+            try:
+                # Training and analysis print progress; keep the report readable
+                with contextlib.redirect_stdout(io.StringIO()), warnings.catch_warnings():
+                    warnings.simplefilter('ignore')
+                    results[key] = time_case(setup(data), repeat, budget)
+                print(f"{key:<45} {results[key]['median_s'] * 1000:>12.2f} ms", file=sys.stderr)
+            except Exception as e:
+                results[key] = {'error': f'{type(e).__name__}: {e}'}
+                print(f"{key:<45} error: {e}", file=sys.stderr)
+    return results
+
+
+def compare(results, baseline, threshold):
+    """Cases that regressed by more than threshold against the baseline, errored or went missing"""
+    regressions = []
+    for key, timing in results.items():
+        reference = baseline.get(key, {})
+        if 'error' in timing:
+            regressions.append({'case': key, 'error': timing['error']})
+        elif 'median_s' in timing and 'median_s' in reference:
+            ratio = timing['median_s'] / reference['median_s']
+            if ratio > 1 + threshold:
+                regressions.append({'case': key, 'baseline_s': reference['median_s'],
+                                    'median_s': timing['median_s'], 'ratio': ratio})
+    # A case that stops running must not pass as "no regression"
+    for key, reference in baseline.items():
+        timing = results.get(key, {'skipped': 'not run'})
+        if 'median_s' in reference and 'skipped' in timing:
+            regressions.append({'case': key, 'error': f"timed in the baseline but {timing['skipped']}"})
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark analyzer, predictor and chart entry points')
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES,
+                        help='Bar counts of the synthetic data (default: 1000 100000 1000000)')
+    parser.add_argument('--cases', nargs='+', choices=sorted(CASES), default=list(CASES),
+                        help='Cases to run (default: all)')
+    parser.add_argument('--repeat', type=int, default=5, help='Timed runs per case (default: 5)')
+    parser.add_argument('--budget', type=float, default=10.0,
+                        help='Stop repeating a case after this many seconds (default: 10)')
+    parser.add_argument('--force', action='store_true', help='Also run cases above their size cap')
+    parser.add_argument('--output', default=DEFAULT_OUTPUT, help='Results JSON file')
+    parser.add_argument('--baseline', help='Earlier results JSON to compare against')
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help='Allowed slowdown against the baseline, as a fraction (default: 0.2)')
+    args = parser.parse_args()
+
+    results = run(args.sizes, args.cases, args.repeat, args.budget, args.force)
+    report = {
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'machine': platform.platform(),
+        'results': results
+    }
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Wrote {args.output}", file=sys.stderr)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)['results']
+        regressions = compare(results, baseline, args.threshold)
+        for regression in regressions:
+            if 'error' in regression:
+                print(f"FAILED {regression['case']}: {regression['error']}", file=sys.stderr)
+                continue
+            print(f"REGRESSION {regression['case']}: {regression['median_s'] * 1000:.2f} ms vs "
+                  f"{regression['baseline_s'] * 1000:.2f} ms ({regression['ratio']:.2f}x)", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+        print(f"No regressions above {args.threshold:.0%}", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,19 @@
+import gc
+import os
+
+# Serve the Dash app defined in src/app.py
+pythonpath = 'src'
+wsgi_app = 'app:server'
+bind = f"0.0.0.0:{os.getenv('PORT', '8080')}"
+workers = int(os.getenv('WEB_CONCURRENCY', '2'))
+
+# Import the app (and load + warm up the model) once in the master process.
+# Workers are forked afterwards and share those pages copy-on-write, so no
+# request ever pays model load time.
+preload_app = True
+
+
+def when_ready(server):
+    # Objects created during preload are moved out of the garbage collector's
+    # generations so collections in workers don't write to (and copy) their pages
+    gc.freeze()
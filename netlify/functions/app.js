@@ -1,6 +1,56 @@
 const { spawn } = require('child_process');
 const path = require('path');
 
+const ISO_DATE = /^\d{4}-\d{2}-\d{2}$/;
+
+// Parse and validate OHLCV rows; mirrors validate_ohlcv in src/utils/ingestion.py.
+// Line numbers count the header as line 1.
+function parseOhlcvRows(lines, idx) {
+    const rows = [];
+    const errors = [];
+    const seenDates = new Set();
+
+    lines.forEach((line, i) => {
+        const values = line.split(',').map(val => val.trim());
+        const lineNumber = i + 2;
+        const rowErrors = [];
+        const row = { date: values[idx.date] };
+
+        if (!ISO_DATE.test(row.date || '') || isNaN(Date.parse(row.date))) {
+            rowErrors.push({ column: 'date', error: 'invalid date (expected YYYY-MM-DD)' });
+        } else if (seenDates.has(row.date)) {
+            rowErrors.push({ column: 'date', error: 'duplicate date' });
+        }
+
+        ['open', 'high', 'low', 'close', 'volume'].forEach(col => {
+            const raw = values[idx[col]];
+            row[col] = raw === undefined || raw === '' ? NaN : Number(raw);
+            if (!Number.isFinite(row[col])) {
+                rowErrors.push({ column: col, error: 'missing or non-numeric value' });
+            }
+        });
+
+        if (rowErrors.length === 0) {
+            const { open, high, low, close, volume } = row;
+            if (high < Math.max(open, close)) rowErrors.push({ column: 'high', error: 'high is below open or close' });
+            if (low > Math.min(open, close)) rowErrors.push({ column: 'low', error: 'low is above open or close' });
+            if (high < low) rowErrors.push({ column: 'high', error: 'high is below low' });
+            if (Math.min(open, high, low, close) <= 0) rowErrors.push({ column: 'low', error: 'prices must be positive' });
+            if (volume < 0) rowErrors.push({ column: 'volume', error: 'volume is negative' });
+        }
+
+        if (rowErrors.length > 0) {
+            rowErrors.forEach(err => errors.push({ row: lineNumber, ...err }));
+        } else {
+            seenDates.add(row.date);
+            rows.push(row);
+        }
+    });
+
+    rows.sort((a, b) => (a.date < b.date ? -1 : a.date > b.date ? 1 : 0));
+    return { rows, errors };
+}
+
 exports.handler = async (event, context) => {
     // Set CORS headers
     const headers = {
@@ -62,18 +112,21 @@ exports.handler = async (event, context) => {
             const closeIndex = header.indexOf('close');
             const volumeIndex = header.indexOf('volume');
 
-            // Process data rows
-            const data = lines.slice(1).map(line => {
-                const values = line.split(',').map(val => val.trim());
-                return {
-                    date: values[dateIndex],
-                    open: parseFloat(values[openIndex]),
-                    high: parseFloat(values[highIndex]),
-                    low: parseFloat(values[lowIndex]),
-                    close: parseFloat(values[closeIndex]),
-                    volume: parseInt(values[volumeIndex])
-                };
+            // Process data rows, applying the same checks as src/utils/ingestion.py
+            const { rows: data, errors: rowErrors } = parseOhlcvRows(lines.slice(1), {
+                date: dateIndex,
+                open: openIndex,
+                high: highIndex,
+                low: lowIndex,
+                close: closeIndex,
+                volume: volumeIndex
             });
+            if (rowErrors.length > 0) {
+                console.warn(`Skipped ${rowErrors.length} invalid value(s):`, rowErrors.slice(0, 5));
+            }
+            if (data.length === 0) {
+                throw new Error('No valid data rows found');
+            }
 
             // Prepare input for Python script
             const analysisData = {
@@ -126,6 +179,10 @@ exports.handler = async (event, context) => {
                 });
             });
 
+            if (rowErrors.length > 0) {
+                result.ingestion_errors = rowErrors;
+            }
+
             return {
                 statusCode: 200,
                 headers: { ...headers, 'Content-Type': 'application/json' },
@@ -0,0 +1,216 @@
+import sys
+import json
+import argparse
+import numpy as np
+import pandas as pd
+from models.streaming_indicators import StreamingIndicators, PRICE_FIELDS, INDICATOR_FIELDS
+
+COMPARISONS = {'<': np.less, '<=': np.less_equal, '>': np.greater, '>=': np.greater_equal}
+ZONES = {'bullish_fvg': 'in_bullish_fvg', 'bearish_fvg': 'in_bearish_fvg'}
+FIELDS = set(PRICE_FIELDS + INDICATOR_FIELDS)
+# Far enough in the past that "now - NEVER" cannot overflow int64 nanoseconds
+NEVER = np.iinfo(np.int64).min // 2
+
+
+def _operand(state, token):
+    """A field of the state, or a number broadcast against it"""
+    if token in FIELDS or (token.startswith('prev_') and token[5:] in FIELDS):
+        return lambda: state.field(token)
+    try:
+        value = float(token)
+    except ValueError:
+        raise ValueError(f"Unknown field {token!r}, expected a number or one of {sorted(FIELDS)}")
+    return lambda: value
+
+
+def _prev(token):
+    return token if token not in FIELDS else f'prev_{token}'
+
+
+def compile_condition(condition, state):
+    """Compile a rule condition into a function returning a boolean mask over all symbols
+
+    A condition is one or more clauses joined by 'and':
+      <field> <op> <field or number>      op is <, <=, > or >=
+      <field> crosses_above <field or number>
+      <field> crosses_below <field or number>
+      close enters bullish_fvg            or bearish_fvg
+    Fields are the bar's OHLCV columns, rsi and sma; prev_<field> is the
+    previous bar's value.
+    """
+    predicates = []
+    for clause in condition.split(' and '):
+        tokens = clause.split()
+        if len(tokens) != 3:
+            raise ValueError(f"Cannot parse rule clause: {clause!r}")
+        left, op, right = tokens
+
+        if op == 'enters':
+            if right not in ZONES:
+                raise ValueError(f"Unknown zone {right!r}, expected one of {sorted(ZONES)}")
+            inside, was_inside = _operand(state, ZONES[right]), _operand(state, f'prev_{ZONES[right]}')
+            predicates.append(lambda inside=inside, was_inside=was_inside:
+                              (inside() == 1) & (was_inside() != 1))
+            continue
+
+        a, b = _operand(state, left), _operand(state, right)
+        if op in COMPARISONS:
+            compare = COMPARISONS[op]
+            predicates.append(lambda a=a, b=b, compare=compare: compare(a(), b()))
+        elif op in ('crosses_above', 'crosses_below'):
+            prev_a, prev_b = _operand(state, _prev(left)), _operand(state, _prev(right))
+            if op == 'crosses_above':
+                predicates.append(lambda a=a, b=b, pa=prev_a, pb=prev_b: (pa() <= pb()) & (a() > b()))
+            else:
+                predicates.append(lambda a=a, b=b, pa=prev_a, pb=prev_b: (pa() >= pb()) & (a() < b()))
+        else:
+            raise ValueError(f"Unknown operator {op!r} in rule clause: {clause!r}")
+
+    def evaluate():
+        with np.errstate(invalid='ignore'):
+            mask = predicates[0]()
+            for predicate in predicates[1:]:
+                mask = mask & predicate()
+        return np.broadcast_to(mask, (state.size,))
+    return evaluate
+
+
+class JsonlSink:
+    """Append alerts to a JSON Lines file (or a stream such as stdout)"""
+
+    def __init__(self, path):
+        self.stream = sys.stdout if path == '-' else open(path, 'a')
+
+    def write(self, alerts):
+        for alert in alerts:
+            self.stream.write(json.dumps(alert) + '\n')
+        self.stream.flush()
+
+    def close(self):
+        if self.stream is not sys.stdout:
+            self.stream.close()
+
+
+class AlertEngine:
+    """Evaluate alert rules on streaming bars for many symbols
+
+    rules are dicts with a name, a condition (see compile_condition) and
+    optionally a list of symbols and a cooldown in seconds. Every rule is
+    one vectorized predicate over the indicator state of all symbols,
+    evaluated after each batch of bars. A rule fires at most once per
+    symbol and bar, and not again for that symbol until its cooldown has
+    passed in bar time, so a condition that stays true does not flood the
+    sink.
+    """
+
+    def __init__(self, rules, sink=None, default_cooldown=86400, state=None):
+        self.state = state or StreamingIndicators()
+        self.sink = sink
+        self.rules = []
+        for rule in rules:
+            self.rules.append({
+                'name': rule['name'],
+                'condition': rule['condition'],
+                'symbols': set(rule['symbols']) if rule.get('symbols') else None,
+                'cooldown': int(rule.get('cooldown', default_cooldown) * 1e9),
+                'evaluate': compile_condition(rule['condition'], self.state)
+            })
+        self.last_fired = np.full((len(self.rules), 0), NEVER)
+        self.stats = {'bars': 0, 'alerts': 0, 'suppressed': 0}
+        self._symbol_masks = (0, [])
+
+    def _rule_masks(self):
+        """Per-rule masks of the symbols each rule watches, rebuilt when symbols are added"""
+        size, masks = self._symbol_masks
+        if size != self.state.size:
+            masks = [np.ones(self.state.size, dtype=bool) if rule['symbols'] is None else
+                     np.fromiter((symbol in rule['symbols'] for symbol in self.state.symbols),
+                                 dtype=bool, count=self.state.size)
+                     for rule in self.rules]
+            self._symbol_masks = (self.state.size, masks)
+        return masks
+
+    def process(self, symbols, timestamps, open_, high, low, close, volume):
+        """Feed a batch of bars (symbols may repeat, in time order) and return the alerts raised"""
+        symbols = np.asarray(symbols)
+        columns = [np.asarray(column) for column in (timestamps, open_, high, low, close, volume)]
+        alerts = []
+        remaining = np.arange(len(symbols))
+        # Each round applies the earliest pending bar of every symbol
+        while len(remaining):
+            _, first = np.unique(symbols[remaining], return_index=True)
+            rows = remaining[np.sort(first)]
+            remaining = np.setdiff1d(remaining, rows, assume_unique=True)
+            updated = self.state.update(list(symbols[rows]), *(column[rows] for column in columns))
+            self.stats['bars'] += len(updated)
+            alerts.extend(self._evaluate(updated))
+
+        if alerts and self.sink is not None:
+            self.sink.write(alerts)
+        return alerts
+
+    def _evaluate(self, updated):
+        state = self.state
+        if self.last_fired.shape[1] < state.size:
+            grown = np.full((len(self.rules), state.size), NEVER)
+            grown[:, :self.last_fired.shape[1]] = self.last_fired
+            self.last_fired = grown
+
+        is_updated = np.zeros(state.size, dtype=bool)
+        is_updated[updated] = True
+        now = state.last_timestamp[:state.size]
+        alerts = []
+        for r, (rule, watched) in enumerate(zip(self.rules, self._rule_masks())):
+            hits = rule['evaluate']() & is_updated & watched
+            ready = now - self.last_fired[r] >= max(rule['cooldown'], 1)
+            self.stats['suppressed'] += int(np.count_nonzero(hits & ~ready))
+            for i in np.flatnonzero(hits & ready):
+                self.last_fired[r, i] = now[i]
+                alerts.append({
+                    'rule': rule['name'],
+                    'symbol': state.symbols[i],
+                    'date': str(pd.Timestamp(now[i])),
+                    'condition': rule['condition'],
+                    'close': float(state.values['close'][i]),
+                    'rsi': None if np.isnan(state.values['rsi'][i]) else float(state.values['rsi'][i])
+                })
+        self.stats['alerts'] += len(alerts)
+        return alerts
+
+
+def load_rules(path):
+    """Read alert rules from a JSON file holding a list of rule dicts"""
+    with open(path) as f:
+        return json.load(f)
+
+
+def main():
+    # Run from the project root: python src/alerts.py rules.json data/*.csv --output alerts.jsonl
+    from database.columnar_store import load_market_data, symbol_from_path
+
+    parser = argparse.ArgumentParser(description='Evaluate alert rules over historical OHLCV files')
+    parser.add_argument('rules', help='JSON file with a list of {name, condition, symbols, cooldown} rules')
+    parser.add_argument('files', nargs='+', help='CSV files, one symbol each')
+    parser.add_argument('--output', default='-', help='Alert sink, JSON Lines (default: stdout)')
+    args = parser.parse_args()
+
+    frames = []
+    for path in args.files:
+        df = load_market_data(path)
+        frames.append(df.assign(symbol=symbol_from_path(path)))
+    bars = pd.concat(frames).sort_values('date', kind='stable')
+
+    sink = JsonlSink(args.output)
+    engine = AlertEngine(load_rules(args.rules), sink)
+    try:
+        for _, day in bars.groupby('date', sort=True):
+            engine.process(day['symbol'].to_numpy(), day['date'].to_numpy(),
+                           *(day[col].to_numpy() for col in PRICE_FIELDS))
+    finally:
+        sink.close()
+    print(f"{engine.stats['bars']} bars, {engine.stats['alerts']} alerts, "
+          f"{engine.stats['suppressed']} suppressed by cooldown", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
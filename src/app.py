@@ -1,114 +1,420 @@
 import dash
 from dash import html, dcc, Input, Output, State
-import pandas as pd
 import os
+import base64
+from collections import OrderedDict
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 from trading_advisor import TradingAdvisor
-from database.supabase_handler import SupabaseHandler
-from config import SUPABASE_URL, SUPABASE_KEY, DEFAULT_BULLISH_DATA, DEFAULT_BEARISH_DATA, MODEL_PATH
+from models.monte_carlo import MonteCarloSimulator
+from database.storage_backend import create_storage_backend
+from database.columnar_store import load_market_data, symbol_from_path
+from database.feature_store import stored_features
+from utils.disk_cache import DiskCache
+from utils.result_cache import ResultCache
+from utils.job_queue import JobQueue
+from utils.dataset_store import DatasetStore
+from utils.ingestion import read_ohlcv_csv, format_errors
+from utils.instrumentation import instrumentation
+from config import SUPABASE_URL, SUPABASE_KEY, STORAGE_BACKEND, EMBEDDED_DB_PATH, ANALYSIS_CACHE_TTL, ANALYSIS_CACHE_PATH, DEFAULT_BULLISH_DATA, DEFAULT_BEARISH_DATA, MODEL_PATH, MODEL_TYPE, COLUMNAR_STORE_DIR, FEATURE_STORE_DIR
+from config import RESULT_CACHE_MAX_ENTRIES, RESULT_CACHE_MAX_BYTES, RESULT_CACHE_PATH, JOB_QUEUE_PATH, JOB_WORKERS, JOB_MAX_AGE, JOB_STALE_AFTER, UPLOAD_STORE_DIR, UPLOAD_STORE_MAX_DATASETS
+from config import MONTE_CARLO_PATHS, MONTE_CARLO_METHOD, INSTRUMENTATION
 
-# Initialize Supabase client
-db = SupabaseHandler(SUPABASE_URL, SUPABASE_KEY)
+# Initialize Dash app
+app = dash.Dash(__name__)
+server = app.server
 
-def update_output(n_clicks, analysis_type, contents, filename):
-    if n_clicks == 0:
-        return ''
+# Stage timings of analyses run in this process, scraped from /metrics
+if INSTRUMENTATION != 'off':
+    instrumentation.enable(memory=INSTRUMENTATION == 'memory')
+
+@server.route('/metrics')
+def metrics():
+    return instrumentation.prometheus_text(), 200, {'Content-Type': 'text/plain; version=0.0.4'}
+
+# Jobs whose worker timings were already merged (a finished job can be polled again)
+merged_jobs = OrderedDict()
+
+def merge_job_timings(job_id, result):
+    """Add the stage timings a job worker returned to this process's metrics, once per job"""
+    if 'timings' in result and job_id not in merged_jobs:
+        instrumentation.merge(result['timings'])
+        merged_jobs[job_id] = True
+        if len(merged_jobs) > 1000:
+            merged_jobs.popitem(last=False)
+
+# Initialize storage backend (Supabase or embedded SQLite)
+db = create_storage_backend(STORAGE_BACKEND, SUPABASE_URL, SUPABASE_KEY, EMBEDDED_DB_PATH,
+                            cache_ttl=ANALYSIS_CACHE_TTL, cache_path=ANALYSIS_CACHE_PATH)
+
+# Parsed uploads live server-side; callbacks only exchange their dataset id
+dataset_store = DatasetStore(UPLOAD_STORE_DIR, max_datasets=UPLOAD_STORE_MAX_DATASETS)
+
+# Cache analyses of unchanged data across clicks (and restarts when a path is set)
+analysis_cache = ResultCache(
+    max_entries=RESULT_CACHE_MAX_ENTRIES,
+    max_bytes=RESULT_CACHE_MAX_BYTES,
+    disk_cache=DiskCache(RESULT_CACHE_PATH) if RESULT_CACHE_PATH else None
+)
+
+def load_advisor(model_path=MODEL_PATH, model_type=MODEL_TYPE):
+    """Load and warm up the configured model before any request is served"""
+    if not any(os.path.exists(f'{model_path}_{model_type}.{ext}') for ext in ('model', 'joblib')):
+        print(f"Model not found at {model_path}. Train it offline with: python src/train_model.py")
+        return None
     
+    print(f"Loading {model_type.upper()} model from {model_path}...")
+    simulator = MonteCarloSimulator(MONTE_CARLO_PATHS, method=MONTE_CARLO_METHOD) if MONTE_CARLO_PATHS else None
+    advisor = TradingAdvisor(ai_model_type=model_type, result_cache=analysis_cache, simulator=simulator)
+    advisor.load_models(model_path, inference_only=True)
+    
+    # Run one analysis so first-call overheads are paid at startup, not by a user
     try:
-        # Get the data based on analysis type
-        if analysis_type == 'bullish':
-            try:
-                # Try to get from Supabase first
-                df = db.get_market_data()
-                if df.empty:
-                    # If no data in Supabase, load from file and save to Supabase
-                    df = pd.read_csv(DEFAULT_BULLISH_DATA)
-                    db.save_market_data(df)
-            except Exception as e:
-                print(f"Error accessing Supabase: {e}")
-                # Fallback to file
-                df = pd.read_csv(DEFAULT_BULLISH_DATA)
-                
-        elif analysis_type == 'bearish':
-            df = pd.read_csv(DEFAULT_BEARISH_DATA)
-            
-        elif analysis_type == 'custom':
-            if contents is None:
-                return html.Div('Please upload a file for custom analysis', style={'color': 'red'})
-            df = parse_contents(contents, filename)
-            if df is None:
-                return html.Div([
-                    html.P('Error: Unable to process the uploaded file.', style={'fontWeight': 'bold'}),
-                    html.P('Please ensure your file:'),
-                    html.Ul([
-                        html.Li('Is a valid CSV file'),
-                        html.Li(['Has all required columns: ', html.Code('date,open,high,low,close,volume')]),
-                        html.Li(['Date values are in ', html.Code('YYYY-MM-DD'), ' format']),
-                        html.Li('Contains numeric values for price and volume data')
-                    ])
-                ], style={'color': 'red', 'backgroundColor': '#ffe6e6', 'padding': '15px', 'borderRadius': '5px'})
-            
-            try:
-                # Save custom data to Supabase
-                db.save_market_data(df)
-            except Exception as e:
-                print(f"Error saving to Supabase: {e}")
-                
-        else:
-            return html.Div('Invalid analysis type selected', style={'color': 'red'})
+        df = load_market_data(DEFAULT_BULLISH_DATA, COLUMNAR_STORE_DIR)
+        features = stored_features(symbol_from_path(DEFAULT_BULLISH_DATA), df, FEATURE_STORE_DIR)
+        advisor.analyze_trade_setup(df, features)
+    except Exception as e:
+        print(f"Model warm-up skipped: {e}")
+    return advisor
+
+# Loaded at import time. With gunicorn's preload_app (see gunicorn.conf.py) this
+# happens once in the master and workers share the model pages copy-on-write.
+advisor = load_advisor()
+
+def parse_contents(contents):
+    """Parse uploaded file contents"""
+    if contents is None:
+        return None
+    
+    try:
+        # Decode and validate the CSV file
+        content_type, content_string = contents.split(',', 1)
+        df, errors = read_ohlcv_csv(base64.b64decode(content_string))
+        if errors:
+            print(f"Skipped rows in upload: {format_errors(errors)}")
         
-        # Initialize advisor and ensure model is trained
-        advisor = TradingAdvisor()
+        return df if not df.empty else None
+    except Exception:
+        return None
+
+def create_price_chart(df, analysis):
+    """Create a price chart with the recommended trade levels"""
+    fig = make_subplots(rows=2, cols=1, shared_xaxes=True,
+                       vertical_spacing=0.03, row_heights=[0.7, 0.3])
+    
+    # Add candlestick chart
+    fig.add_trace(
+        go.Candlestick(
+            x=df['date'],
+            open=df['open'],
+            high=df['high'],
+            low=df['low'],
+            close=df['close'],
+            name='Price'
+        ),
+        row=1, col=1
+    )
+    
+    # Add volume bars
+    fig.add_trace(
+        go.Bar(
+            x=df['date'],
+            y=df['volume'],
+            name='Volume'
+        ),
+        row=2, col=1
+    )
+    
+    # Mark entry, target and stop levels
+    recommendation = analysis['trade_recommendation']
+    if recommendation['action'] != 'WAIT':
+        for label, color in [('entry', 'blue'), ('target', 'green'), ('stop_loss', 'red')]:
+            fig.add_hline(y=recommendation[label], line_dash='dash', line_color=color,
+                          annotation_text=label.replace('_', ' ').title(), row=1, col=1)
+    
+    fig.update_layout(
+        title='EGX 30 Price Chart',
+        xaxis_title='Date',
+        yaxis_title='Price',
+        yaxis2_title='Volume',
+        showlegend=False,
+        xaxis_rangeslider_visible=False,
+        height=800
+    )
+    
+    return fig
+
+# Layout
+app.layout = html.Div([
+    html.H1('EGX 30 Stock Analysis', style={'textAlign': 'center'}),
+    
+    html.Div([
+        # Analysis Type Selection
+        html.Label('Select Analysis Type:'),
+        dcc.RadioItems(
+            id='analysis-type',
+            options=[
+                {'label': 'Bullish Market', 'value': 'bullish'},
+                {'label': 'Bearish Market', 'value': 'bearish'},
+                {'label': 'Custom Data', 'value': 'custom'}
+            ],
+            value='bullish',
+            style={'marginBottom': '20px'}
+        ),
         
-        # Check if model exists, if not train it
-        # Use MODEL_PATH from config.py instead of hardcoding
-        model_path = MODEL_PATH
-        if not os.path.exists(f'{model_path}_mlp.joblib'):
-            print("Training new model...")
-            advisor.train_ai_model(df)
-            advisor.save_models(model_path)
-        else:
-            print("Loading existing model...")
-            advisor.load_models(model_path)
-            
-        # Run analysis
-        analysis = advisor.analyze_trade_setup(df)
+        # File Upload (for custom analysis)
+        html.Div([
+            dcc.Upload(
+                id='upload-data',
+                children=html.Div([
+                    'Drag and Drop or ',
+                    html.A('Select Files')
+                ]),
+                style={
+                    'width': '100%',
+                    'height': '60px',
+                    'lineHeight': '60px',
+                    'borderWidth': '1px',
+                    'borderStyle': 'dashed',
+                    'borderRadius': '5px',
+                    'textAlign': 'center',
+                    'marginBottom': '20px'
+                }
+            )
+        ], id='upload-container', style={'display': 'none'}),
+        
+        # Analyze Button
+        html.Button('Analyze', id='analyze-button', n_clicks=0,
+                   style={'marginBottom': '20px'}),
+        
+        # Id of the parsed upload in the server-side dataset store
+        dcc.Store(id='dataset-id'),
+        
+        # Background job tracking
+        dcc.Store(id='job-id'),
+        dcc.Interval(id='job-poll', interval=500, disabled=True),
+        
+        # Results Display
+        html.Div(id='output-container')
+    ], style={'maxWidth': '1200px', 'margin': '0 auto', 'padding': '20px'})
+])
+
+# Callbacks
+@app.callback(
+    Output('upload-container', 'style'),
+    Input('analysis-type', 'value')
+)
+def toggle_upload(analysis_type):
+    """Show/hide file upload based on analysis type"""
+    if analysis_type == 'custom':
+        return {'display': 'block'}
+    return {'display': 'none'}
+
+def upload_error():
+    """Explain the expected upload format"""
+    return html.Div([
+        html.P('Error: Unable to process the uploaded file.', style={'fontWeight': 'bold'}),
+        html.P('Please ensure your file:'),
+        html.Ul([
+            html.Li('Is a valid CSV file'),
+            html.Li(['Has all required columns: ', html.Code('date,open,high,low,close,volume')]),
+            html.Li(['Date values are in ', html.Code('YYYY-MM-DD'), ' format']),
+            html.Li('Contains numeric values for price and volume data')
+        ])
+    ], style={'color': 'red', 'backgroundColor': '#ffe6e6', 'padding': '15px', 'borderRadius': '5px'})
+
+def analysis_details(analysis):
+    """Render the text part of an analysis"""
+    return html.Div([
+        html.P(f"Market Trend: {analysis['market_structure']['trend']}"),
+        html.P(f"AI Prediction: {analysis['ai_prediction']['movement']} "
+              f"({analysis['ai_prediction']['change_percent']:+.2f}%)"),
+        html.P(f"Confidence: {analysis['ai_prediction']['confidence']:.1f}%"),
+        html.P(f"Ensemble Forecast: {analysis['ai_prediction']['interval']['mean']:.2f} "
+               f"({analysis['ai_prediction']['interval']['level']:.0%} interval "
+               f"{analysis['ai_prediction']['interval']['lower']:.2f} - "
+               f"{analysis['ai_prediction']['interval']['upper']:.2f})")
+        if 'interval' in analysis['ai_prediction'] else None,
+        html.P(f"Recommended Action: {analysis['trade_recommendation']['action']}"),
+        html.P(f"Target before stop: "
+               f"{analysis['trade_recommendation']['simulation']['hit_probability']['target_first']:.1%} "
+               f"of {analysis['trade_recommendation']['simulation']['paths']:,} simulated paths")
+        if 'hit_probability' in analysis['trade_recommendation'].get('simulation', {}) else None,
+        html.Hr(),
+        html.P(f"Summary: {analysis['summary']}")
+    ], style={'backgroundColor': '#f8f9fa', 'padding': '20px', 'borderRadius': '5px'})
 
-        # Save analysis results to Supabase
+def init_job_worker():
+    """Reopen connections a forked job process must not share with its parent"""
+    global db
+    db = create_storage_backend(STORAGE_BACKEND, SUPABASE_URL, SUPABASE_KEY, EMBEDDED_DB_PATH,
+                                cache_ttl=ANALYSIS_CACHE_TTL, cache_path=ANALYSIS_CACHE_PATH)
+    analysis_cache.disk_cache = DiskCache(RESULT_CACHE_PATH) if RESULT_CACHE_PATH else None
+
+def run_dashboard_analysis(job, analysis_type, dataset_id):
+    """Background job: load data, analyze it and build the chart
+
+    Returns {'error': ...} for invalid input, otherwise the analysis and the
+    chart as a plain figure dict.
+    """
+    job.report(0.1, 'Loading data...')
+    # Workers run one job at a time, so their spans belong to this job
+    instrumentation.reset()
+    
+    # Get the data based on analysis type; data files use their stored features
+    features = None
+    if analysis_type == 'bullish':
         try:
-            db.save_analysis_result({
-                'type': analysis_type,
-                'trend': analysis['market_structure']['trend'],
-                'prediction': analysis['ai_prediction']['movement'],
-                'confidence': analysis['ai_prediction']['confidence'],
-                'recommendation': analysis['trade_recommendation']['action'],
-                'summary': analysis['summary']
-            })
+            # Try to get from Supabase first
+            df = db.get_market_data()
+            if df.empty:
+                # If no data in Supabase, load from file and save to Supabase
+                df = load_market_data(DEFAULT_BULLISH_DATA, COLUMNAR_STORE_DIR)
+                features = stored_features(symbol_from_path(DEFAULT_BULLISH_DATA), df, FEATURE_STORE_DIR)
+                db.save_market_data(df)
         except Exception as e:
-            print(f"Error saving analysis to Supabase: {e}")
-        
-        # Create chart
-        fig = create_price_chart(df, analysis)
+            print(f"Error accessing Supabase: {e}")
+            # Fallback to file
+            df = load_market_data(DEFAULT_BULLISH_DATA, COLUMNAR_STORE_DIR)
+            features = stored_features(symbol_from_path(DEFAULT_BULLISH_DATA), df, FEATURE_STORE_DIR)
+            
+    elif analysis_type == 'bearish':
+        df = load_market_data(DEFAULT_BEARISH_DATA, COLUMNAR_STORE_DIR)
+        features = stored_features(symbol_from_path(DEFAULT_BEARISH_DATA), df, FEATURE_STORE_DIR)
         
-        # Display results with chart
-        return html.Div([
-            html.H3('Analysis Results'),
-            # Interactive Chart
-            html.Div([
-                dcc.Graph(figure=fig)
-            ], style={'marginBottom': '20px'}),
-            # Analysis Details
-            html.Div([
-                html.P(f"Market Trend: {analysis['market_structure']['trend']}"),
-                html.P(f"AI Prediction: {analysis['ai_prediction']['movement']} "
-                      f"({analysis['ai_prediction']['change_percent']:+.2f}%)"),
-                html.P(f"Confidence: {analysis['ai_prediction']['confidence']:.1f}%"),
-                html.P(f"Recommended Action: {analysis['trade_recommendation']['action']}"),
-                html.Hr(),
-                html.P(f"Summary: {analysis['summary']}")
-            ], style={'backgroundColor': '#f8f9fa', 'padding': '20px', 'borderRadius': '5px'})
-        ])
+    elif analysis_type == 'custom':
+        df = dataset_store.get(dataset_id)
+        if df is None:
+            return {'error': 'upload'}
         
+        try:
+            # Save custom data to Supabase
+            db.save_market_data(df)
+        except Exception as e:
+            print(f"Error saving to Supabase: {e}")
+            
+    else:
+        return {'error': 'Invalid analysis type selected'}
+    
+    # The model is loaded at startup; training happens offline (src/train_model.py)
+    if advisor is None:
+        return {'error': 'Model not available. Train it offline with: python src/train_model.py'}
+    
+    job.report(0.3, f'Analyzing {len(df)} data points...')
+    analysis = advisor.analyze_trade_setup(df, features)
+    job.report(0.7, 'Building chart...', partial={'analysis': analysis})
+
+    # Save analysis results to Supabase
+    try:
+        db.save_analysis_result({
+            'type': analysis_type,
+            'trend': analysis['market_structure']['trend'],
+            'prediction': analysis['ai_prediction']['movement'],
+            'confidence': analysis['ai_prediction']['confidence'],
+            'recommendation': analysis['trade_recommendation']['action'],
+            'summary': analysis['summary']
+        })
     except Exception as e:
-        return html.Div(f'Error: {str(e)}', style={'color': 'red'})
\ No newline at end of file
+        print(f"Error saving analysis to Supabase: {e}")
+    
+    # Create chart
+    with instrumentation.span('dashboard.chart'):
+        fig = create_price_chart(df, analysis)
+    result = {'analysis': analysis, 'figure': fig.to_dict()}
+    if instrumentation.enabled:
+        result['timings'] = instrumentation.breakdown()
+    return result
+
+# Analyses run in a local process pool; callbacks only submit and poll
+job_queue = JobQueue(JOB_QUEUE_PATH, max_workers=JOB_WORKERS, initializer=init_job_worker,
+                     max_age=JOB_MAX_AGE, stale_after=JOB_STALE_AFTER)
+
+@app.callback(
+    Output('dataset-id', 'data'),
+    Input('upload-data', 'contents'),
+    prevent_initial_call=True
+)
+def store_upload(contents):
+    """Decode and parse a new upload once, keeping only its id client-side"""
+    if contents is None:
+        return None
+    try:
+        # An unparseable upload is stored as '' so the job can explain the format
+        return dataset_store.put(contents, parse_contents) or ''
+    except Exception as e:
+        print(f"Error storing upload: {e}")
+        return ''
+
+@app.callback(
+    Output('job-id', 'data'),
+    Output('job-poll', 'disabled'),
+    Output('output-container', 'children'),
+    Input('analyze-button', 'n_clicks'),
+    State('analysis-type', 'value'),
+    State('dataset-id', 'data'),
+    prevent_initial_call=True
+)
+def submit_analysis(n_clicks, analysis_type, dataset_id):
+    """Queue an analysis and start polling for its progress"""
+    if n_clicks == 0:
+        return None, True, ''
+    
+    if analysis_type == 'custom' and dataset_id is None:
+        return None, True, html.Div('Please upload a file for custom analysis', style={'color': 'red'})
+    if analysis_type == 'custom' and dataset_id and not DatasetStore.is_valid_id(dataset_id):
+        return None, True, html.Div('Invalid dataset, please upload the file again', style={'color': 'red'})
+    
+    try:
+        job_id = job_queue.submit(run_dashboard_analysis, analysis_type, dataset_id)
+    except Exception as e:
+        return None, True, html.Div(f'Error: {str(e)}', style={'color': 'red'})
+    return job_id, False, html.Div('Analysis queued...')
+
+@app.callback(
+    Output('output-container', 'children', allow_duplicate=True),
+    Output('job-poll', 'disabled', allow_duplicate=True),
+    Input('job-poll', 'n_intervals'),
+    State('job-id', 'data'),
+    prevent_initial_call=True
+)
+def poll_analysis(n_intervals, job_id):
+    """Show progress, partial results and finally the analysis of a job"""
+    if job_id is None:
+        return '', True
+    
+    job = job_queue.status(job_id)
+    if job is None:
+        return html.Div('Analysis job not found', style={'color': 'red'}), True
+    
+    if job['status'] == 'failed':
+        return html.Div(f"Error: {job['error']}", style={'color': 'red'}), True
+    
+    if job['status'] != 'done':
+        children = [
+            html.P(job['message'] or 'Waiting for a worker...'),
+            html.Progress(value=str(job['progress']), max='1', style={'width': '100%'})
+        ]
+        if job['partial'] and 'analysis' in job['partial']:
+            children.append(analysis_details(job['partial']['analysis']))
+        return html.Div(children), False
+    
+    result = job['result']
+    merge_job_timings(job_id, result)
+    if result.get('error') == 'upload':
+        return upload_error(), True
+    if 'error' in result:
+        return html.Div(result['error'], style={'color': 'red'}), True
+    
+    # Display results with chart
+    return html.Div([
+        html.H3('Analysis Results'),
+        # Interactive Chart
+        html.Div([
+            dcc.Graph(figure=result['figure'])
+        ], style={'marginBottom': '20px'}),
+        # Analysis Details
+        analysis_details(result['analysis'])
+    ]), True
+
+if __name__ == '__main__':
+    app.run_server(host='0.0.0.0', port=int(os.getenv('PORT', '8080')), debug=os.getenv('DEBUG') == 'True')
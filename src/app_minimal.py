@@ -4,15 +4,22 @@ import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 import pandas as pd
 import requests
-from database.supabase_handler import SupabaseHandler
-from config import SUPABASE_URL, SUPABASE_KEY
+import base64
+from database.storage_backend import create_storage_backend
+from utils.dataset_store import DatasetStore
+from utils.ingestion import read_ohlcv_csv, format_errors
+from config import SUPABASE_URL, SUPABASE_KEY, STORAGE_BACKEND, EMBEDDED_DB_PATH, ANALYSIS_CACHE_TTL, ANALYSIS_CACHE_PATH, UPLOAD_STORE_DIR
 
 # Initialize Dash app
 app = dash.Dash(__name__)
 server = app.server
 
-# Initialize Supabase client
-db = SupabaseHandler(SUPABASE_URL, SUPABASE_KEY)
+# Initialize storage backend (Supabase or embedded SQLite)
+db = create_storage_backend(STORAGE_BACKEND, SUPABASE_URL, SUPABASE_KEY, EMBEDDED_DB_PATH,
+                            cache_ttl=ANALYSIS_CACHE_TTL, cache_path=ANALYSIS_CACHE_PATH)
+
+# Parsed uploads live server-side; callbacks only exchange their dataset id
+dataset_store = DatasetStore(UPLOAD_STORE_DIR)
 
 def create_price_chart(df):
     """Create a basic price chart without heavy analysis"""
@@ -53,24 +60,28 @@ def create_price_chart(df):
 
     return fig
 
-def parse_contents(contents, filename):
+def parse_contents(contents):
     """Parse uploaded file contents"""
     if contents is None:
         return None
 
     try:
-        # Read and process CSV file
-        df = pd.read_csv(filename)
-        df['date'] = pd.to_datetime(df['date'])
-        required_columns = ['date', 'open', 'high', 'low', 'close', 'volume']
+        # Decode and validate the CSV file
+        content_type, content_string = contents.split(',', 1)
+        df, errors = read_ohlcv_csv(base64.b64decode(content_string))
+        if errors:
+            print(f"Skipped rows in upload: {format_errors(errors)}")
         
-        if not all(col in df.columns for col in required_columns):
-            return None
-            
-        return df
+        return df if not df.empty else None
     except Exception:
         return None
 
+def load_dataset(contents):
+    """Parse an upload once and return its server-side dataset id"""
+    if contents is None:
+        return None
+    return dataset_store.put(contents, parse_contents)
+
 # Layout
 app.layout = html.Div([
     html.H1('EGX 30 Stock Analysis', style={'textAlign': 'center'}),
@@ -110,6 +121,9 @@ app.layout = html.Div([
             )
         ], id='upload-container', style={'display': 'none'}),
         
+        # Id of the parsed upload in the server-side dataset store
+        dcc.Store(id='dataset-id'),
+        
         # Analyze Button
         html.Button('Analyze', id='analyze-button', n_clicks=0,
                    style={'marginBottom': '20px'}),
@@ -130,14 +144,26 @@ def toggle_upload(analysis_type):
         return {'display': 'block'}
     return {'display': 'none'}
 
+@app.callback(
+    Output('dataset-id', 'data'),
+    Input('upload-data', 'contents'),
+    prevent_initial_call=True
+)
+def store_upload(contents):
+    """Decode and parse a new upload once, keeping only its id client-side"""
+    try:
+        return load_dataset(contents)
+    except Exception as e:
+        print(f"Error storing upload: {e}")
+        return None
+
 @app.callback(
     Output('output-container', 'children'),
     Input('analyze-button', 'n_clicks'),
     State('analysis-type', 'value'),
-    State('upload-data', 'contents'),
-    State('upload-data', 'filename')
+    State('dataset-id', 'data')
 )
-def update_output(n_clicks, analysis_type, contents, filename):
+def update_output(n_clicks, analysis_type, dataset_id):
     if n_clicks == 0:
         return ''
     
@@ -156,10 +182,10 @@ def update_output(n_clicks, analysis_type, contents, filename):
                 return html.Div(f'Error accessing database: {str(e)}', style={'color': 'red'})
                 
         elif analysis_type == 'custom':
-            if contents is None:
-                return html.Div('Please upload a file for custom analysis', style={'color': 'red'})
+            if dataset_id is None:
+                return html.Div('Please upload a valid file for custom analysis', style={'color': 'red'})
                 
-            df = parse_contents(contents, filename)
+            df = dataset_store.get(dataset_id)
             if df is None:
                 return html.Div('Error processing file. Check format.', style={'color': 'red'})
 
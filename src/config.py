@@ -8,9 +8,31 @@ load_dotenv()
 SUPABASE_URL = os.getenv('SUPABASE_URL')
 SUPABASE_KEY = os.getenv('SUPABASE_KEY')
 
+# Storage backend configuration ('supabase' or 'embedded')
+STORAGE_BACKEND = os.getenv('STORAGE_BACKEND', 'supabase')
+EMBEDDED_DB_PATH = os.getenv('EMBEDDED_DB_PATH', 'data/egx30.db')
+
+# Read-through cache for analysis/prediction reads (TTL in seconds, 0 disables)
+# Setting ANALYSIS_CACHE_PATH shares cached reads between gunicorn workers
+ANALYSIS_CACHE_TTL = float(os.getenv('ANALYSIS_CACHE_TTL', '30'))
+ANALYSIS_CACHE_PATH = os.getenv('ANALYSIS_CACHE_PATH')
+
+# Content-hash cache of TradingAdvisor results; the path adds a persistent disk tier
+RESULT_CACHE_MAX_ENTRIES = int(os.getenv('RESULT_CACHE_MAX_ENTRIES', '128'))
+RESULT_CACHE_MAX_BYTES = int(os.getenv('RESULT_CACHE_MAX_BYTES', str(64 * 1024 * 1024)))
+RESULT_CACHE_PATH = os.getenv('RESULT_CACHE_PATH')
+
+# Background analysis jobs (SQLite job table + local process pool)
+JOB_QUEUE_PATH = os.getenv('JOB_QUEUE_PATH', 'data/jobs.db')
+JOB_WORKERS = int(os.getenv('JOB_WORKERS', '2'))
+# Finished jobs are deleted after JOB_MAX_AGE seconds; jobs silent for JOB_STALE_AFTER seconds count as failed
+JOB_MAX_AGE = int(os.getenv('JOB_MAX_AGE', '3600'))
+JOB_STALE_AFTER = int(os.getenv('JOB_STALE_AFTER', '600'))
+
 # Model configuration
 # Use one of the verified working models from the file system
 MODEL_PATH = 'models/trained_model'
+MODEL_TYPE = os.getenv('MODEL_TYPE', 'mlp')
 
 # Analysis configuration
 ANALYSIS_WINDOW = 20
@@ -18,4 +40,21 @@ SUPPORT_RESISTANCE_THRESHOLD = 0.01
 
 # Default data paths
 DEFAULT_BULLISH_DATA = 'data/egx30_sample.csv'
-DEFAULT_BEARISH_DATA = 'data/test_bearish.csv'
\ No newline at end of file
+DEFAULT_BEARISH_DATA = 'data/test_bearish.csv'
+
+# Memory-mapped columnar copies of the data files (see database/columnar_store.py)
+COLUMNAR_STORE_DIR = os.getenv('COLUMNAR_STORE_DIR', 'data/columnar')
+
+# Precomputed AIPredictor features per symbol (see database/feature_store.py)
+FEATURE_STORE_DIR = os.getenv('FEATURE_STORE_DIR', 'data/features')
+
+# Server-side store of parsed uploads, keyed by upload hash
+UPLOAD_STORE_DIR = os.getenv('UPLOAD_STORE_DIR', 'data/uploads')
+UPLOAD_STORE_MAX_DATASETS = int(os.getenv('UPLOAD_STORE_MAX_DATASETS', '100'))
+
+# Monte Carlo price paths simulated per analysis (0 disables the simulation)
+MONTE_CARLO_PATHS = int(os.getenv('MONTE_CARLO_PATHS', '0'))
+MONTE_CARLO_METHOD = os.getenv('MONTE_CARLO_METHOD', 'bootstrap')
+
+# Per-stage timing spans (see utils/instrumentation.py): off, on, or memory (adds tracemalloc peaks)
+INSTRUMENTATION = os.getenv('INSTRUMENTATION', 'off')
@@ -0,0 +1,135 @@
+import threading
+import time
+from database.storage_backend import StorageBackend
+
+
+class CachedStorageHandler(StorageBackend):
+    """Read-through cache in front of another storage backend
+
+    Reads of the latest analysis and recent predictions are served from an
+    in-process TTL cache, optionally backed by a shared DiskCache so several
+    gunicorn workers share hits. Every cached key embeds a per-table
+    generation number; saving a row bumps the generation, which invalidates
+    all cached reads of that table in every worker at once.
+    """
+
+    def __init__(self, backend, ttl=30, shared_cache=None):
+        self.backend = backend
+        self.ttl = ttl
+        self.shared_cache = shared_cache
+        self.local_cache = {}
+        self.local_generations = {}
+        self.lock = threading.Lock()
+        self.metrics = {
+            'hits': 0,
+            'local_hits': 0,
+            'shared_hits': 0,
+            'misses': 0,
+            'invalidations': 0,
+            'staleness_total': 0.0,
+            'staleness_max': 0.0
+        }
+
+    def __getattr__(self, name):
+        # Backend specific helpers (e.g. resampling) pass straight through
+        if name == 'backend':
+            raise AttributeError(name)
+        return getattr(self.backend, name)
+
+    def _generation(self, table):
+        if self.shared_cache is not None:
+            return self.shared_cache.counter(f'generation:{table}')
+        return self.local_generations.get(table, 0)
+
+    def _invalidate(self, table):
+        with self.lock:
+            self.metrics['invalidations'] += 1
+            if self.shared_cache is not None:
+                self.shared_cache.increment(f'generation:{table}')
+            else:
+                self.local_generations[table] = self.local_generations.get(table, 0) + 1
+            self.local_cache = {
+                key: entry for key, entry in self.local_cache.items()
+                if not key.startswith(f'{table}:')
+            }
+
+    def _record_hit(self, source, stored_at):
+        age = time.time() - stored_at
+        self.metrics['hits'] += 1
+        self.metrics[f'{source}_hits'] += 1
+        self.metrics['staleness_total'] += age
+        self.metrics['staleness_max'] = max(self.metrics['staleness_max'], age)
+
+    def _cached_read(self, table, name, loader):
+        key = f'{table}:{self._generation(table)}:{name}'
+        now = time.time()
+
+        with self.lock:
+            entry = self.local_cache.get(key)
+            if entry is not None and now - entry[1] < self.ttl:
+                self._record_hit('local', entry[1])
+                return entry[0]
+
+        if self.shared_cache is not None:
+            entry = self.shared_cache.get(key)
+            if entry is not None and now - entry[1] < self.ttl:
+                with self.lock:
+                    self.local_cache[key] = entry
+                    self._record_hit('shared', entry[1])
+                return entry[0]
+
+        value = loader()
+        stored_at = time.time()
+        with self.lock:
+            self.metrics['misses'] += 1
+            self.local_cache[key] = (value, stored_at)
+        if self.shared_cache is not None:
+            self.shared_cache.set(key, value, stored_at)
+        return value
+
+    def get_metrics(self):
+        """Return cache hit rate and staleness metrics"""
+        with self.lock:
+            metrics = dict(self.metrics)
+        requests = metrics['hits'] + metrics['misses']
+        metrics['requests'] = requests
+        metrics['hit_rate'] = metrics['hits'] / requests if requests else 0.0
+        metrics['staleness_avg'] = (metrics['staleness_total'] / metrics['hits']
+                                    if metrics['hits'] else 0.0)
+        del metrics['staleness_total']
+        return metrics
+
+    def clear(self):
+        """Drop every cached read"""
+        self._invalidate('analysis_results')
+        self._invalidate('model_predictions')
+
+    def save_market_data(self, data):
+        """Save market data (not cached)"""
+        return self.backend.save_market_data(data)
+
+    def get_market_data(self, start_date=None, end_date=None):
+        """Retrieve market data (not cached)"""
+        return self.backend.get_market_data(start_date, end_date)
+
+    def save_analysis_result(self, analysis_data):
+        """Save analysis results and invalidate cached analysis reads"""
+        result = self.backend.save_analysis_result(analysis_data)
+        self._invalidate('analysis_results')
+        return result
+
+    def get_latest_analysis(self):
+        """Get the most recent analysis result through the cache"""
+        return self._cached_read('analysis_results', 'latest',
+                                 self.backend.get_latest_analysis)
+
+    def save_model_prediction(self, prediction_data):
+        """Save model predictions and invalidate cached prediction reads"""
+        result = self.backend.save_model_prediction(prediction_data)
+        self._invalidate('model_predictions')
+        return result
+
+    def get_recent_predictions(self, limit=10):
+        """Get recent model predictions through the cache"""
+        return self._cached_read('model_predictions', f'recent:{limit}',
+                                 lambda: self.backend.get_recent_predictions(limit))
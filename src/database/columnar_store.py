@@ -0,0 +1,205 @@
+import os
+import json
+import shutil
+import hashlib
+import argparse
+import numpy as np
+import pandas as pd
+from utils.ingestion import read_ohlcv_csv, format_errors
+
+STORE_VERSION = 1
+PRICE_COLUMNS = ['open', 'high', 'low', 'close', 'volume']
+
+
+class ColumnarStore:
+    """Memory-mapped columnar OHLCV store, one directory per symbol
+
+    Each symbol directory holds date.npy (datetime64[ns]), prices.npy
+    (a C-contiguous float64 array of shape (5, rows), one row per OHLCV
+    column) and manifest.json. Loading maps the files read-only, so parse
+    cost is near zero and pages are shared between worker processes.
+    Rewrites replace every file atomically, so a worker that has the old
+    arrays mapped keeps reading the old, complete data.
+    """
+
+    def __init__(self, root='data/columnar'):
+        self.root = root
+
+    def _symbol_dir(self, symbol):
+        return os.path.join(self.root, symbol)
+
+    def symbols(self):
+        """List the symbols stored in the store"""
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(
+            name for name in os.listdir(self.root)
+            if os.path.exists(os.path.join(self.root, name, 'manifest.json'))
+        )
+
+    def manifest(self, symbol):
+        """Return the manifest of a stored symbol, or None if it is missing"""
+        path = os.path.join(self._symbol_dir(symbol), 'manifest.json')
+        if not os.path.exists(path):
+            return None
+        with open(path) as f:
+            return json.load(f)
+
+    def remove(self, symbol):
+        """Delete a stored symbol; a no-op if it is not stored"""
+        shutil.rmtree(self._symbol_dir(symbol), ignore_errors=True)
+
+    def write(self, symbol, data, source=None):
+        """Store an OHLCV DataFrame under the given symbol"""
+        missing = [col for col in ['date'] + PRICE_COLUMNS if col not in data.columns]
+        if missing:
+            raise ValueError(f"Data must contain columns: {', '.join(missing)}")
+
+        df = data.sort_values('date')
+        dates = pd.to_datetime(df['date']).to_numpy(dtype='datetime64[ns]')
+        prices = np.ascontiguousarray(df[PRICE_COLUMNS].to_numpy(dtype=np.float64).T)
+
+        symbol_dir = self._symbol_dir(symbol)
+        os.makedirs(symbol_dir, exist_ok=True)
+        for name, array in (('date.npy', dates), ('prices.npy', prices)):
+            tmp_path = os.path.join(symbol_dir, f'{name}.tmp')
+            with open(tmp_path, 'wb') as f:
+                np.save(f, array)
+            os.replace(tmp_path, os.path.join(symbol_dir, name))
+
+        manifest = {
+            'version': STORE_VERSION,
+            'symbol': symbol,
+            'rows': int(len(dates)),
+            'columns': ['date'] + PRICE_COLUMNS,
+            'start': str(dates[0])[:10] if len(dates) else None,
+            'end': str(dates[-1])[:10] if len(dates) else None
+        }
+        if source is not None:
+            stat = os.stat(source)
+            manifest['source'] = os.path.abspath(source)
+            manifest['source_mtime'] = stat.st_mtime
+            manifest['source_size'] = stat.st_size
+
+        # Write the manifest last so a partially converted symbol is never loaded
+        tmp_path = os.path.join(symbol_dir, 'manifest.json.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(tmp_path, os.path.join(symbol_dir, 'manifest.json'))
+        return manifest
+
+    def convert_csv(self, csv_path, symbol=None):
+        """Convert a CSV file into the columnar format"""
+        symbol = symbol or symbol_from_path(csv_path)
+        df, errors = read_ohlcv_csv(csv_path)
+        if errors:
+            print(f"Skipped rows in {csv_path}: {format_errors(errors)}")
+        return self.write(symbol, df, source=csv_path)
+
+    def is_fresh(self, symbol, csv_path):
+        """Check whether the stored symbol still matches its source CSV"""
+        manifest = self.manifest(symbol)
+        if manifest is None or manifest.get('version') != STORE_VERSION:
+            return False
+        stat = os.stat(csv_path)
+        return (manifest.get('source') == os.path.abspath(csv_path) and
+                manifest.get('source_mtime') == stat.st_mtime and
+                manifest.get('source_size') == stat.st_size)
+
+    def symbol_for(self, csv_path):
+        """Store symbol of a CSV file
+
+        The file name, unless that symbol already holds a different
+        source file; then the name plus a hash of the file's path, so
+        same-named files in different directories keep separate entries.
+        """
+        symbol = symbol_from_path(csv_path)
+        source = os.path.abspath(csv_path)
+        manifest = self.manifest(symbol)
+        if manifest is None or manifest.get('source') in (None, source):
+            return symbol
+        return f"{symbol}-{hashlib.blake2b(source.encode(), digest_size=4).hexdigest()}"
+
+    def _map(self, symbol):
+        symbol_dir = self._symbol_dir(symbol)
+        if self.manifest(symbol) is None:
+            raise FileNotFoundError(f"Symbol not found in columnar store: {symbol}")
+        # A concurrent rewrite may replace prices.npy between the two loads; map again
+        for _ in range(3):
+            dates = np.load(os.path.join(symbol_dir, 'date.npy'), mmap_mode='r')
+            prices = np.load(os.path.join(symbol_dir, 'prices.npy'), mmap_mode='r')
+            if prices.shape[1] == len(dates):
+                break
+        return dates, prices
+
+    def load_arrays(self, symbol):
+        """Map a symbol's columns without copying them
+
+        Returns a dict of read-only arrays keyed by column name.
+        """
+        dates, prices = self._map(symbol)
+        arrays = {'date': dates}
+        for i, col in enumerate(PRICE_COLUMNS):
+            arrays[col] = prices[i]
+        return arrays
+
+    def load(self, symbol, start_date=None, end_date=None, copy=False):
+        """Load a symbol as a DataFrame backed by the memory-mapped arrays
+
+        The frame is read-only unless copy is set, which copies the
+        selected rows into ordinary writable arrays.
+        """
+        dates, prices = self._map(symbol)
+
+        # Dates are sorted, so range filters are two binary searches
+        start = 0 if start_date is None else np.searchsorted(dates, np.datetime64(start_date, 'ns'), 'left')
+        end = len(dates) if end_date is None else np.searchsorted(dates, np.datetime64(end_date, 'ns'), 'right')
+        df = pd.DataFrame(prices[:, start:end].T, columns=PRICE_COLUMNS, copy=copy)
+        df.insert(0, 'date', np.array(dates[start:end]) if copy else dates[start:end])
+        return df
+
+
+def symbol_from_path(path):
+    """Derive a symbol name from a data file path"""
+    name = os.path.basename(path)
+    while '.' in name:
+        name = os.path.splitext(name)[0]
+    return name
+
+
+def load_market_data(csv_path, store_root='data/columnar'):
+    """Load OHLCV data, preferring the columnar store over re-parsing the CSV
+
+    The CSV is converted on first use; later loads read the stored arrays
+    until the CSV changes. The returned frame is an ordinary writable
+    copy; use ColumnarStore.load for zero-copy read-only access.
+    """
+    store = ColumnarStore(store_root)
+    try:
+        symbol = store.symbol_for(csv_path)
+        if not store.is_fresh(symbol, csv_path):
+            store.convert_csv(csv_path, symbol)
+        return store.load(symbol, copy=True)
+    except OSError as e:
+        print(f"Columnar store unavailable ({e}), reading CSV directly")
+        df, errors = read_ohlcv_csv(csv_path)
+        if errors:
+            print(f"Skipped rows in {csv_path}: {format_errors(errors)}")
+        return df
+
+
+def main():
+    # Run from src/: python -m database.columnar_store ../data/*.csv --root ../data/columnar
+    parser = argparse.ArgumentParser(description='Convert OHLCV CSV files to the columnar store')
+    parser.add_argument('files', nargs='+', help='CSV files to convert')
+    parser.add_argument('--root', default='data/columnar', help='Columnar store directory')
+    args = parser.parse_args()
+
+    store = ColumnarStore(args.root)
+    for path in args.files:
+        manifest = store.convert_csv(path)
+        print(f"{path} -> {os.path.join(args.root, manifest['symbol'])} ({manifest['rows']} rows)")
+
+
+if __name__ == '__main__':
+    main()
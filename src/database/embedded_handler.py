@@ -0,0 +1,226 @@
+import os
+import json
+import sqlite3
+import threading
+import pandas as pd
+from datetime import datetime
+from database.storage_backend import StorageBackend
+
+SCHEMA = """
+create table if not exists market_data (
+  date text primary key,
+  open real not null,
+  high real not null,
+  low real not null,
+  close real not null,
+  volume integer not null,
+  updated_at text
+) without rowid;
+
+create table if not exists analysis_results (
+  id integer primary key autoincrement,
+  type text not null,
+  trend text not null,
+  prediction text not null,
+  confidence real not null,
+  recommendation text not null,
+  summary text not null,
+  created_at text not null
+);
+
+create index if not exists idx_analysis_results_created_at on analysis_results(created_at);
+
+create table if not exists model_predictions (
+  id integer primary key autoincrement,
+  date text not null,
+  predicted_price real not null,
+  confidence real not null,
+  direction text not null,
+  features text,
+  created_at text not null
+);
+
+create index if not exists idx_model_predictions_date on model_predictions(date);
+create index if not exists idx_model_predictions_created_at on model_predictions(created_at);
+"""
+
+# SQL expressions used to bucket daily bars into higher timeframes
+RESAMPLE_BUCKETS = {
+    # Weeks are keyed by their Monday so a week spanning New Year stays one bucket
+    'W': "date(date, 'weekday 0', '-6 days')",
+    'M': "strftime('%Y-%m', date)",
+    'Q': "strftime('%Y', date) || '-Q' || ((cast(strftime('%m', date) as integer) + 2) / 3)",
+    'Y': "strftime('%Y', date)"
+}
+
+MARKET_COLUMNS = ['date', 'open', 'high', 'low', 'close', 'volume']
+
+
+class EmbeddedHandler(StorageBackend):
+    """SQLite storage backend that keeps all data in-process
+
+    A file database is reopened in each process on first use, so a handler
+    created before gunicorn forks its workers never shares its connection
+    with them. An in-memory database cannot be reopened; every process
+    keeps working on its own forked copy.
+    """
+
+    def __init__(self, db_path=':memory:'):
+        self.db_path = db_path
+        self.lock = threading.Lock()
+        self.pid = None
+        self._conn = None
+        self._inherited = None
+        self.conn
+
+    @property
+    def conn(self):
+        """This process's connection, reopened after a fork"""
+        if self.pid != os.getpid() and (self._conn is None or self.db_path != ':memory:'):
+            # Keep the parent's connection referenced so it is never closed from here
+            self._inherited = self._conn
+            self._conn = self._connect()
+        self.pid = os.getpid()
+        return self._conn
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        if self.db_path != ':memory:':
+            conn.execute('pragma journal_mode=wal')
+        conn.executescript(SCHEMA)
+        return conn
+
+    def close(self):
+        """Close the underlying database connection"""
+        self.conn.close()
+
+    def save_market_data(self, data):
+        """Upsert market data rows keyed by date"""
+        df = data[MARKET_COLUMNS].copy()
+        df['date'] = pd.to_datetime(df['date']).dt.strftime('%Y-%m-%d')
+        df['updated_at'] = datetime.now().isoformat()
+        rows = list(df.itertuples(index=False, name=None))
+
+        with self.lock, self.conn:
+            self.conn.executemany(
+                'insert or replace into market_data '
+                '(date, open, high, low, close, volume, updated_at) '
+                'values (?, ?, ?, ?, ?, ?, ?)',
+                rows
+            )
+        return len(rows)
+
+    def get_market_data(self, start_date=None, end_date=None):
+        """Retrieve market data using a range scan on the date key"""
+        query = 'select date, open, high, low, close, volume from market_data where 1=1'
+        params = []
+        if start_date:
+            query += ' and date >= ?'
+            params.append(str(start_date))
+        if end_date:
+            query += ' and date <= ?'
+            params.append(str(end_date))
+        query += ' order by date'
+
+        with self.lock:
+            df = pd.read_sql_query(query, self.conn, params=params)
+        if not df.empty:
+            df['date'] = pd.to_datetime(df['date'], format='%Y-%m-%d')
+        return df
+
+    def get_resampled_market_data(self, period='W', start_date=None, end_date=None):
+        """Aggregate daily bars into weekly, monthly or yearly bars inside SQLite"""
+        if period not in RESAMPLE_BUCKETS:
+            raise ValueError(f"Unsupported period: {period}. Use one of {', '.join(RESAMPLE_BUCKETS)}")
+        bucket = RESAMPLE_BUCKETS[period]
+
+        where = 'where 1=1'
+        params = []
+        if start_date:
+            where += ' and date >= ?'
+            params.append(str(start_date))
+        if end_date:
+            where += ' and date <= ?'
+            params.append(str(end_date))
+
+        # Window functions give first open / last close per bucket in a single scan
+        query = f"""
+            select min(date) as date,
+                   first_open as open,
+                   max(high) as high,
+                   min(low) as low,
+                   last_close as close,
+                   sum(volume) as volume
+            from (
+                select date, high, low, volume, {bucket} as bucket,
+                       first_value(open) over w as first_open,
+                       last_value(close) over w as last_close
+                from market_data
+                {where}
+                window w as (partition by {bucket} order by date
+                             rows between unbounded preceding and unbounded following)
+            )
+            group by bucket
+            order by date
+        """
+
+        with self.lock:
+            df = pd.read_sql_query(query, self.conn, params=params)
+        if not df.empty:
+            df['date'] = pd.to_datetime(df['date'], format='%Y-%m-%d')
+        return df
+
+    def save_analysis_result(self, analysis_data):
+        """Save analysis results"""
+        analysis_data['created_at'] = datetime.now().isoformat()
+
+        with self.lock, self.conn:
+            cursor = self.conn.execute(
+                'insert into analysis_results '
+                '(type, trend, prediction, confidence, recommendation, summary, created_at) '
+                'values (:type, :trend, :prediction, :confidence, :recommendation, :summary, :created_at)',
+                analysis_data
+            )
+        return {'id': cursor.lastrowid, **analysis_data}
+
+    def get_latest_analysis(self):
+        """Get the most recent analysis result"""
+        with self.lock:
+            row = self.conn.execute(
+                'select * from analysis_results order by created_at desc, id desc limit 1'
+            ).fetchone()
+        return dict(row) if row else None
+
+    def save_model_prediction(self, prediction_data):
+        """Save model predictions"""
+        prediction_data['created_at'] = datetime.now().isoformat()
+        record = dict(prediction_data)
+        if record.get('features') is not None:
+            record['features'] = json.dumps(record['features'])
+        record.setdefault('features', None)
+
+        with self.lock, self.conn:
+            cursor = self.conn.execute(
+                'insert into model_predictions '
+                '(date, predicted_price, confidence, direction, features, created_at) '
+                'values (:date, :predicted_price, :confidence, :direction, :features, :created_at)',
+                record
+            )
+        return {'id': cursor.lastrowid, **prediction_data}
+
+    def get_recent_predictions(self, limit=10):
+        """Get recent model predictions"""
+        with self.lock:
+            rows = self.conn.execute(
+                'select * from model_predictions order by created_at desc, id desc limit ?',
+                (limit,)
+            ).fetchall()
+
+        predictions = []
+        for row in rows:
+            record = dict(row)
+            if record['features'] is not None:
+                record['features'] = json.loads(record['features'])
+            predictions.append(record)
+        return predictions
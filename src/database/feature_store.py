@@ -0,0 +1,181 @@
+import os
+import json
+import argparse
+import numpy as np
+import pandas as pd
+from models.ai_predictor import FEATURE_NAMES, FEATURE_SET_VERSION, compute_features
+
+PRICE_COLUMNS = ['open', 'high', 'low', 'close', 'volume']
+
+# Bars of history the rolling features need (price_ma20)
+FEATURE_CONTEXT = 20
+
+
+class FeatureStore:
+    """Versioned store of AIPredictor features, one directory per symbol and feature-set version
+
+    Each <root>/<symbol>/v<version>/ directory holds date.i8 (int64
+    nanoseconds) and features.f64 (row-major float64, one row of
+    FEATURE_NAMES per bar) plus manifest.json. The data files are raw
+    arrays so new bars are appended in place; the manifest row count is
+    written last and readers never look past it. Loading maps the files
+    read-only.
+    """
+
+    def __init__(self, root='data/features', version=FEATURE_SET_VERSION):
+        self.root = root
+        self.version = version
+
+    def _dir(self, symbol):
+        return os.path.join(self.root, symbol, f'v{self.version}')
+
+    def manifest(self, symbol):
+        """Return the manifest of a stored symbol, or None if it is missing"""
+        path = os.path.join(self._dir(symbol), 'manifest.json')
+        if not os.path.exists(path):
+            return None
+        with open(path) as f:
+            return json.load(f)
+
+    def _write_manifest(self, symbol, rows, dates):
+        manifest = {
+            'version': self.version,
+            'symbol': symbol,
+            'feature_names': FEATURE_NAMES,
+            'rows': int(rows),
+            'start': str(dates[0])[:10] if rows else None,
+            'end': str(dates[-1])[:10] if rows else None
+        }
+        tmp_path = os.path.join(self._dir(symbol), 'manifest.json.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(tmp_path, os.path.join(self._dir(symbol), 'manifest.json'))
+        return manifest
+
+    def _append(self, symbol, dates, features, rows):
+        """Append rows after the first `rows` stored ones"""
+        symbol_dir = self._dir(symbol)
+        width = len(FEATURE_NAMES)
+        for name, array, row_bytes in (('date.i8', dates.view('i8'), 8),
+                                       ('features.f64', features, 8 * width)):
+            path = os.path.join(symbol_dir, name)
+            with open(path, 'ab') as f:
+                # Drop anything an interrupted append left past the manifest
+                f.truncate(rows * row_bytes)
+                f.write(np.ascontiguousarray(array).tobytes())
+
+    def write(self, symbol, data):
+        """Compute and store the features of all bars, replacing what was stored"""
+        df = data.sort_values('date')
+        dates = pd.to_datetime(df['date']).to_numpy(dtype='datetime64[ns]')
+        features = compute_features(df[PRICE_COLUMNS]).astype(np.float64)
+
+        # Replace the files whole so readers of the old manifest keep valid maps
+        symbol_dir = self._dir(symbol)
+        os.makedirs(symbol_dir, exist_ok=True)
+        for name, array in (('date.i8', dates.view('i8')), ('features.f64', features)):
+            path = os.path.join(symbol_dir, name)
+            with open(f'{path}.tmp', 'wb') as f:
+                f.write(np.ascontiguousarray(array).tobytes())
+            os.replace(f'{path}.tmp', path)
+        return self._write_manifest(symbol, len(dates), dates)
+
+    def update(self, symbol, data):
+        """Bring the stored features up to date with data
+
+        Bars after the stored range are computed from the last 20 stored
+        bars plus the new ones and appended. If data disagrees with what
+        was stored, everything is rebuilt.
+        """
+        manifest = self.manifest(symbol)
+        if manifest is None or manifest['feature_names'] != FEATURE_NAMES:
+            return self.write(symbol, data)
+
+        df = data.sort_values('date')
+        dates = pd.to_datetime(df['date']).to_numpy(dtype='datetime64[ns]')
+        stored_dates, stored = self.load_arrays(symbol)
+        rows = len(stored_dates)
+        if rows == 0 or len(dates) < rows:
+            return self.write(symbol, data)
+
+        # The stored dates and raw OHLCV columns must match the start of data
+        raw = df[PRICE_COLUMNS].to_numpy(dtype=np.float64)
+        if (not np.array_equal(dates[:rows], stored_dates) or
+                not np.array_equal(raw[:rows], stored[:, :len(PRICE_COLUMNS)])):
+            return self.write(symbol, data)
+        if len(dates) == rows:
+            return manifest
+
+        context = min(rows, FEATURE_CONTEXT)
+        history = pd.DataFrame(np.vstack([stored[-context:, :len(PRICE_COLUMNS)], raw[rows:]]),
+                               columns=PRICE_COLUMNS)
+        features = compute_features(history)[context:].astype(np.float64)
+        self._append(symbol, dates[rows:], features, rows)
+        return self._write_manifest(symbol, len(dates), dates)
+
+    def load_arrays(self, symbol, start_date=None, end_date=None):
+        """Map a contiguous date range of stored features without copying
+
+        Returns (dates, features) with features of shape (rows, len(FEATURE_NAMES)).
+        """
+        manifest = self.manifest(symbol)
+        if manifest is None:
+            raise FileNotFoundError(f"No v{self.version} features stored for symbol: {symbol}")
+        rows = manifest['rows']
+        if rows == 0:
+            return np.empty(0, dtype='datetime64[ns]'), np.empty((0, len(FEATURE_NAMES)))
+
+        symbol_dir = self._dir(symbol)
+        dates = np.memmap(os.path.join(symbol_dir, 'date.i8'), dtype='i8', mode='r',
+                          shape=(rows,)).view('datetime64[ns]')
+        features = np.memmap(os.path.join(symbol_dir, 'features.f64'), dtype=np.float64, mode='r',
+                             shape=(rows, len(FEATURE_NAMES)))
+
+        # Dates are sorted, so range filters are two binary searches
+        start = 0 if start_date is None else np.searchsorted(dates, np.datetime64(start_date, 'ns'), 'left')
+        end = rows if end_date is None else np.searchsorted(dates, np.datetime64(end_date, 'ns'), 'right')
+        return dates[start:end], features[start:end]
+
+    def load(self, symbol, start_date=None, end_date=None):
+        """Load stored features as a DataFrame with a date column"""
+        dates, features = self.load_arrays(symbol, start_date, end_date)
+        df = pd.DataFrame(features, columns=FEATURE_NAMES, copy=False)
+        df.insert(0, 'date', dates)
+        return df
+
+
+def stored_features(symbol, data, root='data/features'):
+    """Feature rows of data from the store, appending any new bars first
+
+    data must be the symbol's full, date-sorted history. Returns None
+    (callers then compute features from the bars) if the store cannot be
+    used.
+    """
+    store = FeatureStore(root)
+    try:
+        store.update(symbol, data)
+        _, features = store.load_arrays(symbol)
+    except OSError as e:
+        print(f"Feature store unavailable ({e}), computing features from the data")
+        return None
+    return features if len(features) == len(data) else None
+
+
+def main():
+    # Run from src/: python -m database.feature_store ../data/*.csv --root ../data/features
+    from database.columnar_store import load_market_data, symbol_from_path
+
+    parser = argparse.ArgumentParser(description='Materialize AIPredictor features for OHLCV CSV files')
+    parser.add_argument('files', nargs='+', help='CSV files to process')
+    parser.add_argument('--root', default='data/features', help='Feature store directory')
+    args = parser.parse_args()
+
+    store = FeatureStore(args.root)
+    for path in args.files:
+        symbol = symbol_from_path(path)
+        manifest = store.update(symbol, load_market_data(path))
+        print(f"{path} -> {symbol} v{manifest['version']} ({manifest['rows']} rows)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,56 @@
+from abc import ABC, abstractmethod
+
+
+class StorageBackend(ABC):
+    """Interface shared by every storage backend used by the dashboards"""
+
+    @abstractmethod
+    def save_market_data(self, data):
+        """Save OHLCV market data"""
+
+    @abstractmethod
+    def get_market_data(self, start_date=None, end_date=None):
+        """Retrieve OHLCV market data as a DataFrame sorted by date"""
+
+    @abstractmethod
+    def save_analysis_result(self, analysis_data):
+        """Save an analysis result"""
+
+    @abstractmethod
+    def get_latest_analysis(self):
+        """Get the most recent analysis result"""
+
+    @abstractmethod
+    def save_model_prediction(self, prediction_data):
+        """Save a model prediction"""
+
+    @abstractmethod
+    def get_recent_predictions(self, limit=10):
+        """Get recent model predictions"""
+
+
+def create_storage_backend(backend='supabase', supabase_url=None, supabase_key=None, db_path=None,
+                           cache_ttl=0, cache_path=None):
+    """Create the storage backend named in the configuration
+
+    When cache_ttl is positive the backend is wrapped in a read-through
+    cache, shared across processes through cache_path if one is given.
+    """
+    # Backends are imported lazily so the embedded one works without the supabase package
+    if backend == 'supabase':
+        from database.supabase_handler import SupabaseHandler
+        handler = SupabaseHandler(supabase_url, supabase_key)
+    elif backend == 'embedded':
+        from database.embedded_handler import EmbeddedHandler
+        handler = EmbeddedHandler(db_path or ':memory:')
+    else:
+        raise ValueError(f"Unknown storage backend: {backend}")
+
+    if cache_ttl and cache_ttl > 0:
+        from database.cached_handler import CachedStorageHandler
+        shared_cache = None
+        if cache_path:
+            from utils.disk_cache import DiskCache
+            shared_cache = DiskCache(cache_path)
+        handler = CachedStorageHandler(handler, ttl=cache_ttl, shared_cache=shared_cache)
+    return handler
@@ -1,8 +1,9 @@
 from supabase import create_client
 import pandas as pd
 from datetime import datetime
+from database.storage_backend import StorageBackend
 
-class SupabaseHandler:
+class SupabaseHandler(StorageBackend):
     def __init__(self, url, key):
         self.supabase = create_client(url, key)
     
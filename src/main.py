@@ -2,10 +2,16 @@ import pandas as pd
 import argparse
 import json
 from trading_advisor import TradingAdvisor
+from database.columnar_store import load_market_data, symbol_from_path
+from database.feature_store import stored_features
+from screener import screen
+from portfolio_risk import RiskEngine, size_screen_results
+from models.online_updater import OnlineUpdater
+from utils.instrumentation import instrumentation
 from datetime import datetime
 import os
 
-def run_analysis(data_file='data/egx30_sample.csv', model_type='mlp', should_train=False):
+def run_analysis(data_file='data/egx30_sample.csv', model_type='mlp', should_train=False, should_update=False):
     """Run the stock analysis with given parameters"""
     print(f"\n=== Running EGX 30 Stock Analysis ===")
     print(f"Using data: {data_file}")
@@ -13,10 +19,9 @@ def run_analysis(data_file='data/egx30_sample.csv', model_type='mlp', should_tra
     
     # Load data
     print(f"Loading data...")
-    df = pd.read_csv(data_file)
-    df['date'] = pd.to_datetime(df['date'])
-    df = df.sort_values('date')
+    df = load_market_data(data_file)
     print(f"Loaded {len(df)} data points")
+    features = stored_features(symbol_from_path(data_file), df)
     
     # Initialize advisor
     advisor = TradingAdvisor(ai_model_type=model_type)
@@ -26,12 +31,29 @@ def run_analysis(data_file='data/egx30_sample.csv', model_type='mlp', should_tra
     
     model_path = f'models/default_{model_type}_model'
     
-    if should_train or not os.path.exists(f'{model_path}_{model_type}.joblib'):
+    saved = any(os.path.exists(f'{model_path}_{model_type}.{ext}') for ext in ('model', 'joblib'))
+    if should_train or not saved:
         print(f"\nTraining {model_type.upper()} model...")
         print("This may take a few moments...")
         advisor.train_ai_model(df)
         advisor.save_models(model_path)
+        updater = OnlineUpdater(advisor.ai_predictor, model_path)
+        updater.mark_trained(df)
+        updater.save_state()
         print("Model trained and saved successfully")
+    elif should_update:
+        print("\nUpdating saved model with new data...")
+        advisor.load_models(model_path)
+        updater = OnlineUpdater(advisor.ai_predictor, model_path)
+        metrics = updater.run(df)
+        updater.save()
+        if 'samples' in metrics:
+            print(f"Model fully retrained ({metrics['reason']})")
+        elif metrics['new_rows']:
+            print(f"Model updated on {metrics['new_rows']} new data points "
+                  f"(error ratio {metrics['error_ratio']:.2f})")
+        else:
+            print("No new data since the last update")
     else:
         print("\nLoading saved model...")
         advisor.load_models(model_path)
@@ -39,7 +61,7 @@ def run_analysis(data_file='data/egx30_sample.csv', model_type='mlp', should_tra
     
     # Generate analysis
     print("\nAnalyzing market conditions...")
-    analysis = advisor.analyze_trade_setup(df)
+    analysis = advisor.analyze_trade_setup(df, features)
     
     # Display results
     print("\n=== Analysis Results ===\n")
@@ -57,17 +79,72 @@ def run_analysis(data_file='data/egx30_sample.csv', model_type='mlp', should_tra
     print(f"\nSummary:")
     print(analysis['summary'])
     
+    if instrumentation.enabled:
+        print_breakdown(instrumentation.breakdown())
+        instrumentation.reset()
+    
     return analysis
 
+def print_breakdown(breakdown):
+    """Print per-stage timings recorded by the instrumentation spans"""
+    print("\n=== Stage Timings ===\n")
+    print(f"{'Stage':<36} {'Calls':>5} {'Wall ms':>10} {'CPU ms':>10} {'Peak KiB':>10}")
+    for name, stats in breakdown.items():
+        print(f"{name:<36} {stats['count']:>5} {stats['wall_s'] * 1000:>10.2f} "
+              f"{stats['cpu_s'] * 1000:>10.2f} {stats['peak_bytes'] / 1024:>10.1f}")
+
 def main():
     parser = argparse.ArgumentParser(description='EGX 30 Stock Trading Advisor')
     parser.add_argument('--data', help='Path to CSV file containing stock data')
     parser.add_argument('--model', choices=['mlp', 'rf'], default='mlp',
                        help='AI model type to use (default: mlp)')
     parser.add_argument('--train', action='store_true', help='Force model retraining')
+    parser.add_argument('--update', action='store_true',
+                       help='Update the saved model with new data instead of retraining from scratch')
     parser.add_argument('--save-model', help='Save trained model to specified path')
     parser.add_argument('--load-model', help='Load trained model from specified path')
     parser.add_argument('--json', action='store_true', help='Output results in JSON format')
+    parser.add_argument('--profile', action='store_true',
+                       help='Print wall time, CPU time and memory peak of each analysis stage')
+    
+    subparsers = parser.add_subparsers(dest='command')
+    screen_parser = subparsers.add_parser('screen', help='Analyze many symbol files in parallel')
+    screen_parser.add_argument('inputs', nargs='+', help='Directories, glob patterns or CSV files')
+    screen_parser.add_argument('--model', choices=['mlp', 'rf'], default='mlp',
+                              help='AI model type to use (default: mlp)')
+    screen_parser.add_argument('--model-path', help='Model path prefix (default: models/default_<model>_model)')
+    screen_parser.add_argument('--workers', type=int, help='Number of worker processes (default: all cores)')
+    screen_parser.add_argument('--format', choices=['jsonl', 'csv'], default='jsonl',
+                              help='Output format (default: jsonl)')
+    screen_parser.add_argument('--output', default='-', help='Output file (default: stdout)')
+    screen_parser.add_argument('--ranked', action='store_true',
+                              help='Write all results sorted by score instead of streaming them')
+    risk_parser = subparsers.add_parser('risk', help='Size screened trades as one portfolio')
+    risk_parser.add_argument('results', help='JSON Lines output of the screen command')
+    risk_parser.add_argument('--capital', type=float, default=1_000_000, help='Portfolio capital (default: 1000000)')
+    risk_parser.add_argument('--risk-per-trade', type=float, default=0.01,
+                             help='Fraction of capital lost if a stop is hit (default: 0.01)')
+    risk_parser.add_argument('--max-position', type=float, default=0.1,
+                             help='Largest weight of one position (default: 0.1)')
+    risk_parser.add_argument('--max-gross', type=float, default=1.0, help='Gross exposure limit (default: 1.0)')
+    risk_parser.add_argument('--var-limit', type=float, default=0.02,
+                             help='One-day 95%% VaR limit as a fraction of capital (default: 0.02)')
+    
+    # Parse once, up front, instead of inside the interactive loop
+    args = parser.parse_args()
+    if args.profile:
+        instrumentation.enable(memory=True)
+    
+    if args.command == 'screen':
+        screen(args.inputs, args.model, args.model_path, args.workers,
+               args.output, args.format, args.ranked)
+        return
+    
+    if args.command == 'risk':
+        engine = RiskEngine(risk_per_trade=args.risk_per_trade, max_position=args.max_position,
+                            max_gross=args.max_gross, var_limit=args.var_limit)
+        print(json.dumps(size_screen_results(args.results, args.capital, engine), indent=2))
+        return
     
     if os.path.exists('data/egx30_sample.csv'):
         while True:
@@ -84,9 +161,8 @@ def main():
             elif choice == '2':
                 run_analysis('data/test_bearish.csv', 'mlp')
             elif choice == '3':
-                args = parser.parse_args()
                 if args.data:
-                    analysis = run_analysis(args.data, args.model, args.train)
+                    analysis = run_analysis(args.data, args.model, args.train, args.update)
                     if args.json:
                         print(json.dumps(analysis, indent=2))
                 else:
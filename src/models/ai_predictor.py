@@ -4,49 +4,103 @@ from sklearn.preprocessing import MinMaxScaler
 from sklearn.ensemble import RandomForestRegressor
 from sklearn.neural_network import MLPRegressor
 import joblib
+import os
+import uuid
+from models.model_artifact import save_artifact, load_artifact
+from utils.instrumentation import span, instrument
+
+FEATURE_NAMES = ['open', 'high', 'low', 'close', 'volume',
+                 'returns', 'high_low_ratio', 'volume_ma5',
+                 'price_ma5', 'price_ma20']
+
+# Bump when compute_features changes so stored features are rebuilt
+FEATURE_SET_VERSION = 1
+
+def compute_features(data):
+    """Build the unscaled feature matrix, one row per bar"""
+    # Ensure we have all required columns
+    required_columns = ['open', 'high', 'low', 'close', 'volume']
+    if not all(col in data.columns for col in required_columns):
+        raise ValueError(f"Data must contain columns: {', '.join(required_columns)}")
+    
+    # Create features
+    df = data.copy()
+    
+    # Add technical indicators
+    df['returns'] = df['close'].pct_change()
+    df['high_low_ratio'] = df['high'] / df['low']
+    df['volume_ma5'] = df['volume'].rolling(window=5, min_periods=1).mean()
+    df['price_ma5'] = df['close'].rolling(window=5, min_periods=1).mean()
+    df['price_ma20'] = df['close'].rolling(window=20, min_periods=1).mean()
+    
+    # Forward fill any remaining NaN values
+    df = df.fillna(method='ffill')
+    # Backward fill any remaining NaN values at the beginning
+    df = df.fillna(method='bfill')
+    
+    return df[FEATURE_NAMES].values
+
+def restore_mlp(arrays, header):
+    """Rebuild a fitted MLPRegressor from artifact arrays, ready for partial_fit"""
+    engine = header['engine']
+    coefs = [np.array(arrays[f'coef_{i}']) for i in range(engine['n_layers'])]
+    intercepts = [np.array(arrays[f'intercept_{i}']) for i in range(engine['n_layers'])]
+    params = {name: value for name, value in header.get('estimator_params', {}).items()
+              if name not in ('hidden_layer_sizes', 'activation')}
+    model = MLPRegressor(hidden_layer_sizes=tuple(coef.shape[1] for coef in coefs[:-1]),
+                         activation=engine['activation'], **params)
+    model.coefs_, model.intercepts_ = coefs, intercepts
+    model.n_features_in_ = coefs[0].shape[0]
+    model.n_layers_ = len(coefs) + 1
+    model.n_outputs_ = coefs[-1].shape[1]
+    model.out_activation_ = engine['out_activation']
+    model.n_iter_, model.t_ = 0, 0
+    model.loss_curve_, model.best_loss_, model._no_improvement_count = [], np.inf, 0
+    return model
 
 class AIPredictor:
-    def __init__(self, model_type='mlp'):
+    def __init__(self, model_type='mlp', model_params=None):
         self.model_type = model_type
+        self.model_params = model_params or {}
         self.model = None
         self.scaler = MinMaxScaler()
         self.last_trained_features = None
+        self.model_version = None
         
-    def prepare_data(self, data, lookback=5):
-        """Prepare data for model training"""
-        # Ensure we have all required columns
-        required_columns = ['open', 'high', 'low', 'close', 'volume']
-        if not all(col in data.columns for col in required_columns):
-            raise ValueError(f"Data must contain columns: {', '.join(required_columns)}")
-        
+    def compute_features(self, data):
+        """Build the unscaled feature matrix, one row per bar"""
+        # Store the feature names for later use
+        self.feature_names = list(FEATURE_NAMES)
+        return compute_features(data)
+    
+    @instrument('ai.prepare_data')
+    def prepare_data(self, data, lookback=5, fit_scaler=True):
+        """Prepare data for model training
+
+        With fit_scaler=False the already fitted scaler is reused as is.
+        """
         if len(data) < 20 + lookback:  # Need at least 20 days for MA20
             raise ValueError(f"Not enough data points. Need at least {20 + lookback} data points.")
             
-        # Create features
-        df = data.copy()
-        
-        # Add technical indicators
-        df['returns'] = df['close'].pct_change()
-        df['high_low_ratio'] = df['high'] / df['low']
-        df['volume_ma5'] = df['volume'].rolling(window=5, min_periods=1).mean()
-        df['price_ma5'] = df['close'].rolling(window=5, min_periods=1).mean()
-        df['price_ma20'] = df['close'].rolling(window=20, min_periods=1).mean()
-        
-        # Forward fill any remaining NaN values
-        df = df.fillna(method='ffill')
-        # Backward fill any remaining NaN values at the beginning
-        df = df.fillna(method='bfill')
-        
-        # Store the feature names for later use
-        self.feature_names = ['open', 'high', 'low', 'close', 'volume', 
-                            'returns', 'high_low_ratio', 'volume_ma5', 
-                            'price_ma5', 'price_ma20']
-        
         # Prepare features
-        features = df[self.feature_names].values
+        features = self.compute_features(data)
+        return self.prepare_windows(features, lookback, fit_scaler)
+    
+    def prepare_windows(self, features, lookback=5, fit_scaler=True):
+        """Scale a feature matrix and cut it into lookback windows
+
+        features are rows of FEATURE_NAMES, as from compute_features or
+        the feature store.
+        """
+        if len(features) < 20 + lookback:  # Need at least 20 days for MA20
+            raise ValueError(f"Not enough data points. Need at least {20 + lookback} data points.")
+        self.feature_names = list(FEATURE_NAMES)
         
         # Scale features
-        scaled_features = self.scaler.fit_transform(features)
+        if fit_scaler:
+            scaled_features = self.scaler.fit_transform(features)
+        else:
+            scaled_features = self.scaler.transform(features)
         
         X, y = [], []
         for i in range(lookback, len(scaled_features)):
@@ -58,28 +112,46 @@ class AIPredictor:
             
         return np.array(X), np.array(y)
     
-    def create_mlp_model(self):
-        """Create Neural Network model using sklearn MLPRegressor"""
-        return MLPRegressor(
+    def create_mlp_model(self, **params):
+        """Create Neural Network model using sklearn MLPRegressor
+
+        Keyword arguments override the default hyperparameters.
+        """
+        config = dict(
             hidden_layer_sizes=(100, 50),
             activation='relu',
             solver='adam',
             max_iter=1000,
             random_state=42
         )
+        config.update(params)
+        return MLPRegressor(**config)
     
-    def create_rf_model(self):
-        """Create Random Forest model"""
-        return RandomForestRegressor(
+    def create_rf_model(self, **params):
+        """Create Random Forest model
+
+        Keyword arguments override the default hyperparameters.
+        """
+        config = dict(
             n_estimators=100,
             max_depth=20,
             random_state=42
         )
+        config.update(params)
+        return RandomForestRegressor(**config)
     
-    def train(self, data, lookback=5):
-        """Train the selected model"""
+    @instrument('ai.train')
+    def train(self, data, lookback=5, features=None):
+        """Train the selected model
+
+        features, when given, are the precomputed feature rows of data
+        (e.g. from the feature store) and data itself is not used.
+        """
         print("Preparing data...")
-        X, y = self.prepare_data(data, lookback)
+        if features is not None:
+            X, y = self.prepare_windows(features, lookback)
+        else:
+            X, y = self.prepare_data(data, lookback)
         
         print(f"Training with {len(X)} samples...")
         
@@ -87,26 +159,37 @@ class AIPredictor:
             raise ValueError("Not enough data for training after preparation")
         
         if self.model_type == 'mlp':
-            self.model = self.create_mlp_model()
+            self.model = self.create_mlp_model(**self.model_params)
         else:
-            self.model = self.create_rf_model()
+            self.model = self.create_rf_model(**self.model_params)
             
         self.model.fit(X, y)
+        self.model_version = f"trained:{uuid.uuid4().hex}"
         return len(X)  # Return number of training samples
     
-    def predict(self, data, lookback=5):
-        """Make predictions using the trained model"""
+    @instrument('ai.predict')
+    def predict(self, data, lookback=5, features=None):
+        """Make predictions using the trained model
+
+        With features (stored feature rows of data), the moving averages
+        span the full history instead of only the last lookback + 20 bars.
+        """
         if self.model is None:
             raise ValueError("Model not trained. Call train() first.")
             
         # Prepare the last lookback days of data
-        X, _ = self.prepare_data(data[-lookback-20:], lookback)  # Include extra data for MA calculation
+        with span('ai.predict.features'):
+            if features is not None:
+                X, _ = self.prepare_windows(features[-lookback-20:], lookback)
+            else:
+                X, _ = self.prepare_data(data[-lookback-20:], lookback)  # Include extra data for MA calculation
         
         if len(X) == 0:
             raise ValueError("Not enough data for prediction")
             
         # Make prediction using the last sample
-        prediction = self.model.predict(X[-1:])
+        with span('ai.predict.inference'):
+            prediction = self.model.predict(X[-1:])
         
         # Create dummy array for inverse transform
         dummy_array = np.zeros((1, len(self.feature_names)))
@@ -116,9 +199,12 @@ class AIPredictor:
         predicted_values = self.scaler.inverse_transform(dummy_array)
         return predicted_values[0, 3]  # Return the close price
     
-    def get_prediction_metrics(self, data):
-        """Calculate prediction metrics and confidence"""
-        prediction = self.predict(data)
+    def get_prediction_metrics(self, data, features=None):
+        """Calculate prediction metrics and confidence
+
+        features are optional stored feature rows of data (see predict).
+        """
+        prediction = self.predict(data, features=features)
         last_price = data['close'].iloc[-1]
         
         # Calculate recent volatility
@@ -143,24 +229,55 @@ class AIPredictor:
         return metrics
     
     def save_model(self, path):
-        """Save the trained model and scaler"""
+        """Save the trained model as one artifact file, <path>_<type>.model
+
+        The artifact holds the scaler, feature names, weights and, for
+        MLPs, the hyperparameters needed to keep training after loading.
+        """
         if self.model is None:
             raise ValueError("No trained model to save")
-        joblib.dump(self.model, f"{path}_{self.model_type}.joblib")
-        joblib.dump(self.scaler, f"{path}_scaler.joblib")
-        
-        # Save feature names and last trained features
-        np.save(f"{path}_features.npy", {
-            'feature_names': self.feature_names,
-            'last_trained_features': self.last_trained_features
-        })
+        save_artifact(self, f"{path}_{self.model_type}.model")
+    
+    def load_model(self, path, inference_only=False):
+        """Load the trained model and scaler
+
+        The weights are memory-mapped from the artifact into a NumPy
+        engine. Unless inference_only is set, an MLP is rebuilt as a
+        scikit-learn model so it can be updated with partial_fit; random
+        forests are only ever retrained from scratch. Models saved before
+        artifacts existed still load from their joblib and npy files.
+        """
+        artifact_path = f"{path}_{self.model_type}.model"
+        if not os.path.exists(artifact_path):
+            self._load_legacy_model(path)
+            return
+
+        engine, header, arrays = load_artifact(artifact_path)
+        if inference_only or header['engine']['type'] != 'mlp':
+            self.model = engine
+        else:
+            self.model = restore_mlp(arrays, header)
+
+        self.scaler = MinMaxScaler()
+        for attr, value in header['scaler'].items():
+            setattr(self.scaler, attr, np.asarray(value) if isinstance(value, list) else value)
+        self.scaler.n_features_in_ = len(header['feature_names'])
+        self.feature_names = header['feature_names']
+        last = arrays.get('last_trained_features')
+        self.last_trained_features = None if last is None else np.array(last)
+        self.model_version = f"{os.path.abspath(artifact_path)}:{header['checksum']}"
     
-    def load_model(self, path):
-        """Load the trained model and scaler"""
+    def _load_legacy_model(self, path):
+        """Load a model saved as joblib model + joblib scaler + pickled npy"""
         self.model = joblib.load(f"{path}_{self.model_type}.joblib")
         self.scaler = joblib.load(f"{path}_scaler.joblib")
         
         # Load feature names and last trained features
         saved_features = np.load(f"{path}_features.npy", allow_pickle=True).item()
         self.feature_names = saved_features['feature_names']
-        self.last_trained_features = saved_features['last_trained_features']
\ No newline at end of file
+        self.last_trained_features = saved_features['last_trained_features']
+        
+        # Identify the loaded weights so cached analyses are tied to them
+        model_file = f"{path}_{self.model_type}.joblib"
+        stat = os.stat(model_file)
+        self.model_version = f"{os.path.abspath(model_file)}:{stat.st_mtime_ns}:{stat.st_size}"
\ No newline at end of file
@@ -0,0 +1,178 @@
+import itertools
+import numpy as np
+import pandas as pd
+
+BAR_COLUMNS = ['date', 'open', 'high', 'low', 'close', 'volume', 'vwap', 'running_vwap', 'trades']
+
+
+def read_trades(path, chunksize=1_000_000):
+    """Stream trade prints (timestamp, price, size) from a CSV file in chunks
+
+    Yields (timestamps, prices, sizes) arrays with timestamps as int64
+    nanoseconds.
+    """
+    reader = pd.read_csv(path, usecols=['timestamp', 'price', 'size'],
+                         dtype={'price': 'float64', 'size': 'float64'}, chunksize=chunksize)
+    for chunk in reader:
+        timestamps = pd.to_datetime(chunk['timestamp']).to_numpy(dtype='datetime64[ns]').view('i8')
+        yield timestamps, chunk['price'].to_numpy(), chunk['size'].to_numpy()
+
+
+def batch_trade_records(records, chunksize=100_000):
+    """Group an iterable of (timestamp, price, size) records into array chunks"""
+    records = iter(records)
+    while True:
+        batch = list(itertools.islice(records, chunksize))
+        if not batch:
+            return
+        timestamps, prices, sizes = zip(*batch)
+        yield (pd.to_datetime(list(timestamps)).to_numpy(dtype='datetime64[ns]').view('i8'),
+               np.asarray(prices, dtype=np.float64),
+               np.asarray(sizes, dtype=np.float64))
+
+
+class TradeBarAggregator:
+    """Streaming aggregation of trade prints into time, volume or tick bars
+
+    Each chunk of trades is grouped with NumPy (boundary detection plus
+    ufunc.reduceat), so there is no per-trade Python loop. The last bar of
+    a chunk stays open and is merged with the next chunk; call flush() at
+    the end of the stream to emit it.
+    """
+
+    def __init__(self, bar_type='time', interval='1min', threshold=None):
+        if bar_type not in ('time', 'volume', 'tick'):
+            raise ValueError("bar_type must be 'time', 'volume' or 'tick'")
+        if bar_type != 'time' and not threshold:
+            raise ValueError(f"{bar_type} bars need a positive threshold")
+
+        self.bar_type = bar_type
+        self.interval_ns = pd.Timedelta(interval).value if bar_type == 'time' else None
+        self.threshold = threshold
+        self.partial = None
+        self.consumed = 0  # trades or volume assigned to buckets so far
+        self.last_timestamp = None
+        self.cum_pv = 0.0
+        self.cum_volume = 0.0
+
+    def _buckets(self, timestamps, sizes):
+        if self.bar_type == 'time':
+            return timestamps // self.interval_ns
+        if self.bar_type == 'tick':
+            buckets = (self.consumed + np.arange(len(timestamps))) // self.threshold
+            self.consumed += len(timestamps)
+            return buckets
+        # Volume bars: a trade belongs to the bar in which its first unit falls
+        volume_before = self.consumed + np.cumsum(sizes) - sizes
+        self.consumed += sizes.sum()
+        return (volume_before // self.threshold).astype(np.int64)
+
+    def process(self, timestamps, prices, sizes):
+        """Aggregate a chunk of trades and return the bars it completed"""
+        timestamps = np.asarray(timestamps, dtype=np.int64)
+        prices = np.asarray(prices, dtype=np.float64)
+        sizes = np.asarray(sizes, dtype=np.float64)
+        if len(timestamps) == 0:
+            return self._to_frame(None)
+
+        if np.any(timestamps[1:] < timestamps[:-1]) or (
+                self.last_timestamp is not None and timestamps[0] < self.last_timestamp):
+            raise ValueError("Trades must be in timestamp order")
+        self.last_timestamp = timestamps[-1]
+
+        buckets = self._buckets(timestamps, sizes)
+        starts = np.flatnonzero(np.concatenate(([True], buckets[1:] != buckets[:-1])))
+        ends = np.append(starts[1:], len(timestamps)) - 1
+
+        groups = {
+            'bucket': buckets[starts],
+            'start': timestamps[starts],
+            'open': prices[starts],
+            'high': np.maximum.reduceat(prices, starts),
+            'low': np.minimum.reduceat(prices, starts),
+            'close': prices[ends],
+            'volume': np.add.reduceat(sizes, starts),
+            'pv': np.add.reduceat(prices * sizes, starts),
+            'trades': np.diff(np.append(starts, len(timestamps)))
+        }
+
+        if self.partial is not None:
+            if self.partial['bucket'] == groups['bucket'][0]:
+                # The open bar continues into this chunk
+                p = self.partial
+                groups['start'][0] = p['start']
+                groups['open'][0] = p['open']
+                groups['high'][0] = max(groups['high'][0], p['high'])
+                groups['low'][0] = min(groups['low'][0], p['low'])
+                groups['volume'][0] += p['volume']
+                groups['pv'][0] += p['pv']
+                groups['trades'][0] += p['trades']
+            else:
+                groups = {key: np.concatenate(([self.partial[key]], values))
+                          for key, values in groups.items()}
+
+        # The last group may still receive trades
+        self.partial = {key: values[-1] for key, values in groups.items()}
+        completed = {key: values[:-1] for key, values in groups.items()}
+        return self._to_frame(completed)
+
+    def flush(self):
+        """Emit the open bar, if any"""
+        if self.partial is None:
+            return self._to_frame(None)
+        completed = {key: np.array([value]) for key, value in self.partial.items()}
+        self.partial = None
+        return self._to_frame(completed)
+
+    def _to_frame(self, groups):
+        if groups is None or len(groups['open']) == 0:
+            return pd.DataFrame(columns=BAR_COLUMNS)
+
+        if self.bar_type == 'time':
+            dates = (groups['bucket'] * self.interval_ns).astype('datetime64[ns]')
+        else:
+            dates = groups['start'].astype('datetime64[ns]')
+
+        cum_pv = self.cum_pv + np.cumsum(groups['pv'])
+        cum_volume = self.cum_volume + np.cumsum(groups['volume'])
+        self.cum_pv, self.cum_volume = cum_pv[-1], cum_volume[-1]
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return pd.DataFrame({
+                'date': dates,
+                'open': groups['open'],
+                'high': groups['high'],
+                'low': groups['low'],
+                'close': groups['close'],
+                'volume': groups['volume'],
+                'vwap': groups['pv'] / groups['volume'],
+                'running_vwap': cum_pv / cum_volume,
+                'trades': groups['trades']
+            })
+
+
+def aggregate_trades(chunks, bar_type='time', interval='1min', threshold=None):
+    """Aggregate a stream of (timestamps, prices, sizes) chunks into one bar DataFrame
+
+    The result has the date/open/high/low/close/volume columns SMCAnalyzer
+    and TradingAdvisor expect.
+    """
+    aggregator = TradeBarAggregator(bar_type, interval, threshold)
+    frames = [aggregator.process(*chunk) for chunk in chunks]
+    frames.append(aggregator.flush())
+    frames = [frame for frame in frames if len(frame)]
+    if not frames:
+        return pd.DataFrame(columns=BAR_COLUMNS)
+    return pd.concat(frames, ignore_index=True)
+
+
+def to_indicator_input(bars):
+    """Convert bars to the input format of the netlify analyzers' BaseAnalyzer.load_data"""
+    return {
+        'dates': bars['date'].dt.strftime('%Y-%m-%dT%H:%M:%S').tolist(),
+        'open': bars['open'].tolist(),
+        'high': bars['high'].tolist(),
+        'low': bars['low'].tolist(),
+        'close': bars['close'].tolist(),
+        'volume': bars['volume'].tolist()
+    }
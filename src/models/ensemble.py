@@ -0,0 +1,223 @@
+import json
+import hashlib
+import argparse
+import numpy as np
+from models.ai_predictor import AIPredictor, FEATURE_NAMES
+from models.numpy_mlp import ACTIVATIONS, MA_WINDOW, CLOSE_INDEX, scaled_windows, inverse_close, mlp_arrays
+from models.flat_forest import FlatForestPredictor, flatten_forest
+
+# Default central coverage of the reported interval
+DEFAULT_LEVEL = 0.9
+
+
+def next_close_windows(data, lookback):
+    """Training windows of data: scaled inputs and the next close on each window's own scale"""
+    columns = [data[col].to_numpy(dtype=np.float64) for col in FEATURE_NAMES[:5]]
+    X, scaler_min, scale = scaled_windows([col[:-1] for col in columns], lookback)
+    target = columns[3][lookback + MA_WINDOW:]
+    return X, target * scale[:, CLOSE_INDEX] + scaler_min[:, CLOSE_INDEX]
+
+
+class PredictionEnsemble:
+    """Predictive distribution of the next close from an ensemble of models
+
+    The members are bootstrap-trained MLPs, whose stacked weights are
+    evaluated for all members in one batched matmul per layer, or the
+    trees of one random forest, scored in one vectorized traversal.
+
+    Intervals are split-conformal: on held-out calibration windows the
+    errors of the ensemble mean, normalized by the member spread, give the
+    quantile that scales the spread into an interval with the requested
+    coverage. Training, calibration and prediction windows are all scaled
+    the same way, by scaled_windows, so the calibrated scores hold at
+    prediction time.
+    """
+
+    def __init__(self, kind, arrays, meta, scores):
+        self.kind = kind
+        self.meta = meta
+        self.scores = np.sort(np.asarray(scores, dtype=np.float64))
+        self.lookback = meta['lookback']
+        self.arrays = arrays
+        if kind == 'mlp':
+            n_layers = meta['n_layers']
+            self.coefs = [arrays[f'coef_{i}'] for i in range(n_layers)]
+            self.intercepts = [arrays[f'intercept_{i}'] for i in range(n_layers)]
+        elif kind == 'forest':
+            self.forest = FlatForestPredictor.from_arrays(arrays, meta)
+        else:
+            raise ValueError(f"Unknown ensemble kind: {kind}")
+        self.version = self._digest()
+
+    def _digest(self):
+        """Content hash identifying the weights and calibration"""
+        digest = hashlib.blake2b(digest_size=8)
+        for name in sorted(self.arrays):
+            digest.update(np.ascontiguousarray(self.arrays[name]).tobytes())
+        digest.update(self.scores.tobytes())
+        return digest.hexdigest()
+
+    @property
+    def n_members(self):
+        return len(self.coefs[0]) if self.kind == 'mlp' else len(self.forest.roots)
+
+    @classmethod
+    def fit(cls, data, model_type='mlp', n_members=10, lookback=5, calibration_fraction=0.2,
+            model_params=None, seed=42):
+        """Train an ensemble on data and calibrate it on the most recent windows
+
+        MLP members are trained on bootstrap resamples of the training
+        windows; a random forest's own trees serve as the members.
+        """
+        predictor = AIPredictor(model_type=model_type, model_params=model_params)
+        X, y = next_close_windows(data, lookback)
+        n_calibration = max(1, int(len(X) * calibration_fraction))
+        if len(X) - n_calibration < 2:
+            raise ValueError("Not enough data to train and calibrate an ensemble")
+        X_train, y_train = X[:-n_calibration], y[:-n_calibration]
+        X_cal, y_cal = X[-n_calibration:], y[-n_calibration:]
+
+        meta = {'lookback': lookback, 'feature_names': FEATURE_NAMES, 'model_type': model_type}
+        if model_type == 'mlp':
+            rng = np.random.RandomState(seed)
+            members = []
+            for i in range(n_members):
+                sample = rng.randint(0, len(X_train), len(X_train))
+                model = predictor.create_mlp_model(**{'random_state': seed + i, **(model_params or {})})
+                members.append(model.fit(X_train[sample], y_train[sample]))
+
+            per_member = [mlp_arrays(model) for model in members]
+            meta.update(per_member[0][1])
+            arrays = {name: np.stack([weights[name] for weights, _ in per_member])
+                      for name in per_member[0][0]}
+            ensemble = cls('mlp', arrays, meta, [])
+        else:
+            model = predictor.create_rf_model(**(model_params or {}))
+            model.fit(X_train, y_train)
+            arrays, info = flatten_forest(model)
+            meta.update(info)
+            ensemble = cls('forest', arrays, meta, [])
+
+        ensemble.calibrate(X_cal, y_cal)
+        return ensemble
+
+    def calibrate(self, X, y):
+        """Set the conformal scores from calibration windows not used for training"""
+        members = self.members(X)
+        center = members.mean(axis=0)
+        spread = members.std(axis=0) + 1e-12
+        self.scores = np.sort(np.abs(np.asarray(y) - center) / spread)
+        self.version = self._digest()
+        return self.scores
+
+    def members(self, X):
+        """Member predictions for scaled windows X, shape (members, rows)"""
+        X = np.asarray(X, dtype=np.float64)
+        if self.kind == 'forest':
+            return self.forest.predict_trees(X)
+
+        # (members, rows, units) through every layer, all members at once
+        activation = X[None, :, :]
+        hidden = ACTIVATIONS[self.meta['activation']]
+        for i, (coef, intercept) in enumerate(zip(self.coefs, self.intercepts)):
+            activation = np.matmul(activation, coef)
+            activation += intercept[:, None, :]
+            if i < len(self.coefs) - 1:
+                activation = hidden(activation)
+        return ACTIVATIONS[self.meta['out_activation']](activation)[:, :, 0]
+
+    def quantile(self, level=DEFAULT_LEVEL):
+        """Conformal multiplier of the member spread for the given coverage"""
+        n = len(self.scores)
+        if n == 0:
+            raise ValueError("Ensemble is not calibrated")
+        rank = int(np.ceil((n + 1) * level)) - 1
+        # Too few calibration windows for this level; fall back to the largest score
+        return self.scores[min(rank, n - 1)]
+
+    def interval(self, X, level=DEFAULT_LEVEL):
+        """Mean, spread and conformal interval for scaled windows X"""
+        members = self.members(X)
+        center = members.mean(axis=0)
+        spread = members.std(axis=0)
+        width = self.quantile(level) * spread
+        return {'center': center, 'spread': spread, 'lower': center - width, 'upper': center + width,
+                'members': members}
+
+    def predict_interval(self, data, level=DEFAULT_LEVEL):
+        """Interval of the close after the last bar of data, in prices"""
+        columns = [data[col].to_numpy()[-self.lookback - MA_WINDOW:] for col in FEATURE_NAMES[:5]]
+        X, scaler_min, scale = scaled_windows(columns, self.lookback)
+        result = self.interval(X, level)
+        scaler_min, scale = scaler_min[0], scale[0]
+        members = inverse_close(result['members'][:, 0], scaler_min, scale)
+        return {
+            'level': level,
+            'mean': float(inverse_close(result['center'][0], scaler_min, scale)),
+            'lower': float(inverse_close(result['lower'][0], scaler_min, scale)),
+            'upper': float(inverse_close(result['upper'][0], scaler_min, scale)),
+            'std': float(result['spread'][0] / scale[CLOSE_INDEX]),
+            'prob_up': float(np.mean(members > data['close'].iloc[-1])),
+            'members': len(members)
+        }
+
+    def coverage(self, data, level=DEFAULT_LEVEL, start=None):
+        """Fraction of closes inside the interval predicted from the bars before them
+
+        Rolls predict_interval over data in one batch, checking the closes
+        from bar start on (default: the first bar with a full window).
+        Closes the ensemble was trained or calibrated on give an optimistic
+        figure; check held-out bars.
+        """
+        window = self.lookback + MA_WINDOW
+        start = window if start is None else max(start, window)
+        X, y = next_close_windows(data.iloc[start - window:], self.lookback)
+        result = self.interval(X, level)
+        return float(np.mean((y >= result['lower']) & (y <= result['upper'])))
+
+    def save(self, path):
+        """Save the ensemble to an .npz file"""
+        np.savez(path, kind=np.array(self.kind), meta=np.array(json.dumps(self.meta)),
+                 scores=self.scores, **self.arrays)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as archive:
+            meta = json.loads(str(archive['meta']))
+            arrays = {name: archive[name] for name in archive.files if name not in ('kind', 'meta', 'scores')}
+            return cls(str(archive['kind']), arrays, meta, archive['scores'])
+
+
+def ensemble_path(model_path):
+    """Where the ensemble of a model saved at model_path lives"""
+    return f"{model_path}_ensemble.npz"
+
+
+def main():
+    # Run from src/: python -m models.ensemble --data ../data/egx30_sample.csv --output ../models/trained_model
+    from database.columnar_store import load_market_data
+
+    parser = argparse.ArgumentParser(description='Train a calibrated prediction-interval ensemble')
+    parser.add_argument('--data', required=True, help='Path to CSV file containing stock data')
+    parser.add_argument('--model', choices=['mlp', 'rf'], default='mlp', help='AI model type (default: mlp)')
+    parser.add_argument('--members', type=int, default=10, help='Bootstrap MLPs to train (default: 10)')
+    parser.add_argument('--calibration', type=float, default=0.2,
+                        help='Fraction of the most recent windows held out for calibration (default: 0.2)')
+    parser.add_argument('--holdout', type=int, default=0,
+                        help='Leave out the last N bars and report the interval coverage on them')
+    parser.add_argument('--output', required=True, help='Model path prefix; writes <output>_ensemble.npz')
+    args = parser.parse_args()
+
+    data = load_market_data(args.data)
+    train = data.iloc[:-args.holdout] if args.holdout else data
+    ensemble = PredictionEnsemble.fit(train, args.model, args.members, calibration_fraction=args.calibration)
+    if args.holdout:
+        coverage = ensemble.coverage(data, DEFAULT_LEVEL, start=len(train))
+        print(f"Coverage of the {DEFAULT_LEVEL:.0%} interval on {args.holdout} held-out bars: {coverage:.2f}")
+    path = ensemble_path(args.output)
+    ensemble.save(path)
+    print(f"Saved {ensemble.n_members}-member ensemble calibrated on {len(ensemble.scores)} windows to {path}")
+
+
+if __name__ == '__main__':
+    main()
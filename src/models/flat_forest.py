@@ -0,0 +1,226 @@
+import os
+import json
+import argparse
+import numpy as np
+from models.numpy_mlp import FEATURE_NAMES, prepare_window, inverse_close
+
+FOREST_VERSION = 1
+ARRAY_NAMES = ['roots', 'feature', 'threshold', 'children_left', 'children_right', 'value']
+
+
+def _flatten_tree(tree, max_depth=None):
+    """Nodes of one fitted sklearn tree in breadth-first order, cut at max_depth
+
+    Returns (feature, threshold, left, right, value, depth) with child
+    indices local to the tree. Leaves, including nodes turned into leaves by the depth cut,
+    point to themselves so traversal can run a fixed number of steps.
+    """
+    feature, threshold, left, right, value = [], [], [], [], []
+    queue = [(0, 0)]  # (sklearn node id, depth)
+    head = 0
+    while head < len(queue):
+        node, depth = queue[head]
+        index = head
+        head += 1
+
+        is_leaf = tree.children_left[node] == -1 or (max_depth is not None and depth >= max_depth)
+        value.append(tree.value[node][:, 0])
+        if is_leaf:
+            feature.append(0)
+            threshold.append(np.inf)
+            left.append(index)
+            right.append(index)
+            continue
+
+        feature.append(tree.feature[node])
+        threshold.append(tree.threshold[node])
+        left.append(len(queue))
+        queue.append((tree.children_left[node], depth + 1))
+        right.append(len(queue))
+        queue.append((tree.children_right[node], depth + 1))
+
+    depth = max(d for _, d in queue)
+    return (np.array(feature), np.array(threshold), np.array(left), np.array(right),
+            np.array(value), depth)
+
+
+def flatten_forest(model, dtype=np.float64, max_depth=None):
+    """Flatten a fitted RandomForestRegressor into contiguous node arrays
+
+    Returns (arrays, info): the arrays named in ARRAY_NAMES plus
+    feature_importances, and a dict describing their layout.
+    """
+    if model is None or not hasattr(model, 'estimators_'):
+        raise ValueError("Only trained random forest models can be exported")
+
+    dtype = np.dtype(dtype)
+    parts = {name: [] for name in ARRAY_NAMES}
+    offset = 0
+    depth = 0
+    for estimator in model.estimators_:
+        feature, threshold, left, right, value, tree_depth = _flatten_tree(estimator.tree_, max_depth)
+        parts['roots'].append([offset])
+        parts['feature'].append(feature)
+        parts['threshold'].append(threshold)
+        parts['children_left'].append(left + offset)
+        parts['children_right'].append(right + offset)
+        parts['value'].append(value)
+        offset += len(feature)
+        depth = max(depth, tree_depth)
+
+    index_dtype = np.int32 if offset < np.iinfo(np.int32).max else np.int64
+    arrays = {
+        'roots': np.concatenate(parts['roots']).astype(index_dtype),
+        'feature': np.concatenate(parts['feature']).astype(np.int32),
+        'threshold': np.concatenate(parts['threshold']).astype(dtype),
+        'children_left': np.concatenate(parts['children_left']).astype(index_dtype),
+        'children_right': np.concatenate(parts['children_right']).astype(index_dtype),
+        'value': np.ascontiguousarray(np.concatenate(parts['value']), dtype=dtype),
+        'feature_importances': np.asarray(model.feature_importances_, dtype=np.float64)
+    }
+    info = {
+        'n_trees': len(model.estimators_),
+        'n_nodes': int(offset),
+        'depth': int(depth),
+        'max_depth': max_depth,
+        'n_features': int(model.n_features_in_),
+        'n_outputs': int(arrays['value'].shape[1]),
+        'dtype': dtype.name
+    }
+    return arrays, info
+
+
+def export_forest(predictor, path, dtype=np.float64, max_depth=None):
+    """Flatten a trained random-forest AIPredictor into a directory of .npy arrays
+
+    All trees are concatenated into contiguous node arrays (feature,
+    threshold, children_left, children_right, value) with one root index
+    per tree, plus a manifest.json. dtype sets the threshold and value
+    precision; max_depth cuts the trees, turning deeper subtrees into
+    leaves that predict their node mean.
+    """
+    arrays, info = flatten_forest(predictor.model, dtype, max_depth)
+
+    os.makedirs(path, exist_ok=True)
+    for name, array in arrays.items():
+        np.save(os.path.join(path, f'{name}.npy'), array)
+
+    feature_names = list(predictor.feature_names)
+    manifest = {
+        'version': FOREST_VERSION,
+        **info,
+        'feature_names': feature_names,
+        'lookback': info['n_features'] // len(feature_names)
+    }
+    # Write the manifest last so a partially exported forest is never loaded
+    tmp_path = os.path.join(path, 'manifest.json.tmp')
+    with open(tmp_path, 'w') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, os.path.join(path, 'manifest.json'))
+    return manifest
+
+
+class FlatForestPredictor:
+    """Vectorized random-forest inference over flattened tree arrays
+
+    The arrays are memory-mapped read-only by default, so loading is
+    near-instant and pages are shared between worker processes. Each
+    prediction walks every row through every tree at once: one NumPy
+    gather per tree level instead of a Python or per-tree loop.
+    """
+
+    def __init__(self, path, mmap=True):
+        with open(os.path.join(path, 'manifest.json')) as f:
+            manifest = json.load(f)
+        if manifest['version'] != FOREST_VERSION:
+            raise ValueError(f"Unsupported forest format version: {manifest['version']}")
+
+        mmap_mode = 'r' if mmap else None
+        arrays = {}
+        for name in ARRAY_NAMES + ['feature_importances']:
+            array_path = os.path.join(path, f'{name}.npy')
+            if os.path.exists(array_path):
+                arrays[name] = np.load(array_path, mmap_mode=mmap_mode)
+        self._setup(arrays, manifest)
+
+    @classmethod
+    def from_arrays(cls, arrays, manifest):
+        """Build the engine from flatten_forest arrays, e.g. memory-mapped ones"""
+        engine = cls.__new__(cls)
+        engine._setup(arrays, manifest)
+        return engine
+
+    def _setup(self, arrays, manifest):
+        self.manifest = manifest
+        for name in ARRAY_NAMES:
+            setattr(self, name, arrays[name])
+        # Read by AIPredictor.get_prediction_metrics, as on the sklearn model
+        if 'feature_importances' in arrays:
+            self.feature_importances_ = arrays['feature_importances']
+
+        self.depth = manifest['depth']
+        self.lookback = manifest['lookback']
+        self.feature_names = manifest['feature_names']
+
+    def apply(self, X):
+        """Leaf index reached by each row in each tree, shape (rows, trees)"""
+        # sklearn compares float32 features against the split thresholds
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        flat_X = X.ravel()
+        row_offsets = (np.arange(len(X)) * X.shape[1])[:, None]
+        nodes = np.broadcast_to(self.roots, (len(X), len(self.roots)))
+        for _ in range(self.depth):
+            go_left = flat_X.take(row_offsets + self.feature.take(nodes)) <= self.threshold.take(nodes)
+            nodes = np.where(go_left, self.children_left.take(nodes), self.children_right.take(nodes))
+        return nodes
+
+    def predict(self, X, batch_size=4096):
+        """Average the tree outputs for each row of X, like RandomForestRegressor.predict"""
+        X = np.asarray(X)
+        outputs = []
+        for start in range(0, len(X), batch_size):
+            leaves = self.apply(X[start:start + batch_size])
+            outputs.append(self.value[leaves].mean(axis=1, dtype=np.float64))
+        result = np.concatenate(outputs) if outputs else np.empty((0, self.manifest['n_outputs']))
+        return result.ravel() if result.shape[1] == 1 else result
+
+    def predict_trees(self, X, batch_size=4096):
+        """Per-tree outputs of the first target, shape (trees, rows)"""
+        X = np.asarray(X)
+        outputs = [self.value[self.apply(X[start:start + batch_size]), 0].T
+                   for start in range(0, len(X), batch_size)]
+        return np.concatenate(outputs, axis=1) if outputs else np.empty((len(self.roots), 0))
+
+    def predict_arrays(self, open_, high, low, close, volume):
+        """Predict the next close from OHLCV arrays, reproducing AIPredictor.predict"""
+        if self.feature_names != FEATURE_NAMES:
+            raise ValueError(f"Unsupported feature set: {self.feature_names}")
+        X, scaler_min, scale = prepare_window((open_, high, low, close, volume), self.lookback)
+        return inverse_close(np.atleast_1d(self.predict(X)[0])[0], scaler_min, scale)
+
+    def predict_frame(self, data):
+        """Predict the next close from a DataFrame with OHLCV columns"""
+        return self.predict_arrays(*(data[col].to_numpy() for col in FEATURE_NAMES[:5]))
+
+
+def main():
+    # Run from src/: python -m models.flat_forest ../models/rf_model ../models/rf_model_flat
+    parser = argparse.ArgumentParser(description='Flatten a random forest AIPredictor model into .npy arrays')
+    parser.add_argument('model_path', help='Model path prefix used with AIPredictor.save_model')
+    parser.add_argument('output', help='Output directory')
+    parser.add_argument('--float32', action='store_true', help='Store thresholds and values as float32')
+    parser.add_argument('--max-depth', type=int, help='Cut the trees at this depth')
+    args = parser.parse_args()
+
+    from models.ai_predictor import AIPredictor
+    predictor = AIPredictor(model_type='rf')
+    predictor.load_model(args.model_path)
+    manifest = export_forest(predictor, args.output,
+                             dtype=np.float32 if args.float32 else np.float64,
+                             max_depth=args.max_depth)
+    print(f"Exported {manifest['n_trees']} trees ({manifest['n_nodes']} nodes, "
+          f"depth {manifest['depth']}) to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
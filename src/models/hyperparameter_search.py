@@ -0,0 +1,245 @@
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import itertools
+import warnings
+import multiprocessing
+from multiprocessing import shared_memory
+import numpy as np
+from sklearn.exceptions import ConvergenceWarning
+from sklearn.model_selection import TimeSeriesSplit
+from models.ai_predictor import AIPredictor
+
+SEARCH_SPACES = {
+    'mlp': {
+        'hidden_layer_sizes': [(50,), (100, 50), (64, 32), (128, 64, 32)],
+        'alpha': [1e-4, 1e-3, 1e-2],
+        'learning_rate_init': [1e-3, 3e-3, 1e-2]
+    },
+    'rf': {
+        'n_estimators': [50, 100, 200],
+        'max_depth': [5, 10, 20, None],
+        'min_samples_leaf': [1, 2, 5],
+        'max_features': [1.0, 0.5, 'sqrt']
+    }
+}
+
+# Shared state of pool workers, set by _init_worker
+_worker = {}
+
+
+def sample_configs(space, n_trials=None, seed=42):
+    """Full grid of a search space, or a random sample of n_trials configurations from it"""
+    names = sorted(space)
+    grid = [dict(zip(names, values)) for values in itertools.product(*(space[name] for name in names))]
+    if n_trials is None or n_trials >= len(grid):
+        return grid
+    return random.Random(seed).sample(grid, n_trials)
+
+
+def _share_array(array):
+    """Copy an array into a new shared memory block"""
+    shm = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+    np.ndarray(array.shape, dtype=array.dtype, buffer=shm.buf)[...] = array
+    return shm, (shm.name, array.shape, array.dtype.str)
+
+
+def _attach_array(spec):
+    name, shape, dtype = spec
+    shm = shared_memory.SharedMemory(name=name)
+    return shm, np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf)
+
+
+def fold_windows(features, lookback, n_splits):
+    """Time-series folds of lookback windows, each scaled by its training part only
+
+    Returns (X_train, y_train, X_test, y_test, close_scale) per fold. The
+    scaler of a fold is fit on the bars its training windows and targets
+    cover, so test-period highs and lows do not leak into training.
+    close_scale converts scaled close errors back to prices.
+    """
+    n_samples = len(features) - lookback
+    folds = []
+    for train_idx, test_idx in TimeSeriesSplit(n_splits=n_splits).split(np.arange(n_samples)):
+        predictor = AIPredictor()
+        # Sample i is the window ending before bar i + lookback, its target
+        predictor.scaler.fit(features[:train_idx[-1] + lookback + 1])
+        X, y = predictor.prepare_windows(features, lookback, fit_scaler=False)
+        folds.append((X[train_idx], y[train_idx], X[test_idx], y[test_idx], predictor.scaler.scale_[3]))
+    return folds
+
+
+def _init_worker(model_type, features_spec, lookback, n_splits, prune_factor, best_scores, lock):
+    warnings.filterwarnings('ignore', category=ConvergenceWarning)
+    features_shm, features = _attach_array(features_spec)
+    _worker.update({
+        'model_type': model_type,
+        'shm': features_shm,  # keep the block mapped while the worker lives
+        'folds': fold_windows(features, lookback, n_splits),
+        'prune_factor': prune_factor,
+        'best_scores': best_scores,
+        'lock': lock
+    })
+
+
+def _evaluate(trial):
+    """Time-series cross-validate one configuration
+
+    After each fold the running mean error is compared with the best
+    finished trial at the same fold; trials worse by more than
+    prune_factor stop early.
+    """
+    index, params = trial
+    best_scores, lock = _worker['best_scores'], _worker['lock']
+    predictor = AIPredictor(model_type=_worker['model_type'])
+    create_model = predictor.create_mlp_model if predictor.model_type == 'mlp' else predictor.create_rf_model
+
+    start = time.perf_counter()
+    fold_mae = []
+    pruned = False
+    try:
+        for fold, (X_train, y_train, X_test, y_test, close_scale) in enumerate(_worker['folds']):
+            model = create_model(**params)
+            model.fit(X_train, y_train)
+            fold_mae.append(float(np.mean(np.abs(model.predict(X_test) - y_test)) / close_scale))
+
+            if np.mean(fold_mae) > _worker['prune_factor'] * best_scores[fold]:
+                pruned = fold < len(_worker['folds']) - 1
+                break
+    except Exception as e:
+        return {'trial': index, 'params': params, 'error': str(e)}
+
+    result = {
+        'trial': index,
+        'params': params,
+        'fold_mae': fold_mae,
+        'mean_mae': float(np.mean(fold_mae)),
+        'std_mae': float(np.std(fold_mae)),
+        'pruned': pruned,
+        'seconds': time.perf_counter() - start
+    }
+    if not pruned:
+        # Publish the running means of the best complete trial for pruning
+        running = np.cumsum(fold_mae) / np.arange(1, len(fold_mae) + 1)
+        with lock:
+            if result['mean_mae'] < best_scores[len(fold_mae) - 1]:
+                best_scores[:] = list(running)
+    return result
+
+
+def _to_json(params):
+    return {key: list(value) if isinstance(value, tuple) else value for key, value in params.items()}
+
+
+def _from_json(params):
+    return {key: tuple(value) if isinstance(value, list) else value for key, value in params.items()}
+
+
+def search(data, model_type='mlp', space=None, n_trials=None, n_splits=5, workers=None,
+           prune_factor=1.5, output=None, lookback=5, seed=42):
+    """Cross-validated hyperparameter search over a process pool
+
+    The unscaled features are computed once in the parent and shared with
+    the workers through shared memory; each worker then scales every fold
+    on its training part (see fold_windows). Errors are in price units.
+    Returns the leaderboard (best first).
+    With output set, the leaderboard is written to <output>_leaderboard.json
+    and the best configuration is retrained on all of data and saved as a
+    regular AIPredictor model at output.
+    """
+    space = space or SEARCH_SPACES[model_type]
+    configs = sample_configs(space, n_trials, seed)
+    workers = min(workers or os.cpu_count() or 1, len(configs))
+
+    if len(data) < 20 + lookback:  # Need at least 20 days for MA20
+        raise ValueError(f"Not enough data points. Need at least {20 + lookback} data points.")
+    features = AIPredictor(model_type=model_type).compute_features(data)
+    n_samples = len(features) - lookback
+    if n_samples <= n_splits:
+        raise ValueError(f"Not enough samples ({n_samples}) for {n_splits}-fold time-series validation")
+
+    methods = multiprocessing.get_all_start_methods()
+    context = multiprocessing.get_context('fork' if 'fork' in methods else None)
+    best_scores = context.Array('d', [np.inf] * n_splits, lock=False)
+    lock = context.Lock()
+
+    features_shm, features_spec = _share_array(np.ascontiguousarray(features, dtype=np.float64))
+    print(f"Evaluating {len(configs)} {model_type.upper()} configurations on {n_samples} samples "
+          f"with {workers} workers...", file=sys.stderr)
+
+    results = []
+    try:
+        initargs = (model_type, features_spec, lookback, n_splits, prune_factor, best_scores, lock)
+        with context.Pool(workers, initializer=_init_worker, initargs=initargs) as pool:
+            for result in pool.imap_unordered(_evaluate, enumerate(configs)):
+                results.append(result)
+                status = 'error' if 'error' in result else ('pruned' if result['pruned'] else 'done')
+                print(f"[{len(results)}/{len(configs)}] trial {result['trial']} {status} "
+                      f"{result.get('mean_mae', float('nan')):.5f} {result['params']}", file=sys.stderr)
+    finally:
+        features_shm.close()
+        features_shm.unlink()
+
+    # Complete trials first, then pruned ones, each by mean error
+    leaderboard = sorted(results, key=lambda r: ('error' in r, r.get('pruned', True),
+                                                  r.get('mean_mae', np.inf)))
+    if output:
+        save_results(leaderboard, data, model_type, output, lookback)
+    return leaderboard
+
+
+def save_results(leaderboard, data, model_type, output, lookback=5):
+    """Write the leaderboard and retrain and save the winning configuration"""
+    output_dir = os.path.dirname(output)
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+
+    with open(f"{output}_leaderboard.json", 'w') as f:
+        json.dump([{**r, 'params': _to_json(r['params'])} for r in leaderboard], f, indent=2)
+
+    best = leaderboard[0]
+    if 'error' in best or best['pruned']:
+        raise ValueError("No configuration completed cross-validation")
+
+    predictor = AIPredictor(model_type=model_type, model_params=_from_json(_to_json(best['params'])))
+    predictor.train(data, lookback)
+    predictor.save_model(output)
+    return best
+
+
+def main():
+    # Run from src/: python -m models.hyperparameter_search --data ../data/egx30_sample.csv --output ../models/tuned
+    from database.columnar_store import load_market_data
+
+    parser = argparse.ArgumentParser(description='Search AIPredictor hyperparameters with time-series cross-validation')
+    parser.add_argument('--data', required=True, help='Path to CSV file containing stock data')
+    parser.add_argument('--model', choices=['mlp', 'rf'], default='mlp', help='AI model type (default: mlp)')
+    parser.add_argument('--trials', type=int, help='Random sample of this many configurations (default: full grid)')
+    parser.add_argument('--splits', type=int, default=5, help='Time-series folds (default: 5)')
+    parser.add_argument('--workers', type=int, help='Number of worker processes (default: all cores)')
+    parser.add_argument('--prune-factor', type=float, default=1.5,
+                        help='Stop trials whose error exceeds the best by this factor (default: 1.5)')
+    parser.add_argument('--output', help='Model path prefix for the winning model and leaderboard')
+    parser.add_argument('--seed', type=int, default=42, help='Seed for sampling configurations')
+    args = parser.parse_args()
+
+    df = load_market_data(args.data)
+    leaderboard = search(df, args.model, n_trials=args.trials, n_splits=args.splits, workers=args.workers,
+                         prune_factor=args.prune_factor, output=args.output, seed=args.seed)
+
+    print("\n=== Leaderboard ===")
+    for rank, result in enumerate(leaderboard[:10], 1):
+        if 'error' in result:
+            print(f"{rank:2d}. failed    {result['params']}: {result['error']}")
+        else:
+            flag = ' (pruned)' if result['pruned'] else ''
+            print(f"{rank:2d}. {result['mean_mae']:.5f} ±{result['std_mae']:.5f} {result['params']}{flag}")
+    if args.output:
+        print(f"\nBest model saved to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,195 @@
+import os
+import json
+import struct
+import hashlib
+import argparse
+import numpy as np
+from models.numpy_mlp import FEATURE_NAMES, NumpyMLPPredictor, mlp_arrays
+from models.flat_forest import FlatForestPredictor, flatten_forest
+
+MAGIC = b'EGXMODEL'
+SCHEMA_VERSION = 1
+# Must match models.ai_predictor.FEATURE_SET_VERSION (not imported to keep this module sklearn-free)
+FEATURE_SET_VERSION = 1
+ALIGNMENT = 64
+SCALER_ATTRIBUTES = ['min_', 'scale_', 'data_min_', 'data_max_', 'data_range_', 'n_samples_seen_']
+
+
+def _align(offset):
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+def save_artifact(predictor, path, dtype=np.float64, max_depth=None):
+    """Write a trained AIPredictor as a single-file inference artifact
+
+    Layout: the 8-byte magic, a little-endian uint64 header length, the
+    JSON header (schema and feature-set versions, feature names, lookback,
+    scaler parameters, array table and a blake2b checksum of the data),
+    then the raw weight arrays, each aligned to 64 bytes so they can be
+    memory-mapped in place. dtype and max_depth apply to random forests.
+    """
+    model = predictor.model
+    estimator_params = {}
+    if hasattr(model, 'coefs_'):
+        arrays, engine = mlp_arrays(model)
+        engine['type'] = 'mlp'
+        # Hyperparameters needed to rebuild the MLP for further training
+        estimator_params = {name: list(value) if isinstance(value, tuple) else value
+                            for name, value in model.get_params().items()
+                            if isinstance(value, (bool, int, float, str, tuple, type(None)))}
+    elif hasattr(model, 'estimators_'):
+        arrays, engine = flatten_forest(model, dtype, max_depth)
+        engine['type'] = 'forest'
+    else:
+        raise ValueError("Only trained MLP and random forest models can be saved as artifacts")
+
+    if predictor.last_trained_features is not None:
+        arrays['last_trained_features'] = np.asarray(predictor.last_trained_features, dtype=np.float64)
+
+    feature_names = list(predictor.feature_names)
+    n_inputs = int(model.n_features_in_)
+    table = {}
+    offset = 0
+    for name, array in arrays.items():
+        array = np.ascontiguousarray(array)
+        arrays[name] = array
+        offset = _align(offset)
+        table[name] = {'dtype': array.dtype.str, 'shape': list(array.shape), 'offset': offset}
+        offset += array.nbytes
+    data_size = _align(offset)
+
+    data = bytearray(data_size)
+    for name, array in arrays.items():
+        start = table[name]['offset']
+        data[start:start + array.nbytes] = array.tobytes()
+
+    header = {
+        'schema_version': SCHEMA_VERSION,
+        'feature_set_version': FEATURE_SET_VERSION,
+        'model_type': predictor.model_type,
+        'feature_names': feature_names,
+        'lookback': n_inputs // len(feature_names),
+        'n_inputs': n_inputs,
+        'scaler': {attr: np.asarray(getattr(predictor.scaler, attr)).tolist()
+                   for attr in SCALER_ATTRIBUTES if hasattr(predictor.scaler, attr)},
+        'engine': engine,
+        'estimator_params': estimator_params,
+        'arrays': table,
+        'data_size': data_size,
+        'checksum': hashlib.blake2b(data, digest_size=16).hexdigest()
+    }
+    header_bytes = json.dumps(header).encode('utf-8')
+    prefix = MAGIC + struct.pack('<Q', len(header_bytes)) + header_bytes
+    prefix += b'\0' * (_align(len(prefix)) - len(prefix))
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(prefix)
+        f.write(data)
+    os.replace(tmp_path, path)
+    return header
+
+
+def read_header(path):
+    """Read an artifact header; returns (header, data_offset)"""
+    with open(path, 'rb') as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"Not a model artifact: {path}")
+        (length,) = struct.unpack('<Q', f.read(8))
+        header = json.loads(f.read(length).decode('utf-8'))
+    if header['schema_version'] != SCHEMA_VERSION:
+        raise ValueError(f"Unsupported artifact schema version: {header['schema_version']}")
+    return header, _align(len(MAGIC) + 8 + length)
+
+
+def check_compatible(header, feature_names=FEATURE_NAMES, feature_set_version=FEATURE_SET_VERSION):
+    """Refuse artifacts built for a different feature set"""
+    if header['feature_set_version'] != feature_set_version or header['feature_names'] != list(feature_names):
+        raise ValueError(
+            f"Model artifact was built for feature set v{header['feature_set_version']} "
+            f"{header['feature_names']}, expected v{feature_set_version} {list(feature_names)}"
+        )
+    if header['n_inputs'] != header['lookback'] * len(feature_names):
+        raise ValueError(f"Model artifact expects {header['n_inputs']} inputs, "
+                         f"which does not match lookback {header['lookback']}")
+
+
+def map_arrays(path, header, data_offset, verify=False):
+    """Memory-map the artifact's arrays read-only, optionally checking the checksum
+
+    Verifying hashes the whole data section, which reads every page of a
+    large forest; loads only check that the file is not truncated.
+    """
+    if os.path.getsize(path) < data_offset + header['data_size']:
+        raise ValueError(f"Model artifact is truncated: {path}")
+    data = np.memmap(path, dtype=np.uint8, mode='r', offset=data_offset, shape=(header['data_size'],))
+    if verify:
+        checksum = hashlib.blake2b(data, digest_size=16).hexdigest()
+        if checksum != header['checksum']:
+            raise ValueError(f"Model artifact checksum mismatch: {path}")
+    return {name: np.ndarray(tuple(spec['shape']), dtype=np.dtype(spec['dtype']),
+                             buffer=data, offset=spec['offset'])
+            for name, spec in header['arrays'].items()}
+
+
+def load_artifact(path, verify=False):
+    """Load an artifact as a NumPy inference engine
+
+    Returns (engine, header, arrays). The engine is a NumpyMLPPredictor or
+    FlatForestPredictor over the mapped arrays. With verify, the data
+    checksum is checked as well (see verify_artifact).
+    """
+    header, data_offset = read_header(path)
+    check_compatible(header)
+    arrays = map_arrays(path, header, data_offset, verify)
+
+    engine = header['engine']
+    if engine['type'] == 'mlp':
+        predictor = NumpyMLPPredictor.from_arrays(arrays, header['lookback'], engine['activation'],
+                                                  engine['out_activation'], header['feature_names'],
+                                                  engine['n_layers'])
+    elif engine['type'] == 'forest':
+        predictor = FlatForestPredictor.from_arrays(arrays, {**engine, 'lookback': header['lookback'],
+                                                             'feature_names': header['feature_names']})
+    else:
+        raise ValueError(f"Unknown model artifact engine: {engine['type']}")
+    return predictor, header, arrays
+
+
+def verify_artifact(path):
+    """Check an artifact's header, feature set and data checksum; returns the header"""
+    header, data_offset = read_header(path)
+    check_compatible(header)
+    map_arrays(path, header, data_offset, verify=True)
+    return header
+
+
+def main():
+    # Run from src/: python -m models.model_artifact ../models/trained_model --model mlp
+    parser = argparse.ArgumentParser(description='Convert a saved AIPredictor model into a single-file artifact, '
+                                                 'or check one')
+    parser.add_argument('model_path', help='Model path prefix used with AIPredictor.save_model')
+    parser.add_argument('--model', choices=['mlp', 'rf'], default='mlp', help='AI model type (default: mlp)')
+    parser.add_argument('--output', help='Artifact file (default: <model_path>_<model>.model)')
+    parser.add_argument('--float32', action='store_true', help='Store forest thresholds and values as float32')
+    parser.add_argument('--max-depth', type=int, help='Cut forest trees at this depth')
+    parser.add_argument('--check', action='store_true',
+                        help='Verify the checksum of <model_path>_<model>.model instead of converting')
+    args = parser.parse_args()
+
+    if args.check:
+        path = args.output or f"{args.model_path}_{args.model}.model"
+        header = verify_artifact(path)
+        print(f"{path}: OK ({header['engine']['type']}, checksum {header['checksum']})")
+        return
+
+    from models.ai_predictor import AIPredictor
+    predictor = AIPredictor(model_type=args.model)
+    predictor.load_model(args.model_path)
+    output = args.output or f"{args.model_path}_{args.model}.model"
+    header = save_artifact(predictor, output, np.float32 if args.float32 else np.float64, args.max_depth)
+    print(f"Wrote {output} ({os.path.getsize(output)} bytes, checksum {header['checksum']})")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,134 @@
+import argparse
+import numpy as np
+
+DEFAULT_PERCENTILES = (5, 25, 50, 75, 95)
+
+
+def log_returns(close, lookback=None):
+    """Daily log returns of a close series, optionally only the last lookback of them"""
+    close = np.asarray(close, dtype=np.float64)
+    if lookback is not None:
+        close = close[-lookback - 1:]
+    returns = np.diff(np.log(close))
+    if len(returns) < 2:
+        raise ValueError("Need at least 3 closes to simulate price paths")
+    return returns
+
+
+class MonteCarloSimulator:
+    """Vectorized Monte Carlo simulation of future close paths
+
+    Paths are either geometric Brownian motion fitted to the recent log
+    returns ('gbm') or resampled from those returns ('bootstrap'). They
+    are generated chunk by chunk into one (paths, horizon) float32 array,
+    so the temporary random draws stay bounded by chunk_size. The same
+    seed and chunk_size always reproduce the same paths.
+    """
+
+    def __init__(self, n_paths=100_000, horizon=5, method='bootstrap', lookback=250,
+                 chunk_size=25_000, seed=42):
+        if method not in ('gbm', 'bootstrap'):
+            raise ValueError("method must be 'gbm' or 'bootstrap'")
+        self.n_paths = n_paths
+        self.horizon = horizon
+        self.method = method
+        self.lookback = lookback
+        self.chunk_size = chunk_size
+        self.seed = seed
+
+    @property
+    def config_key(self):
+        """Identifies the settings, for cache keys of results that include simulations"""
+        return f"{self.method}:{self.n_paths}:{self.horizon}:{self.lookback}:{self.chunk_size}:{self.seed}"
+
+    def simulate(self, close):
+        """Simulate close paths starting from the last close; returns (paths, horizon) prices"""
+        returns = log_returns(close, self.lookback)
+        last = float(np.asarray(close)[-1])
+        mu, sigma = returns.mean(), returns.std(ddof=1)
+
+        rng = np.random.default_rng(self.seed)
+        paths = np.empty((self.n_paths, self.horizon), dtype=np.float32)
+        for start in range(0, self.n_paths, self.chunk_size):
+            size = (min(self.chunk_size, self.n_paths - start), self.horizon)
+            if self.method == 'gbm':
+                steps = rng.normal(mu, sigma, size)
+            else:
+                steps = returns[rng.integers(0, len(returns), size)]
+            np.cumsum(steps, axis=1, out=steps)
+            paths[start:start + size[0]] = last * np.exp(steps)
+        return paths
+
+    def hit_probabilities(self, paths, target, stop, long=True):
+        """Share of paths reaching the target before the stop, the stop first, or neither
+
+        A long position hits its target at or above target and its stop at
+        or below stop; a short one the other way round.
+        """
+        if long:
+            hit_target, hit_stop = paths >= target, paths <= stop
+        else:
+            hit_target, hit_stop = paths <= target, paths >= stop
+
+        never = self.horizon
+        first_target = np.where(hit_target.any(axis=1), hit_target.argmax(axis=1), never)
+        first_stop = np.where(hit_stop.any(axis=1), hit_stop.argmax(axis=1), never)
+        return {
+            'target_first': float(np.mean(first_target < first_stop)),
+            'stop_first': float(np.mean(first_stop < first_target)),
+            'neither': float(np.mean((first_target == never) & (first_stop == never)))
+        }
+
+    def run(self, data, target=None, stop=None, long=True, percentiles=DEFAULT_PERCENTILES):
+        """Simulate paths from an OHLCV DataFrame and summarize them
+
+        Returns percentile bands per step (one list per percentile) and,
+        when target and stop are given, the hit probabilities of a long
+        (or, with long=False, short) trade.
+        """
+        close = data['close'].to_numpy(dtype=np.float64)
+        paths = self.simulate(close)
+        bands = np.percentile(paths, percentiles, axis=0)
+        entry = float(close[-1])
+
+        result = {
+            'method': self.method,
+            'paths': self.n_paths,
+            'horizon': self.horizon,
+            'percentiles': {str(p): band.tolist() for p, band in zip(percentiles, bands)},
+            'expected_final': float(paths[:, -1].mean()),
+            'prob_up': float(np.mean(paths[:, -1] > entry))
+        }
+        if target is not None and stop is not None:
+            result['hit_probability'] = self.hit_probabilities(paths, target, stop, long)
+        return result
+
+
+def main():
+    # Run from src/: python -m models.monte_carlo ../data/egx30_sample.csv --target 27000 --stop 26000
+    from database.columnar_store import load_market_data
+
+    parser = argparse.ArgumentParser(description='Simulate future price paths for an OHLCV file')
+    parser.add_argument('data', help='Path to CSV file containing stock data')
+    parser.add_argument('--paths', type=int, default=100_000, help='Number of paths (default: 100000)')
+    parser.add_argument('--horizon', type=int, default=5, help='Bars to simulate (default: 5)')
+    parser.add_argument('--method', choices=['gbm', 'bootstrap'], default='bootstrap')
+    parser.add_argument('--target', type=float, help='Target price')
+    parser.add_argument('--stop', type=float, help='Stop-loss price')
+    parser.add_argument('--short', action='store_true', help='Score --target and --stop as a short trade')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    simulator = MonteCarloSimulator(args.paths, args.horizon, args.method, seed=args.seed)
+    result = simulator.run(load_market_data(args.data), args.target, args.stop, not args.short)
+    for percentile, band in result['percentiles'].items():
+        print(f"p{percentile:>2}: {', '.join(f'{price:.2f}' for price in band)}")
+    print(f"P(up after {args.horizon} bars): {result['prob_up']:.1%}")
+    if 'hit_probability' in result:
+        hit = result['hit_probability']
+        print(f"Target first: {hit['target_first']:.1%}, stop first: {hit['stop_first']:.1%}, "
+              f"neither: {hit['neither']:.1%}")
+
+
+if __name__ == '__main__':
+    main()
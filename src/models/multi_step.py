@@ -0,0 +1,123 @@
+import uuid
+import argparse
+import numpy as np
+from models.ai_predictor import AIPredictor
+from models.numpy_mlp import FEATURE_NAMES, CLOSE_INDEX, MA_WINDOW, scaled_windows, inverse_close
+
+OHLCV_COLUMNS = FEATURE_NAMES[:5]
+
+
+class MultiStepForecaster:
+    """Direct multi-horizon close forecasts
+
+    One multi-output model predicts the scaled close of each of the next
+    horizon bars from the same lookback window, so an N-day path needs a
+    single model call instead of N rounds of re-featurizing its own
+    predictions. Training and forecast windows are scaled alike, each
+    lookback + 20 bar window on its own (see scaled_windows), and the path
+    starts at the bar after the last one given. The model lives in an AIPredictor and is saved and loaded
+    like any other, as a single-file artifact.
+    """
+
+    def __init__(self, horizon=5, model_type='mlp', model_params=None, lookback=5):
+        self.horizon = horizon
+        self.lookback = lookback
+        self.predictor = AIPredictor(model_type=model_type, model_params=model_params)
+
+    def prepare_data(self, data):
+        """Scaled lookback windows and the next horizon closes of each, on the window's scale"""
+        window = self.lookback + MA_WINDOW
+        if len(data) < window + self.horizon:
+            raise ValueError(f"Not enough data points. Need at least "
+                             f"{window + self.horizon} data points.")
+        self.predictor.feature_names = list(FEATURE_NAMES)
+        columns = [data[col].to_numpy(dtype=np.float64) for col in OHLCV_COLUMNS]
+        X, scaler_min, scale = scaled_windows([col[:len(col) - self.horizon] for col in columns], self.lookback)
+        targets = columns[3][window + np.arange(len(X))[:, None] + np.arange(self.horizon)]
+        Y = targets * scale[:, CLOSE_INDEX, None] + scaler_min[:, CLOSE_INDEX, None]
+        return X, Y
+
+    def fit(self, data):
+        """Train the multi-output model; returns the number of training samples"""
+        X, Y = self.prepare_data(data)
+        predictor = self.predictor
+        if predictor.model_type == 'mlp':
+            predictor.model = predictor.create_mlp_model(**predictor.model_params)
+        else:
+            predictor.model = predictor.create_rf_model(**predictor.model_params)
+        predictor.model.fit(X, Y)
+        predictor.model_version = f"trained:{uuid.uuid4().hex}"
+        return len(X)
+
+    def save(self, path):
+        self.predictor.save_model(path)
+
+    def load(self, path, inference_only=True):
+        self.predictor.load_model(path, inference_only)
+        probe = self.predictor.model.predict(np.zeros((1, self.lookback * len(FEATURE_NAMES))))
+        self.horizon = probe.shape[1] if probe.ndim == 2 else 1
+        return self
+
+    def forecast_arrays(self, open_, high, low, close, volume):
+        """Forecast paths from (symbols, bars) OHLCV arrays; returns (symbols, horizon) prices
+
+        Each symbol's last lookback + 20 bars are featurized and scaled
+        together, the way the training windows were, and all symbols go
+        through the model in one batch.
+        """
+        window = self.lookback + MA_WINDOW
+        columns = [np.asarray(col)[..., -window:] for col in (open_, high, low, close, volume)]
+        X, scaler_min, scale = scaled_windows(columns, self.lookback)
+        X, scaler_min, scale = X[:, -1], scaler_min[:, -1], scale[:, -1]
+        scaled = np.asarray(self.predictor.model.predict(X)).reshape(len(X), -1)
+        return inverse_close(scaled, scaler_min[:, None, :], scale[:, None, :])
+
+    def forecast(self, data):
+        """Forecast the next horizon closes of one OHLCV DataFrame"""
+        return self.forecast_arrays(*(data[col].to_numpy()[None, :] for col in OHLCV_COLUMNS))[0]
+
+    def forecast_many(self, datasets):
+        """Forecast many symbols at once from a {symbol: DataFrame} mapping
+
+        Only the last lookback + 20 bars of each symbol are used, so
+        symbols with different history lengths batch together.
+        """
+        window = self.lookback + MA_WINDOW
+        symbols = list(datasets)
+        short = [symbol for symbol in symbols if len(datasets[symbol]) < window]
+        if short:
+            raise ValueError(f"Not enough data points for {', '.join(short)}. "
+                             f"Need at least {window} data points.")
+        columns = [np.stack([datasets[symbol][col].to_numpy(dtype=np.float64)[-window:] for symbol in symbols])
+                   for col in OHLCV_COLUMNS]
+        paths = self.forecast_arrays(*columns)
+        return dict(zip(symbols, paths))
+
+
+def main():
+    # Run from src/: python -m models.multi_step --data ../data/egx30_sample.csv --output ../models/forecast
+    from database.columnar_store import load_market_data, symbol_from_path
+
+    parser = argparse.ArgumentParser(description='Train a direct multi-step forecaster or forecast with one')
+    parser.add_argument('--data', nargs='+', required=True, help='CSV files (the first one is used for training)')
+    parser.add_argument('--model', choices=['mlp', 'rf'], default='mlp', help='AI model type (default: mlp)')
+    parser.add_argument('--horizon', type=int, default=5, help='Bars to forecast (default: 5)')
+    parser.add_argument('--output', required=True, help='Model path prefix to save to or load from')
+    parser.add_argument('--forecast', action='store_true', help='Load the saved model and forecast every file')
+    args = parser.parse_args()
+
+    forecaster = MultiStepForecaster(args.horizon, args.model)
+    if args.forecast:
+        forecaster.load(args.output)
+        datasets = {symbol_from_path(path): load_market_data(path) for path in args.data}
+        for symbol, path in forecaster.forecast_many(datasets).items():
+            print(f"{symbol}: {', '.join(f'{price:.2f}' for price in path)}")
+    else:
+        samples = forecaster.fit(load_market_data(args.data[0]))
+        forecaster.save(args.output)
+        print(f"Trained {args.horizon}-step {args.model.upper()} forecaster on {samples} samples, "
+              f"saved to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
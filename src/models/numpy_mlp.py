@@ -0,0 +1,228 @@
+import argparse
+import numpy as np
+
+# Matches AIPredictor.prepare_data
+FEATURE_NAMES = ['open', 'high', 'low', 'close', 'volume',
+                 'returns', 'high_low_ratio', 'volume_ma5',
+                 'price_ma5', 'price_ma20']
+CLOSE_INDEX = 3
+MA_WINDOW = 20
+
+ACTIVATIONS = {
+    'identity': lambda x: x,
+    'relu': lambda x: np.maximum(x, 0, out=x),
+    'tanh': lambda x: np.tanh(x, out=x),
+    'logistic': lambda x: np.divide(1.0, 1.0 + np.exp(-x, out=x), out=x)
+}
+
+
+def mlp_arrays(model):
+    """Weight arrays (coef_<i>, intercept_<i>) and activations of a fitted MLPRegressor"""
+    if model is None or not hasattr(model, 'coefs_'):
+        raise ValueError("Only trained MLP models can be exported")
+    arrays = {}
+    for i, (coef, intercept) in enumerate(zip(model.coefs_, model.intercepts_)):
+        arrays[f'coef_{i}'] = coef
+        arrays[f'intercept_{i}'] = intercept
+    meta = {
+        'activation': model.activation,
+        'out_activation': model.out_activation_,
+        'n_layers': len(model.coefs_)
+    }
+    return arrays, meta
+
+
+def export_mlp(predictor, path):
+    """Export a trained MLP AIPredictor to a compact .npz file
+
+    Stores the layer weights, activations, lookback and the fitted
+    MinMaxScaler parameters. Loading it needs NumPy only.
+    """
+    weights, meta = mlp_arrays(predictor.model)
+    n_features = len(predictor.feature_names)
+    arrays = {
+        'feature_names': np.array(predictor.feature_names),
+        'lookback': np.array(weights['coef_0'].shape[0] // n_features),
+        'activation': np.array(meta['activation']),
+        'out_activation': np.array(meta['out_activation']),
+        'n_layers': np.array(meta['n_layers']),
+        'scaler_min': predictor.scaler.min_,
+        'scaler_scale': predictor.scaler.scale_,
+        **weights
+    }
+    np.savez_compressed(path, **arrays)
+    return path
+
+
+def _rolling_mean(values, window):
+    """Rolling mean along the last axis with min_periods=1, as pandas computes it"""
+    cumsum = np.cumsum(values, axis=-1)
+    result = np.empty_like(values)
+    result[..., :window] = cumsum[..., :window] / np.arange(1, min(window, values.shape[-1]) + 1)
+    result[..., window:] = (cumsum[..., window:] - cumsum[..., :-window]) / window
+    return result
+
+
+def compute_features(open_, high, low, close, volume):
+    """Build the AIPredictor feature matrix from OHLCV arrays
+
+    Arrays of shape (bars,) give (bars, features); arrays of shape
+    (symbols, bars) give (symbols, bars, features).
+    """
+    open_, high, low, close, volume = (np.asarray(col, dtype=np.float64)
+                                       for col in (open_, high, low, close, volume))
+    returns = np.empty_like(close)
+    returns[..., 1:] = close[..., 1:] / close[..., :-1] - 1
+    # prepare_data back-fills the leading NaN return
+    returns[..., 0] = returns[..., 1] if close.shape[-1] > 1 else np.nan
+
+    return np.stack([
+        open_, high, low, close, volume,
+        returns,
+        high / low,
+        _rolling_mean(volume, 5),
+        _rolling_mean(close, 5),
+        _rolling_mean(close, MA_WINDOW)
+    ], axis=-1)
+
+
+def minmax_params(features):
+    """Per-column MinMaxScaler(feature_range=(0, 1)) parameters for a feature matrix
+
+    For a stack of matrices, each one gets its own parameters.
+    """
+    data_min = features.min(axis=-2)
+    data_range = features.max(axis=-2) - data_min
+    # sklearn treats constant columns as having unit range
+    data_range[data_range < 10 * np.finfo(data_range.dtype).eps] = 1.0
+    scale = 1.0 / data_range
+    return data_min * -scale, scale
+
+
+def prepare_window(columns, lookback):
+    """Scaled model input for the next-close prediction, as AIPredictor.predict builds it
+
+    columns are the open, high, low, close and volume arrays. The features
+    of the last lookback + 20 bars are min-max scaled on that window alone.
+    Returns (X, scaler_min, scale) with X of shape (1, lookback * features).
+    With (symbols, bars) columns every symbol is scaled on its own window
+    and X has one row per symbol.
+    """
+    window = lookback + MA_WINDOW
+    columns = [np.asarray(col) for col in columns]
+    if columns[3].shape[-1] < window:
+        raise ValueError(f"Not enough data points. Need at least {window} data points.")
+
+    features = compute_features(*(col[..., -window:] for col in columns))
+    scaler_min, scale = minmax_params(features)
+    scaled = features * scale[..., None, :] + scaler_min[..., None, :]
+    X = scaled[..., -lookback - 1:-1, :]
+    return X.reshape(-1, lookback * X.shape[-1]), scaler_min, scale
+
+
+def scaled_windows(columns, lookback):
+    """Model inputs of every window of lookback + 20 bars, each min-max scaled on its own
+
+    This is the per-window scaling of prepare_window, but the input is the
+    last lookback bars of the window, so a row predicts the bars after it.
+    columns are the open, high, low, close and volume arrays. Returns
+    (X, scaler_min, scale) with one row (and scaler) per window; row k
+    covers bars k to k + lookback + 19. With (symbols, bars) columns every
+    symbol gets its own leading axis.
+    """
+    window = lookback + MA_WINDOW
+    columns = [np.asarray(col, dtype=np.float64) for col in columns]
+    if columns[3].shape[-1] < window:
+        raise ValueError(f"Not enough data points. Need at least {window} data points.")
+
+    features = compute_features(*(np.lib.stride_tricks.sliding_window_view(col, window, axis=-1)
+                                  for col in columns))
+    scaler_min, scale = minmax_params(features)
+    X = features[..., -lookback:, :] * scale[..., None, :] + scaler_min[..., None, :]
+    return X.reshape(*X.shape[:-2], lookback * X.shape[-1]), scaler_min, scale
+
+
+def inverse_close(prediction, scaler_min, scale):
+    """Map a scaled close prediction back to a price"""
+    return (prediction - scaler_min[..., CLOSE_INDEX]) / scale[..., CLOSE_INDEX]
+
+
+class NumpyMLPPredictor:
+    """Scikit-learn free inference for models exported with export_mlp"""
+
+    def __init__(self, path):
+        with np.load(path) as archive:
+            n_layers = int(archive['n_layers'])
+            self._setup({name: archive[name] for name in archive.files if name.startswith(('coef_', 'intercept_'))},
+                        lookback=int(archive['lookback']),
+                        activation=str(archive['activation']),
+                        out_activation=str(archive['out_activation']),
+                        feature_names=[str(name) for name in archive['feature_names']],
+                        n_layers=n_layers)
+            self.scaler_min = archive['scaler_min']
+            self.scaler_scale = archive['scaler_scale']
+
+    @classmethod
+    def from_arrays(cls, arrays, lookback, activation='relu', out_activation='identity',
+                    feature_names=FEATURE_NAMES, n_layers=None):
+        """Build the engine from coef_<i>/intercept_<i> arrays, e.g. memory-mapped ones"""
+        engine = cls.__new__(cls)
+        engine._setup(arrays, lookback, activation, out_activation, list(feature_names), n_layers)
+        return engine
+
+    def _setup(self, arrays, lookback, activation, out_activation, feature_names, n_layers=None):
+        if feature_names != FEATURE_NAMES:
+            raise ValueError(f"Unsupported feature set: {feature_names}")
+        if n_layers is None:
+            n_layers = sum(1 for name in arrays if name.startswith('coef_'))
+        self.feature_names = feature_names
+        self.lookback = lookback
+        self.activation = activation
+        self.out_activation = out_activation
+        self.coefs = [arrays[f'coef_{i}'] for i in range(n_layers)]
+        self.intercepts = [arrays[f'intercept_{i}'] for i in range(n_layers)]
+        self.scaler_min = None
+        self.scaler_scale = None
+
+    def forward(self, X):
+        """Run the network on scaled, flattened lookback windows of shape (n, lookback * features)"""
+        activation = np.asarray(X, dtype=np.float64)
+        hidden = ACTIVATIONS[self.activation]
+        for i, (coef, intercept) in enumerate(zip(self.coefs, self.intercepts)):
+            activation = activation @ coef
+            activation += intercept
+            if i < len(self.coefs) - 1:
+                activation = hidden(activation)
+        output = ACTIVATIONS[self.out_activation](activation)
+        return output.ravel() if output.shape[1] == 1 else output
+
+    def predict(self, X):
+        """Alias of forward, so the engine can stand in for the sklearn model"""
+        return self.forward(X)
+
+    def predict_arrays(self, open_, high, low, close, volume):
+        """Predict the next close from OHLCV arrays, reproducing AIPredictor.predict"""
+        X, scaler_min, scale = prepare_window((open_, high, low, close, volume), self.lookback)
+        return inverse_close(self.forward(X)[0], scaler_min, scale)
+
+    def predict_frame(self, data):
+        """Predict the next close from a DataFrame with OHLCV columns"""
+        return self.predict_arrays(*(data[col].to_numpy() for col in FEATURE_NAMES[:5]))
+
+
+def main():
+    # Run from src/: python -m models.numpy_mlp ../models/trained_model ../models/trained_model.npz
+    parser = argparse.ArgumentParser(description='Export an MLP AIPredictor model for NumPy-only inference')
+    parser.add_argument('model_path', help='Model path prefix used with AIPredictor.save_model')
+    parser.add_argument('output', help='Output .npz file')
+    args = parser.parse_args()
+
+    from models.ai_predictor import AIPredictor
+    predictor = AIPredictor(model_type='mlp')
+    predictor.load_model(args.model_path)
+    export_mlp(predictor, args.output)
+    print(f"Exported {args.model_path} to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,147 @@
+import os
+import json
+import uuid
+import numpy as np
+import pandas as pd
+
+# Features need 20 bars of history for the MA20 column
+FEATURE_CONTEXT = 20
+
+
+class OnlineUpdater:
+    """Incremental updates of a saved AIPredictor as new bars arrive
+
+    Instead of retraining from scratch, update() warm-starts from the
+    loaded model and runs partial_fit on only the windows whose target is
+    a bar added since the last (re)training. The scaler is either kept
+    frozen or widened incrementally with MinMaxScaler.partial_fit.
+
+    Before each update the model is scored on the new windows. When its
+    error grows past drift_threshold times the error recorded at the last
+    full training, or too many new feature values fall outside the
+    scaler's training range, a full retrain is requested instead.
+
+    The training state (last bar seen, baseline error, update count) is
+    kept next to the model in <model_path>_online.json.
+    """
+
+    def __init__(self, predictor, model_path, scaler_mode='frozen', drift_threshold=2.0,
+                 range_threshold=0.2, epochs=5, lookback=5):
+        if scaler_mode not in ('frozen', 'incremental'):
+            raise ValueError("scaler_mode must be 'frozen' or 'incremental'")
+
+        self.predictor = predictor
+        self.model_path = model_path
+        self.scaler_mode = scaler_mode
+        self.drift_threshold = drift_threshold
+        self.range_threshold = range_threshold
+        self.epochs = epochs
+        self.lookback = lookback
+        self.state_path = f"{model_path}_online.json"
+        self.state = self._load_state()
+
+    def _load_state(self):
+        if not os.path.exists(self.state_path):
+            return None
+        with open(self.state_path) as f:
+            return json.load(f)
+
+    def save(self):
+        """Save the model and the online training state"""
+        self.predictor.save_model(self.model_path)
+        self.save_state()
+
+    def save_state(self):
+        """Save the online training state next to the model"""
+        tmp_path = f"{self.state_path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(self.state, f, indent=2)
+        os.replace(tmp_path, self.state_path)
+
+    def _mae(self, X, y):
+        return float(np.mean(np.abs(self.predictor.model.predict(X) - y)))
+
+    def _new_rows(self, data):
+        """Index of the first bar added since the last (re)training"""
+        if 'date' not in data.columns:
+            raise ValueError("Online updates need a date column")
+        dates = pd.to_datetime(data['date']).to_numpy()
+        return int(np.searchsorted(dates, np.datetime64(self.state['last_date']), side='right'))
+
+    def mark_trained(self, data):
+        """Record a full training on data as the new baseline"""
+        X, y = self.predictor.prepare_data(data, self.lookback, fit_scaler=False)
+        self.state = {
+            'last_date': str(pd.to_datetime(data['date']).iloc[-1]),
+            'baseline_mae': self._mae(X, y),
+            'trained_rows': len(data),
+            'updates': 0,
+            'updated_rows': 0
+        }
+        return self.state
+
+    def retrain(self, data):
+        """Full retrain from scratch, resetting the drift baseline"""
+        samples = self.predictor.train(data, self.lookback)
+        self.mark_trained(data)
+        return samples
+
+    def update(self, data):
+        """Fold the bars added since the last update into the model
+
+        data is the full, date-sorted history. Returns the drift metrics;
+        metrics['retrain'] is True when the model was not updated because
+        a full retrain is needed (call retrain(data) or use run()).
+        """
+        if self.state is None:
+            return {'retrain': True, 'reason': 'no online training state for this model'}
+        if not hasattr(self.predictor.model, 'partial_fit'):
+            return {'retrain': True,
+                    'reason': f"{self.predictor.model_type} models cannot be updated incrementally"}
+
+        start = self._new_rows(data)
+        new_rows = len(data) - start
+        metrics = {'new_rows': new_rows, 'baseline_mae': self.state['baseline_mae'], 'retrain': False}
+        if new_rows == 0:
+            return metrics
+        if start < self.lookback + FEATURE_CONTEXT:
+            return {**metrics, 'retrain': True, 'reason': 'not enough history before the new bars'}
+
+        tail = data.iloc[start - self.lookback - FEATURE_CONTEXT:]
+        X, y = self.predictor.prepare_data(tail, self.lookback, fit_scaler=False)
+        X, y = X[-new_rows:], y[-new_rows:]
+        metrics['out_of_range'] = float(np.mean((X < 0) | (X > 1)))
+
+        if self.scaler_mode == 'incremental':
+            # Widen the scaler to the new bars, then rescale the windows
+            self.predictor.scaler.partial_fit(self.predictor.compute_features(tail)[-new_rows:])
+            X, y = self.predictor.prepare_data(tail, self.lookback, fit_scaler=False)
+            X, y = X[-new_rows:], y[-new_rows:]
+
+        # Score on the new windows before learning from them
+        metrics['mae'] = self._mae(X, y)
+        metrics['error_ratio'] = metrics['mae'] / max(self.state['baseline_mae'], 1e-12)
+
+        if metrics['error_ratio'] > self.drift_threshold:
+            return {**metrics, 'retrain': True,
+                    'reason': f"error ratio {metrics['error_ratio']:.2f} exceeds {self.drift_threshold}"}
+        if self.scaler_mode == 'frozen' and metrics['out_of_range'] > self.range_threshold:
+            return {**metrics, 'retrain': True,
+                    'reason': f"{metrics['out_of_range']:.0%} of new feature values are outside the scaler range"}
+
+        for _ in range(self.epochs):
+            self.predictor.model.partial_fit(X, y)
+        self.predictor.model_version = f"updated:{uuid.uuid4().hex}"
+
+        self.state['last_date'] = str(pd.to_datetime(data['date']).iloc[-1])
+        self.state['updates'] += 1
+        self.state['updated_rows'] += new_rows
+        metrics['mae_after'] = self._mae(X, y)
+        return metrics
+
+    def run(self, data):
+        """Update incrementally, falling back to a full retrain on drift"""
+        metrics = self.update(data)
+        if metrics['retrain']:
+            metrics['samples'] = self.retrain(data)
+        return metrics
@@ -1,5 +1,6 @@
 import numpy as np
 import pandas as pd
+from utils.instrumentation import instrument
 
 class SMCAnalyzer:
     def __init__(self):
@@ -8,6 +9,7 @@ class SMCAnalyzer:
         self.liquidity_zones = []
         self.fvg_zones = []
 
+    @instrument('smc.detect_trend')
     def detect_trend(self, data):
         """Detect overall market trend using SMC principles"""
         if len(data) < 20:
@@ -29,6 +31,7 @@ class SMCAnalyzer:
                 return "Bearish"
             return "Bearish with Support"
 
+    @instrument('smc.find_order_blocks')
     def find_order_blocks(self, data):
         """Identify potential order blocks using price action"""
         blocks = []
@@ -58,6 +61,7 @@ class SMCAnalyzer:
         self.order_blocks = blocks
         return blocks
 
+    @instrument('smc.identify_liquidity_zones')
     def identify_liquidity_zones(self, data):
         """Find liquidity zones based on price clusters"""
         zones = []
@@ -77,6 +81,7 @@ class SMCAnalyzer:
         self.liquidity_zones = zones
         return zones
 
+    @instrument('smc.detect_fair_value_gaps')
     def detect_fair_value_gaps(self, data):
         """Identify Fair Value Gaps in price action"""
         gaps = []
@@ -107,8 +112,32 @@ class SMCAnalyzer:
         self.fvg_zones = gaps
         return gaps
 
+    @instrument('smc.analyze_market_structure')
     def analyze_market_structure(self, data):
-        """Complete market structure analysis"""
+        """Complete market structure analysis
+
+        data is either a single OHLCV DataFrame or a multi-timeframe bundle
+        from models.timeframes.build_timeframes ({'base': df, 'W': df, ...}).
+        For a bundle the base frame is analyzed as usual and each higher
+        timeframe's trend, order blocks and fair value gaps are added under
+        'higher_timeframes'.
+        """
+        if isinstance(data, dict):
+            # Analyze higher timeframes first so the stored zones belong to the base frame
+            higher_timeframes = {}
+            for timeframe, frame in data.items():
+                if timeframe == 'base':
+                    continue
+                higher_timeframes[timeframe] = {
+                    'trend': self.detect_trend(frame),
+                    'order_blocks': self.find_order_blocks(frame),
+                    'fvg_zones': self.detect_fair_value_gaps(frame)
+                }
+            
+            analysis = self.analyze_market_structure(data['base'])
+            analysis['higher_timeframes'] = higher_timeframes
+            return analysis
+        
         return {
             'trend': self.detect_trend(data),
             'order_blocks': self.find_order_blocks(data),
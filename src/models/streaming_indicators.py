@@ -0,0 +1,132 @@
+import numpy as np
+
+# Streamed per symbol, next to the OHLCV columns of the last bar
+INDICATOR_FIELDS = ['rsi', 'sma', 'in_bullish_fvg', 'in_bearish_fvg']
+PRICE_FIELDS = ['open', 'high', 'low', 'close', 'volume']
+
+
+class StreamingIndicators:
+    """Incremental indicator state for many symbols, one bar at a time per symbol
+
+    Every field is a NumPy array with one slot per symbol, so a batch of
+    new bars updates all its symbols with a few vectorized operations.
+    RSI is the simple rolling-mean RSI used elsewhere in the project and
+    the fair value gaps follow SMCAnalyzer.detect_fair_value_gaps; both
+    keep only the ring buffers they need. The previous value of every
+    field is kept as prev_<field> for crossing conditions.
+
+    Bars whose timestamp is not newer than the symbol's last bar are
+    ignored, so replaying a feed twice does not corrupt the state.
+    """
+
+    def __init__(self, rsi_period=14, sma_period=20, capacity=64):
+        self.rsi_period = rsi_period
+        self.sma_period = sma_period
+        self.symbols = []
+        self.index = {}
+        self.size = 0
+        self._allocate(capacity)
+
+    def _allocate(self, capacity):
+        nan = np.full(capacity, np.nan)
+        self.values = {field: nan.copy() for field in PRICE_FIELDS + INDICATOR_FIELDS}
+        self.prev = {field: nan.copy() for field in PRICE_FIELDS + INDICATOR_FIELDS}
+        self.last_timestamp = np.full(capacity, np.iinfo(np.int64).min)
+        self.count = np.zeros(capacity, dtype=np.int64)
+        self.gains = np.zeros((capacity, self.rsi_period))
+        self.losses = np.zeros((capacity, self.rsi_period))
+        self.closes = np.zeros((capacity, self.sma_period))
+        # Highs and lows of the two bars before the last one, oldest first
+        self.highs = np.full((capacity, 2), np.nan)
+        self.lows = np.full((capacity, 2), np.nan)
+        self.bullish_gap = np.full((capacity, 2), np.nan)  # (top, bottom) of the open gap
+        self.bearish_gap = np.full((capacity, 2), np.nan)
+
+    def _grow(self, capacity):
+        old = {name: getattr(self, name) for name in
+               ('last_timestamp', 'count', 'gains', 'losses', 'closes', 'highs', 'lows',
+                'bullish_gap', 'bearish_gap')}
+        values, prev = self.values, self.prev
+        self._allocate(capacity)
+        for name, array in old.items():
+            getattr(self, name)[:len(array)] = array
+        for field in values:
+            self.values[field][:len(values[field])] = values[field]
+            self.prev[field][:len(prev[field])] = prev[field]
+
+    def lookup(self, symbols):
+        """Slot indices of symbols, adding the ones not seen before"""
+        for symbol in symbols:
+            if symbol not in self.index:
+                if self.size == len(self.count):
+                    self._grow(2 * self.size)
+                self.index[symbol] = self.size
+                self.symbols.append(symbol)
+                self.size += 1
+        return np.fromiter((self.index[symbol] for symbol in symbols), dtype=np.int64, count=len(symbols))
+
+    def field(self, name):
+        """Current values of a field (or prev_<field>) for all known symbols"""
+        if name.startswith('prev_'):
+            return self.prev[name[5:]][:self.size]
+        return self.values[name][:self.size]
+
+    def update(self, symbols, timestamps, open_, high, low, close, volume):
+        """Apply one bar for each of the given symbols (each symbol at most once)
+
+        Returns the slot indices of the symbols whose bar was applied.
+        """
+        idx = self.lookup(symbols)
+        timestamps = np.asarray(timestamps).astype('datetime64[ns]').view('i8')
+        fresh = timestamps > self.last_timestamp[idx]
+        idx, timestamps = idx[fresh], timestamps[fresh]
+        bar = {field: np.asarray(column, dtype=np.float64)[fresh]
+               for field, column in zip(PRICE_FIELDS, (open_, high, low, close, volume))}
+        if len(idx) == 0:
+            return idx
+
+        for field in self.values:
+            self.prev[field][idx] = self.values[field][idx]
+        for field, column in bar.items():
+            self.values[field][idx] = column
+        self.last_timestamp[idx] = timestamps
+        count = self.count[idx]
+
+        # Rolling-mean RSI over the last rsi_period close-to-close changes
+        has_prev = count > 0
+        delta = np.where(has_prev, bar['close'] - np.nan_to_num(self.prev['close'][idx]), 0.0)
+        slot = np.maximum(count - 1, 0) % self.rsi_period
+        update = idx[has_prev]
+        self.gains[update, slot[has_prev]] = np.maximum(delta[has_prev], 0.0)
+        self.losses[update, slot[has_prev]] = np.maximum(-delta[has_prev], 0.0)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            rs = self.gains[idx].mean(axis=1) / self.losses[idx].mean(axis=1)
+            rsi = 100 - 100 / (1 + rs)
+        self.values['rsi'][idx] = np.where(count >= self.rsi_period, rsi, np.nan)
+
+        self.closes[idx, count % self.sma_period] = bar['close']
+        self.values['sma'][idx] = np.where(count + 1 >= self.sma_period,
+                                           self.closes[idx].mean(axis=1), np.nan)
+
+        # Open gaps close once price trades back through them
+        bullish, bearish = self.bullish_gap[idx], self.bearish_gap[idx]
+        bullish[bar['high'] >= bullish[:, 0]] = np.nan
+        bearish[bar['low'] <= bearish[:, 1]] = np.nan
+
+        # A gap between the bar two back and this one, as in SMCAnalyzer
+        oldest_high, oldest_low = self.highs[idx, 0], self.lows[idx, 0]
+        new_bullish = oldest_low > bar['high']
+        new_bearish = oldest_high < bar['low']
+        bullish[new_bullish] = np.column_stack([oldest_low, bar['high']])[new_bullish]
+        bearish[new_bearish] = np.column_stack([bar['low'], oldest_high])[new_bearish]
+        self.bullish_gap[idx], self.bearish_gap[idx] = bullish, bearish
+
+        self.highs[idx] = np.column_stack([self.highs[idx, 1], bar['high']])
+        self.lows[idx] = np.column_stack([self.lows[idx, 1], bar['low']])
+
+        closes = bar['close']
+        self.values['in_bullish_fvg'][idx] = (closes <= bullish[:, 0]) & (closes >= bullish[:, 1])
+        self.values['in_bearish_fvg'][idx] = (closes <= bearish[:, 0]) & (closes >= bearish[:, 1])
+
+        self.count[idx] = count + 1
+        return idx
@@ -0,0 +1,93 @@
+import numpy as np
+import pandas as pd
+
+OHLCV_COLUMNS = ['open', 'high', 'low', 'close', 'volume']
+
+# Higher timeframes built from daily bars by default (pandas period aliases)
+DEFAULT_TIMEFRAMES = ('W', 'M')
+
+
+def _bucket_starts(dates, timeframe):
+    """Period start of each bar and the row indices where a new period begins"""
+    periods = pd.PeriodIndex(pd.DatetimeIndex(dates), freq=timeframe)
+    codes = periods.asi8
+    starts = np.flatnonzero(np.concatenate(([True], codes[1:] != codes[:-1])))
+    return periods[starts].start_time, starts
+
+
+def resample_ohlcv(data, timeframe):
+    """Aggregate sorted OHLCV bars into a higher timeframe
+
+    Each bar takes the first open, the highest high, the lowest low, the
+    last close and the summed volume of its period, and is labelled with
+    the period start. Runs as one pass of ufunc.reduceat over the columns.
+    """
+    if len(data) == 0:
+        return pd.DataFrame(columns=['date'] + OHLCV_COLUMNS)
+
+    labels, starts = _bucket_starts(data['date'].to_numpy(), timeframe)
+    ends = np.append(starts[1:], len(data)) - 1
+
+    return pd.DataFrame({
+        'date': labels,
+        'open': data['open'].to_numpy()[starts],
+        'high': np.maximum.reduceat(data['high'].to_numpy(), starts),
+        'low': np.minimum.reduceat(data['low'].to_numpy(), starts),
+        'close': data['close'].to_numpy()[ends],
+        'volume': np.add.reduceat(data['volume'].to_numpy(dtype=np.float64), starts)
+    })
+
+
+def build_timeframes(data, timeframes=DEFAULT_TIMEFRAMES):
+    """Build a multi-timeframe bundle: {'base': data, timeframe: bars, ...}"""
+    base = data.sort_values('date').reset_index(drop=True)
+    bundle = {'base': base}
+    for timeframe in timeframes:
+        bundle[timeframe] = resample_ohlcv(base, timeframe)
+    return bundle
+
+
+class MultiTimeframeResampler:
+    """Keeps higher timeframes up to date as new base bars arrive
+
+    Only the last (possibly incomplete) higher-timeframe bar and any new
+    ones are recomputed on update; completed bars are never touched again.
+    """
+
+    def __init__(self, timeframes=DEFAULT_TIMEFRAMES):
+        self.timeframes = tuple(timeframes)
+        self.bundle = None
+
+    def reset(self, data):
+        """Rebuild every timeframe from scratch"""
+        self.bundle = build_timeframes(data, self.timeframes)
+        return self.bundle
+
+    def update(self, new_bars):
+        """Append new base bars and refresh the affected higher-timeframe bars"""
+        if self.bundle is None:
+            return self.reset(new_bars)
+        if len(new_bars) == 0:
+            return self.bundle
+
+        base = self.bundle['base']
+        new_bars = new_bars.sort_values('date')
+        if len(base) and new_bars['date'].iloc[0] <= base['date'].iloc[-1]:
+            raise ValueError("New bars must be later than the existing data")
+
+        base = pd.concat([base, new_bars[base.columns]], ignore_index=True)
+        self.bundle['base'] = base
+
+        for timeframe in self.timeframes:
+            bars = self.bundle[timeframe]
+            if len(bars) == 0:
+                self.bundle[timeframe] = resample_ohlcv(base, timeframe)
+                continue
+
+            # Recompute from the start of the last higher-timeframe bar onward
+            last_start = bars['date'].iloc[-1]
+            first_row = np.searchsorted(base['date'].to_numpy(), np.datetime64(last_start, 'ns'), 'left')
+            tail = resample_ohlcv(base.iloc[first_row:], timeframe)
+            self.bundle[timeframe] = pd.concat([bars.iloc[:-1], tail], ignore_index=True)
+
+        return self.bundle
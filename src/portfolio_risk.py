@@ -0,0 +1,174 @@
+import json
+import hashlib
+from statistics import NormalDist
+import numpy as np
+import pandas as pd
+from sklearn.covariance import ledoit_wolf
+from utils.ingestion import read_ohlcv_csv
+
+DIRECTIONS = {'BUY': 1.0, 'SELL': -1.0, 'WAIT': 0.0}
+
+
+def load_closes(files):
+    """Read {symbol: path} OHLCV files into {symbol: close Series indexed by date}"""
+    closes = {}
+    for symbol, path in files.items():
+        df, _ = read_ohlcv_csv(path)
+        closes[symbol] = df.set_index('date')['close']
+    return closes
+
+
+def returns_matrix(closes, lookback=250):
+    """Aligned daily log returns of the last lookback days, shape (days, symbols)
+
+    Days a symbol did not trade count as a zero return.
+    """
+    prices = pd.concat(closes, axis=1).sort_index().ffill()
+    returns = np.log(prices).diff().iloc[1:].tail(lookback)
+    return returns.fillna(0.0)
+
+
+def portfolio_var(weights, covariance, confidence=0.95):
+    """One-day parametric VaR of a weight vector, as a fraction of capital
+
+    Returns (var, component_var); the components sum to the VaR.
+    """
+    z = NormalDist().inv_cdf(confidence)
+    exposure = covariance @ weights
+    volatility = np.sqrt(max(float(weights @ exposure), 0.0))
+    if volatility == 0:
+        return 0.0, np.zeros_like(weights)
+    return z * volatility, z * weights * exposure / volatility
+
+
+class RiskEngine:
+    """Portfolio-level sizing of TradingAdvisor recommendations
+
+    The return covariance is a Ledoit-Wolf shrinkage estimate over the
+    last lookback days. It is computed once per day and symbol set and
+    kept in memory, and in a DiskCache when one is given, so repeated
+    sizing runs during a session only pay for the sizing itself.
+
+    Sizing is one vectorized pass over all trades: each trade gets the
+    weight that loses risk_per_trade of capital at its stop, shrunk by the
+    square root of how many open trades it is correlated with, clipped to
+    max_position, and finally scaled down as a whole until the portfolio
+    VaR and gross exposure limits hold.
+    """
+
+    def __init__(self, lookback=250, risk_per_trade=0.01, max_position=0.1, max_gross=1.0,
+                 var_limit=0.02, confidence=0.95, disk_cache=None):
+        self.lookback = lookback
+        self.risk_per_trade = risk_per_trade
+        self.max_position = max_position
+        self.max_gross = max_gross
+        self.var_limit = var_limit
+        self.confidence = confidence
+        self.disk_cache = disk_cache
+        self.cache = {}
+
+    def _cache_key(self, symbols, as_of):
+        digest = hashlib.blake2b('\0'.join(symbols).encode(), digest_size=8).hexdigest()
+        return f"covariance:{as_of}:{self.lookback}:{digest}"
+
+    def covariance(self, closes):
+        """Shrunk covariance of daily log returns; returns (symbols, covariance, shrinkage)"""
+        symbols = sorted(closes)
+        as_of = str(max(series.index.max() for series in closes.values()))[:10]
+        key = self._cache_key(symbols, as_of)
+
+        cached = self.cache.get(key)
+        if cached is None and self.disk_cache is not None:
+            stored = self.disk_cache.get(key)
+            if stored is not None:
+                cached = stored[0]
+                self.cache[key] = cached
+        if cached is not None:
+            return cached
+
+        returns = returns_matrix({symbol: closes[symbol] for symbol in symbols}, self.lookback)
+        if len(returns) < 2:
+            raise ValueError("Need at least 3 days of prices to estimate the covariance")
+        covariance, shrinkage = ledoit_wolf(returns.to_numpy())
+        result = (symbols, covariance, float(shrinkage))
+        self.cache[key] = result
+        if self.disk_cache is not None:
+            self.disk_cache.set(key, result)
+        return result
+
+    def size_positions(self, recommendations, closes, capital=1_000_000):
+        """Size a list of recommendations (rows with symbol, action, entry and stop_loss)
+
+        closes maps every symbol to its close Series. Returns per-symbol
+        weights, share counts and VaR contributions plus portfolio totals
+        and the limits that bound the result.
+        """
+        symbols, covariance, shrinkage = self.covariance(closes)
+        index = {symbol: i for i, symbol in enumerate(symbols)}
+        n = len(symbols)
+
+        direction = np.zeros(n)
+        entry = np.ones(n)
+        stop = np.ones(n)
+        for row in recommendations:
+            i = index[row['symbol']]
+            direction[i] = DIRECTIONS.get(row.get('action'), 0.0)
+            entry[i] = float(row['entry'])
+            stop[i] = float(row['stop_loss'])
+
+        # Weight that loses risk_per_trade of capital if the stop is hit
+        stop_distance = np.abs(entry - stop) / entry
+        active = (direction != 0) & (stop_distance > 0)
+        weights = np.zeros(n)
+        weights[active] = direction[active] * self.risk_per_trade / stop_distance[active]
+
+        # Shrink trades that move with other open trades
+        volatility = np.sqrt(np.diag(covariance))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            correlation = np.nan_to_num(covariance / np.outer(volatility, volatility))
+        crowding = np.abs(correlation) @ active.astype(float)
+        weights[active] /= np.sqrt(np.maximum(crowding[active], 1.0))
+
+        limits = []
+        if np.any(np.abs(weights) > self.max_position):
+            limits.append('max_position')
+        weights = np.clip(weights, -self.max_position, self.max_position)
+
+        gross = np.abs(weights).sum()
+        if gross > self.max_gross:
+            limits.append('max_gross')
+            weights *= self.max_gross / gross
+
+        var, components = portfolio_var(weights, covariance, self.confidence)
+        if var > self.var_limit:
+            limits.append('var_limit')
+            scale = self.var_limit / var
+            weights *= scale
+            var, components = var * scale, components * scale
+
+        shares = np.floor(np.abs(weights) * capital / entry) * np.sign(weights)
+        positions = {
+            symbol: {'weight': float(weights[i]), 'shares': int(shares[i]),
+                     'var_contribution': float(components[i])}
+            for symbol, i in index.items() if active[i]
+        }
+        return {
+            'capital': capital,
+            'positions': positions,
+            'var': float(var),
+            'var_amount': float(var * capital),
+            'confidence': self.confidence,
+            'gross_exposure': float(np.abs(weights).sum()),
+            'net_exposure': float(weights.sum()),
+            'shrinkage': shrinkage,
+            'limits': limits
+        }
+
+
+def size_screen_results(results_path, capital=1_000_000, engine=None):
+    """Size the trades in a screener JSON Lines file, reading prices from each row's file"""
+    with open(results_path) as f:
+        rows = [json.loads(line) for line in f if line.strip()]
+    rows = [row for row in rows if 'error' not in row]
+    closes = load_closes({row['symbol']: row['file'] for row in rows})
+    return (engine or RiskEngine()).size_positions(rows, closes, capital)
@@ -0,0 +1,212 @@
+import sys
+import json
+import time
+import queue
+import socket
+import argparse
+import threading
+import numpy as np
+import pandas as pd
+from database.columnar_store import ColumnarStore, load_market_data, symbol_from_path
+from models.bar_aggregator import read_trades, aggregate_trades
+from models.streaming_indicators import StreamingIndicators, PRICE_FIELDS
+
+
+def load_bars(sources, store_root='data/columnar', trades=False, interval='1min'):
+    """Load bars of many symbols into one frame sorted by date
+
+    sources are OHLCV CSV files, symbols in the columnar store at
+    store_root, or with trades set, trade-print CSV files aggregated into
+    interval time bars.
+    """
+    frames = []
+    for source in sources:
+        if trades:
+            df = aggregate_trades(read_trades(source), 'time', interval)
+        elif source.endswith('.csv'):
+            df = load_market_data(source, store_root)
+        else:
+            df = ColumnarStore(store_root).load(source)
+        frames.append(df[['date'] + PRICE_FIELDS].assign(symbol=symbol_from_path(source)))
+    return pd.concat(frames, ignore_index=True).sort_values('date', kind='stable', ignore_index=True)
+
+
+class BarReplayer:
+    """Publish historical bars as a live feed, one message per timestamp
+
+    speed is the ratio of bar time to wall time (1 replays in real time,
+    100 a hundred times faster); None publishes as fast as the consumer
+    keeps up. Each message carries its send time (time.monotonic_ns, which
+    is shared by all processes on a host) so consumers can measure
+    end-to-end latency.
+    """
+
+    def __init__(self, bars, speed=None):
+        self.speed = speed
+        self.symbols = bars['symbol'].to_numpy()
+        self.dates = pd.to_datetime(bars['date']).to_numpy(dtype='datetime64[ns]').view('i8')
+        self.prices = {field: bars[field].to_numpy(dtype=np.float64) for field in PRICE_FIELDS}
+        self.bounds = np.flatnonzero(np.diff(self.dates)) + 1
+
+    def ticks(self):
+        """Yield (bar timestamp, row slice) for each distinct timestamp"""
+        starts = np.concatenate([[0], self.bounds])
+        ends = np.concatenate([self.bounds, [len(self.dates)]])
+        for start, end in zip(starts, ends):
+            yield self.dates[start], slice(start, end)
+
+    def run(self, publish, duration=None):
+        """Publish every tick through publish(message), pacing them by speed
+
+        Stops early after duration wall-clock seconds. Returns the number
+        of bars published.
+        """
+        wall_start = time.monotonic_ns()
+        first = self.dates[0] if len(self.dates) else 0
+        bars = 0
+        for timestamp, rows in self.ticks():
+            if self.speed:
+                due = wall_start + (timestamp - first) / self.speed
+                wait = (due - time.monotonic_ns()) / 1e9
+                if duration is not None and (due - wall_start) / 1e9 > duration:
+                    break
+                if wait > 0:
+                    time.sleep(wait)
+            elif duration is not None and (time.monotonic_ns() - wall_start) / 1e9 > duration:
+                break
+            message = {'symbols': self.symbols[rows].tolist(), 'date': int(timestamp),
+                       **{field: column[rows].tolist() for field, column in self.prices.items()},
+                       'sent_ns': time.monotonic_ns()}
+            publish(message)
+            bars += int(rows.stop - rows.start)
+        return bars
+
+
+class LatencyRecorder:
+    """Run a handler on each message and record the latency of every bar in it"""
+
+    def __init__(self, handler):
+        self.handler = handler
+        self.latencies = []
+        self.counts = []
+
+    def __call__(self, message):
+        n = len(message['symbols'])
+        dates = np.full(n, message['date']).astype('datetime64[ns]')
+        self.handler(message['symbols'], dates, *(np.asarray(message[field]) for field in PRICE_FIELDS))
+        self.latencies.append(time.monotonic_ns() - message['sent_ns'])
+        self.counts.append(n)
+
+    def summary(self):
+        if not self.latencies:
+            return {}
+        per_bar = np.repeat(np.asarray(self.latencies), self.counts) / 1e6
+        return {f'p{q}': float(np.percentile(per_bar, q)) for q in (50, 95, 99)} | {'max': float(per_bar.max())}
+
+
+class QueueTransport:
+    """In-process transport: a bounded queue drained by a consumer thread"""
+
+    def __init__(self, consumer, maxsize=10_000):
+        self.queue = queue.Queue(maxsize)
+        self.thread = threading.Thread(target=self._drain, args=(consumer,), daemon=True)
+        self.thread.start()
+
+    def _drain(self, consumer):
+        while (message := self.queue.get()) is not None:
+            consumer(message)
+
+    def publish(self, message):
+        self.queue.put(message)
+
+    def close(self):
+        self.queue.put(None)
+        self.thread.join()
+
+
+class SocketTransport:
+    """Local TCP transport: JSON lines to a consumer thread listening on 127.0.0.1"""
+
+    def __init__(self, consumer, host='127.0.0.1', port=0):
+        self.server = socket.create_server((host, port))
+        self.thread = threading.Thread(target=self._serve, args=(consumer,), daemon=True)
+        self.thread.start()
+        self.client = socket.create_connection(self.server.getsockname())
+        self.client.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def _serve(self, consumer):
+        connection, _ = self.server.accept()
+        with connection, connection.makefile('r') as stream:
+            for line in stream:
+                consumer(json.loads(line))
+
+    def publish(self, message):
+        self.client.sendall((json.dumps(message) + '\n').encode())
+
+    def close(self):
+        self.client.close()
+        self.thread.join()
+        self.server.close()
+
+
+TRANSPORTS = {'queue': QueueTransport, 'socket': SocketTransport}
+
+
+def replay(bars, handler, speed=None, transport='queue', duration=None):
+    """Replay bars into handler(symbols, dates, open, high, low, close, volume) and measure it
+
+    Returns bars published, wall time, throughput and per-bar latency
+    percentiles in milliseconds.
+    """
+    recorder = LatencyRecorder(handler)
+    channel = TRANSPORTS[transport](recorder)
+    start = time.perf_counter()
+    try:
+        published = BarReplayer(bars, speed).run(channel.publish, duration)
+    finally:
+        channel.close()
+    elapsed = time.perf_counter() - start
+    return {
+        'speed': speed or 'max',
+        'transport': transport,
+        'bars': published,
+        'ticks': len(recorder.counts),
+        'elapsed_s': elapsed,
+        'bars_per_s': published / elapsed if elapsed else 0.0,
+        'latency_ms': recorder.summary()
+    }
+
+
+def main():
+    # Run from the project root: python src/replay.py data/*.csv --speed 1 100 max --rules rules.json
+    from alerts import AlertEngine, JsonlSink, load_rules
+
+    parser = argparse.ArgumentParser(description='Replay historical bars through the streaming pipeline')
+    parser.add_argument('sources', nargs='+', help='OHLCV CSV files or columnar store symbols')
+    parser.add_argument('--store', default='data/columnar', help='Columnar store directory')
+    parser.add_argument('--trades', action='store_true', help='Sources are trade prints to aggregate into bars')
+    parser.add_argument('--interval', default='1min', help='Bar interval for --trades (default: 1min)')
+    parser.add_argument('--speed', nargs='+', default=['max'],
+                        help="Speed-ups to run, e.g. 1 100 max (default: max)")
+    parser.add_argument('--transport', choices=sorted(TRANSPORTS), default='queue')
+    parser.add_argument('--rules', help='Alert rules JSON; without it bars only update indicator state')
+    parser.add_argument('--alerts', default=None, help='Alert sink, JSON Lines (default: discard)')
+    parser.add_argument('--duration', type=float, help='Stop each run after this many wall-clock seconds')
+    args = parser.parse_args()
+
+    bars = load_bars(args.sources, args.store, args.trades, args.interval)
+    print(f"Loaded {len(bars)} bars of {bars['symbol'].nunique()} symbols", file=sys.stderr)
+    for speed in args.speed:
+        sink = JsonlSink(args.alerts) if args.alerts else None
+        if args.rules:
+            handler = AlertEngine(load_rules(args.rules), sink).process
+        else:
+            handler = StreamingIndicators().update
+        result = replay(bars, handler, None if speed == 'max' else float(speed), args.transport, args.duration)
+        if sink is not None:
+            sink.close()
+        print(json.dumps(result))
+
+
+if __name__ == '__main__':
+    main()
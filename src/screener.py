@@ -0,0 +1,155 @@
+import os
+import sys
+import csv
+import glob
+import json
+import time
+import multiprocessing
+from trading_advisor import TradingAdvisor
+from utils.ingestion import read_ohlcv_csv
+from database.columnar_store import symbol_from_path
+from database.feature_store import stored_features
+
+RESULT_FIELDS = ['symbol', 'file', 'rows', 'trend', 'movement', 'change_percent', 'confidence',
+                 'interval_mean', 'interval_lower', 'interval_upper', 'action', 'entry', 'target', 'stop_loss', 'risk_reward_ratio', 'score',
+                 'elapsed_ms', 'error']
+
+# Advisor shared by pool workers; loaded in the parent before forking when possible
+_advisor = None
+
+
+def expand_inputs(inputs):
+    """Expand directories, glob patterns and file paths into a sorted list of CSV files"""
+    files = set()
+    for item in inputs:
+        if os.path.isdir(item):
+            files.update(glob.glob(os.path.join(item, '*.csv')))
+        elif any(ch in item for ch in '*?['):
+            files.update(glob.glob(item))
+        elif os.path.exists(item):
+            files.add(item)
+        else:
+            print(f"Warning: {item} not found", file=sys.stderr)
+    return sorted(files)
+
+
+def load_advisor(model_type, model_path):
+    """Load the model used for screening into this process"""
+    global _advisor
+    advisor = TradingAdvisor(ai_model_type=model_type)
+    advisor.load_models(model_path, inference_only=True)
+    _advisor = advisor
+    return advisor
+
+
+def _init_worker(model_type, model_path):
+    # Forked workers inherit the preloaded advisor; spawned ones load their own
+    if _advisor is None:
+        load_advisor(model_type, model_path)
+
+
+def score_analysis(analysis):
+    """Rank score: risk-reward weighted by confidence, zero when the advice is to wait"""
+    recommendation = analysis['trade_recommendation']
+    if recommendation['action'] == 'WAIT':
+        return 0.0
+    return float(recommendation['risk_reward_ratio']) * float(analysis['ai_prediction']['confidence']) / 100
+
+
+def screen_file(path):
+    """Analyze one symbol file and flatten the result into a row"""
+    start = time.perf_counter()
+    row = {'symbol': symbol_from_path(path), 'file': path}
+    try:
+        df, errors = read_ohlcv_csv(path)
+        analysis = _advisor.analyze_trade_setup(df, stored_features(row['symbol'], df))
+        recommendation = analysis['trade_recommendation']
+        row.update({
+            'rows': len(df),
+            'trend': analysis['market_structure']['trend'],
+            'movement': analysis['ai_prediction']['movement'],
+            'change_percent': float(analysis['ai_prediction']['change_percent']),
+            'confidence': float(analysis['ai_prediction']['confidence']),
+            'action': recommendation['action'],
+            'entry': float(recommendation['entry']),
+            'target': float(recommendation['target']),
+            'stop_loss': float(recommendation['stop_loss']),
+            'risk_reward_ratio': float(recommendation['risk_reward_ratio']),
+            'score': score_analysis(analysis)
+        })
+        interval = analysis['ai_prediction'].get('interval')
+        if interval is not None:
+            row['interval_mean'] = interval['mean']
+            row['interval_lower'] = interval['lower']
+            row['interval_upper'] = interval['upper']
+    except Exception as e:
+        row['error'] = str(e)
+    row['elapsed_ms'] = (time.perf_counter() - start) * 1000
+    return row
+
+
+class ResultWriter:
+    """Write screening rows as JSON Lines or CSV"""
+
+    def __init__(self, stream, output_format='jsonl'):
+        self.stream = stream
+        self.output_format = output_format
+        self.csv_writer = None
+        if output_format == 'csv':
+            self.csv_writer = csv.DictWriter(stream, fieldnames=RESULT_FIELDS, extrasaction='ignore')
+            self.csv_writer.writeheader()
+
+    def write(self, row):
+        if self.csv_writer is not None:
+            self.csv_writer.writerow(row)
+        else:
+            self.stream.write(json.dumps(row) + '\n')
+        self.stream.flush()
+
+
+def screen(inputs, model_type='mlp', model_path=None, workers=None, output=None,
+           output_format='jsonl', ranked=False):
+    """Screen many symbol files in a process pool
+
+    Rows are streamed to output as each symbol finishes, or written sorted
+    by score at the end when ranked is set. Returns the rows ranked by score.
+    """
+    files = expand_inputs(inputs)
+    if not files:
+        raise ValueError("No CSV files found to screen")
+
+    model_path = model_path or f'models/default_{model_type}_model'
+    workers = workers or os.cpu_count() or 1
+
+    # Load once in the parent; forked workers share the model copy-on-write
+    methods = multiprocessing.get_all_start_methods()
+    context = multiprocessing.get_context('fork' if 'fork' in methods else None)
+    if context.get_start_method() == 'fork':
+        load_advisor(model_type, model_path)
+
+    stream = open(output, 'w', newline='') if output and output != '-' else sys.stdout
+    writer = ResultWriter(stream, output_format)
+    print(f"Screening {len(files)} files with {workers} workers...", file=sys.stderr)
+
+    rows = []
+    start = time.perf_counter()
+    try:
+        with context.Pool(workers, initializer=_init_worker, initargs=(model_type, model_path)) as pool:
+            chunksize = max(1, len(files) // (workers * 4))
+            for row in pool.imap_unordered(screen_file, files, chunksize=chunksize):
+                rows.append(row)
+                if not ranked:
+                    writer.write(row)
+    finally:
+        elapsed = time.perf_counter() - start
+        rows.sort(key=lambda r: r.get('score', -1), reverse=True)
+        if ranked:
+            for row in rows:
+                writer.write(row)
+        if stream is not sys.stdout:
+            stream.close()
+
+    failed = sum(1 for row in rows if 'error' in row)
+    print(f"Screened {len(rows)} files in {elapsed:.2f}s "
+          f"({len(rows) / elapsed:.1f} symbols/s, {failed} failed)", file=sys.stderr)
+    return rows
@@ -1,13 +1,31 @@
 from models.smc_analyzer import SMCAnalyzer
 from models.ai_predictor import AIPredictor
+from models.ensemble import PredictionEnsemble, ensemble_path
+from utils.result_cache import hash_ohlcv
+from utils.instrumentation import span, instrument
+import os
 import pandas as pd
 import numpy as np
 
+# Bump when the analysis output changes so cached results are not reused
+ANALYSIS_VERSION = 1
+
 class TradingAdvisor:
-    def __init__(self, ai_model_type='mlp'):
-        """Initialize the trading advisor with specified AI model type"""
+    def __init__(self, ai_model_type='mlp', result_cache=None, ensemble=None, simulator=None):
+        """Initialize the trading advisor with specified AI model type
+
+        An optional ResultCache returns earlier analyses of identical data
+        produced by the same model without recomputing them. An optional
+        PredictionEnsemble adds its own next-close forecast with a
+        calibrated interval around it (ai_prediction['interval'], centered
+        on interval['mean'], not on predicted_price), and an optional MonteCarloSimulator adds simulated price bands and
+        the probability of reaching the target before the stop.
+        """
         self.smc_analyzer = SMCAnalyzer()
         self.ai_predictor = AIPredictor(model_type=ai_model_type)
+        self.result_cache = result_cache
+        self.ensemble = ensemble
+        self.simulator = simulator
         
     def calculate_risk_reward_ratio(self, entry, target, stop):
         """Calculate risk-reward ratio for a trade"""
@@ -20,18 +38,53 @@ class TradingAdvisor:
             
         return (reward / risk) if risk != 0 else 0
     
-    def analyze_trade_setup(self, data):
-        """Perform complete trade analysis using SMC and AI"""
+    @instrument('advisor.analyze_trade_setup')
+    def analyze_trade_setup(self, data, features=None):
+        """Perform complete trade analysis using SMC and AI
+
+        features, when given, are the stored feature rows of data (from the
+        feature store) and are used instead of recomputing them.
+        """
         # Ensure we have enough data
         if len(data) < 25:  # Minimum required for analysis
             raise ValueError("Not enough data points. Need at least 25 data points.")
-            
+        
+        cache_key = self.analysis_cache_key(data, features is not None)
+        if cache_key is not None:
+            cached = self.result_cache.get(cache_key)
+            if cached is not None:
+                return cached
+        
+        analysis = self._analyze_trade_setup(data, features)
+        if cache_key is not None:
+            self.result_cache.set(cache_key, analysis)
+        return analysis
+    
+    @instrument('advisor.cache_key')
+    def analysis_cache_key(self, data, stored_features=False):
+        """Build the result cache key from the data hash and model identity
+
+        Stored features give full-history moving averages, so analyses
+        using them are cached apart from ones computed from the bars alone.
+        """
+        if self.result_cache is None or self.ai_predictor.model_version is None:
+            return None
+        ensemble_version = self.ensemble.version if self.ensemble is not None else 'none'
+        simulator_key = self.simulator.config_key if self.simulator is not None else 'none'
+        return (f"analysis:v{ANALYSIS_VERSION}:{self.ai_predictor.model_type}:"
+                f"{self.ai_predictor.model_version}:{ensemble_version}:{simulator_key}:"
+                f"{'stored' if stored_features else 'bars'}:{hash_ohlcv(data)}")
+    
+    def _analyze_trade_setup(self, data, features=None):
+        """Run the SMC and AI analysis without consulting the cache"""
         # Get SMC analysis
-        smc_analysis = self.smc_analyzer.analyze_market_structure(data)
+        with span('advisor.smc'):
+            smc_analysis = self.smc_analyzer.analyze_market_structure(data)
         
         try:
             # Get AI predictions
-            ai_metrics = self.ai_predictor.get_prediction_metrics(data)
+            with span('advisor.ai_prediction'):
+                ai_metrics = self.ai_predictor.get_prediction_metrics(data, features)
             
             # Current price
             current_price = data['close'].iloc[-1]
@@ -62,7 +115,7 @@ class TradingAdvisor:
             # Calculate risk-reward ratio
             rrr = self.calculate_risk_reward_ratio(entry, target, stop)
             
-            return {
+            analysis = {
                 'market_structure': {
                     'trend': trend,
                     'bos_choch': 'Detected' if smc_analysis['order_blocks'] else 'Not Detected',
@@ -87,9 +140,22 @@ class TradingAdvisor:
                 },
                 'summary': self._generate_summary(action, trend, ai_movement, rrr)
             }
+            if self.ensemble is not None:
+                with span('advisor.ensemble'):
+                    analysis['ai_prediction']['interval'] = self.ensemble.predict_interval(data)
+            if self.simulator is not None:
+                # Hit probabilities only mean something for an actual trade
+                with span('advisor.simulation'):
+                    if action == 'WAIT':
+                        simulation = self.simulator.run(data)
+                    else:
+                        simulation = self.simulator.run(data, target, stop, long=action == 'BUY')
+                analysis['trade_recommendation']['simulation'] = simulation
+            return analysis
         except Exception as e:
             raise Exception(f"Error during analysis: {str(e)}")
     
+    @instrument('advisor.summary')
     def _generate_summary(self, action, trend, ai_movement, rrr):
         """Generate a summary explanation for the trade recommendation"""
         if action == 'WAIT':
@@ -103,14 +169,16 @@ class TradingAdvisor:
             f"based on SMC structure and AI analysis."
         )
     
-    def train_ai_model(self, training_data):
+    def train_ai_model(self, training_data, features=None):
         """Train the AI prediction model with historical data"""
-        return self.ai_predictor.train(training_data)
+        return self.ai_predictor.train(training_data, features=features)
     
     def save_models(self, path):
         """Save trained AI models"""
         self.ai_predictor.save_model(path)
     
-    def load_models(self, path):
-        """Load trained AI models"""
-        self.ai_predictor.load_model(path)
\ No newline at end of file
+    def load_models(self, path, inference_only=False):
+        """Load trained AI models, and the prediction ensemble saved with them if any"""
+        self.ai_predictor.load_model(path, inference_only)
+        if os.path.exists(ensemble_path(path)):
+            self.ensemble = PredictionEnsemble.load(ensemble_path(path))
\ No newline at end of file
@@ -0,0 +1,49 @@
+import argparse
+import os
+from trading_advisor import TradingAdvisor
+from database.columnar_store import load_market_data, symbol_from_path
+from database.feature_store import FeatureStore
+from models.online_updater import OnlineUpdater
+from config import MODEL_PATH, MODEL_TYPE, DEFAULT_BULLISH_DATA, COLUMNAR_STORE_DIR, FEATURE_STORE_DIR
+
+def train_model(data_file=DEFAULT_BULLISH_DATA, model_type=MODEL_TYPE, model_path=MODEL_PATH):
+    """Train a model offline and save it where the web app loads it from"""
+    print(f"\n=== Training {model_type.upper()} model ===")
+    print(f"Using data: {data_file}")
+
+    df = load_market_data(data_file, COLUMNAR_STORE_DIR)
+    print(f"Loaded {len(df)} data points")
+
+    # Features are computed once and appended to as the data file grows
+    store = FeatureStore(FEATURE_STORE_DIR)
+    symbol = symbol_from_path(data_file)
+    store.update(symbol, df)
+    _, features = store.load_arrays(symbol)
+
+    advisor = TradingAdvisor(ai_model_type=model_type)
+    samples = advisor.train_ai_model(df, features=features)
+
+    model_dir = os.path.dirname(model_path)
+    if model_dir:
+        os.makedirs(model_dir, exist_ok=True)
+    advisor.save_models(model_path)
+    # Baseline for later incremental updates (main.py --update)
+    updater = OnlineUpdater(advisor.ai_predictor, model_path)
+    updater.mark_trained(df)
+    updater.save_state()
+    print(f"Trained on {samples} samples and saved to {model_path}")
+    print("Restart the web app to load the new model")
+    return model_path
+
+def main():
+    parser = argparse.ArgumentParser(description='Train the model served by the EGX 30 web app')
+    parser.add_argument('--data', default=DEFAULT_BULLISH_DATA, help='Path to CSV file containing stock data')
+    parser.add_argument('--model', choices=['mlp', 'rf'], default=MODEL_TYPE,
+                       help=f'AI model type to train (default: {MODEL_TYPE})')
+    parser.add_argument('--output', default=MODEL_PATH, help=f'Model path prefix (default: {MODEL_PATH})')
+    args = parser.parse_args()
+
+    train_model(args.data, args.model, args.output)
+
+if __name__ == "__main__":
+    main()
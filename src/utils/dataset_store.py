@@ -0,0 +1,113 @@
+import os
+import re
+import hashlib
+import threading
+from collections import OrderedDict
+from database.columnar_store import ColumnarStore
+
+# Dataset ids are 16-byte blake2b hex digests; anything else never reaches the store
+DATASET_ID = re.compile(r'[0-9a-f]{32}')
+
+
+class DatasetStore:
+    """Server-side store of parsed uploads, referenced by content hash
+
+    An upload is decoded and parsed once; callbacks afterwards pass around
+    its dataset id only. Parsed data is kept as typed columnar arrays on disk
+    (shared by all workers) with a small in-memory LRU of DataFrames. Only
+    the max_datasets most recently uploaded datasets are kept on disk.
+
+    Dataset ids come back from the browser, so ids that are not exactly
+    32 lowercase hex characters are treated as unknown.
+    """
+
+    def __init__(self, root='data/uploads', max_memory_entries=16, max_datasets=100):
+        self.store = ColumnarStore(root)
+        self.max_memory_entries = max_memory_entries
+        self.max_datasets = max_datasets
+        self.memory = OrderedDict()
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def dataset_id(contents):
+        """Hash the raw upload contents into a dataset id"""
+        return hashlib.blake2b(contents.encode(), digest_size=16).hexdigest()
+
+    @staticmethod
+    def is_valid_id(dataset_id):
+        """Check that a dataset id has the form dataset_id() produces"""
+        return isinstance(dataset_id, str) and DATASET_ID.fullmatch(dataset_id) is not None
+
+    def _manifest_path(self, dataset_id):
+        return os.path.join(self.store.root, dataset_id, 'manifest.json')
+
+    def _evict(self):
+        """Delete the least recently uploaded datasets beyond max_datasets"""
+        stored = self.store.symbols()
+        if len(stored) <= self.max_datasets:
+            return
+        ages = {}
+        for dataset_id in stored:
+            try:
+                ages[dataset_id] = os.path.getmtime(self._manifest_path(dataset_id))
+            except OSError:
+                continue  # Removed by another worker
+        for dataset_id in sorted(ages, key=ages.get)[:len(ages) - self.max_datasets]:
+            self.store.remove(dataset_id)
+            with self.lock:
+                self.memory.pop(dataset_id, None)
+
+    def _remember(self, dataset_id, df):
+        with self.lock:
+            self.memory[dataset_id] = df
+            self.memory.move_to_end(dataset_id)
+            while len(self.memory) > self.max_memory_entries:
+                self.memory.popitem(last=False)
+
+    def put(self, contents, parser):
+        """Store an upload, parsing it with parser(contents) only if it is new
+
+        Returns the dataset id, or None if the parser rejected the upload.
+        """
+        dataset_id = self.dataset_id(contents)
+        if self.exists(dataset_id):
+            # Uploading again counts as recent use for eviction
+            try:
+                os.utime(self._manifest_path(dataset_id))
+            except OSError:
+                pass
+            return dataset_id
+
+        df = parser(contents)
+        if df is None:
+            return None
+        self.store.write(dataset_id, df)
+        self._remember(dataset_id, self.store.load(dataset_id))
+        self._evict()
+        return dataset_id
+
+    def exists(self, dataset_id):
+        """Check whether a dataset id is stored"""
+        if not self.is_valid_id(dataset_id):
+            return False
+        with self.lock:
+            if dataset_id in self.memory:
+                return True
+        return self.store.manifest(dataset_id) is not None
+
+    def get(self, dataset_id):
+        """Return the DataFrame for a dataset id, or None if it is unknown"""
+        if not self.is_valid_id(dataset_id):
+            return None
+        with self.lock:
+            df = self.memory.get(dataset_id)
+            if df is not None:
+                self.memory.move_to_end(dataset_id)
+                return df
+
+        try:
+            df = self.store.load(dataset_id)
+        except FileNotFoundError:
+            return None  # Never stored, or evicted
+        self._remember(dataset_id, df)
+        return df
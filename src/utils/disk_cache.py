@@ -0,0 +1,115 @@
+import os
+import pickle
+import sqlite3
+import threading
+import time
+
+
+class DiskCache:
+    """Small SQLite-backed LRU cache that can be shared between processes
+
+    Each process opens its own connection on first use, so a cache created
+    before gunicorn forks its workers never shares a connection with them.
+    """
+
+    def __init__(self, path, max_entries=1000):
+        self.path = path
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+        self.pid = None
+        self._conn = None
+        self._inherited = None
+        self.conn
+
+    @property
+    def conn(self):
+        """This process's connection, reopened after a fork"""
+        if self.pid != os.getpid():
+            # Keep the parent's connection referenced so it is never closed from here
+            self._inherited = self._conn
+            self._conn = self._connect()
+            self.pid = os.getpid()
+        return self._conn
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=5, check_same_thread=False)
+        conn.execute('pragma journal_mode=wal')
+        conn.execute('pragma synchronous=normal')
+        conn.executescript("""
+            create table if not exists cache (
+              key text primary key,
+              value blob not null,
+              stored_at real not null,
+              accessed_at real not null
+            );
+            create index if not exists idx_cache_accessed_at on cache(accessed_at);
+            create table if not exists counters (
+              name text primary key,
+              value integer not null
+            );
+        """)
+        return conn
+
+    def get(self, key):
+        """Return (value, stored_at) for a key, or None when missing"""
+        with self.lock:
+            row = self.conn.execute(
+                'select value, stored_at from cache where key = ?', (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            with self.conn:
+                self.conn.execute(
+                    'update cache set accessed_at = ? where key = ?', (time.time(), key)
+                )
+        return pickle.loads(row[0]), row[1]
+
+    def set(self, key, value, stored_at=None):
+        """Store a value and evict the least recently used entries"""
+        now = time.time()
+        blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        with self.lock, self.conn:
+            self.conn.execute(
+                'insert or replace into cache (key, value, stored_at, accessed_at) '
+                'values (?, ?, ?, ?)',
+                (key, blob, stored_at or now, now)
+            )
+            self.conn.execute(
+                'delete from cache where key in ('
+                'select key from cache order by accessed_at desc limit -1 offset ?)',
+                (self.max_entries,)
+            )
+
+    def delete(self, key):
+        """Remove a key from the cache"""
+        with self.lock, self.conn:
+            self.conn.execute('delete from cache where key = ?', (key,))
+
+    def counter(self, name):
+        """Read a named counter; counters are never evicted"""
+        with self.lock:
+            row = self.conn.execute(
+                'select value from counters where name = ?', (name,)
+            ).fetchone()
+        return row[0] if row else 0
+
+    def increment(self, name):
+        """Atomically increment a named counter and return the new value"""
+        with self.lock, self.conn:
+            self.conn.execute(
+                'insert into counters (name, value) values (?, 1) '
+                'on conflict(name) do update set value = value + 1',
+                (name,)
+            )
+            return self.conn.execute(
+                'select value from counters where name = ?', (name,)
+            ).fetchone()[0]
+
+    def clear(self):
+        """Remove every entry from the cache"""
+        with self.lock, self.conn:
+            self.conn.execute('delete from cache')
+
+    def __len__(self):
+        with self.lock:
+            return self.conn.execute('select count(*) from cache').fetchone()[0]
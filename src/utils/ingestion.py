@@ -0,0 +1,114 @@
+import io
+import numpy as np
+import pandas as pd
+
+REQUIRED_COLUMNS = ['date', 'open', 'high', 'low', 'close', 'volume']
+PRICE_COLUMNS = ['open', 'high', 'low', 'close']
+NUMERIC_COLUMNS = PRICE_COLUMNS + ['volume']
+OHLCV_DTYPES = {col: 'float64' for col in NUMERIC_COLUMNS}
+DATE_FORMAT = '%Y-%m-%d'
+
+# Use the multithreaded pyarrow CSV reader when it is installed
+try:
+    import pyarrow  # noqa: F401
+    CSV_ENGINE = 'pyarrow'
+except ImportError:
+    CSV_ENGINE = 'c'
+
+
+def _open_source(source):
+    """Return something read_csv can read, fresh on every call"""
+    if isinstance(source, bytes):
+        return io.BytesIO(source)
+    if isinstance(source, str) and '\n' in source:
+        return io.StringIO(source)
+    if hasattr(source, 'seek'):
+        source.seek(0)
+    return source
+
+
+def _read_csv(source):
+    """Parse with declared dtypes, falling back to strings on bad numbers"""
+    try:
+        return pd.read_csv(_open_source(source), dtype=OHLCV_DTYPES,
+                           engine=CSV_ENGINE)
+    except (ValueError, TypeError):
+        # A non-numeric cell; re-read as text so the offending rows can be reported
+        return pd.read_csv(_open_source(source), dtype=str, engine=CSV_ENGINE)
+
+
+def validate_ohlcv(df):
+    """Check OHLCV rows with vectorized masks
+
+    Returns (invalid_mask, errors) where errors lists one dict per problem
+    with the CSV line number (header is line 1), the column and a message.
+    """
+    checks = [('date', df['date'].isna(), 'invalid date (expected YYYY-MM-DD)')]
+    for col in NUMERIC_COLUMNS:
+        checks.append((col, df[col].isna(), 'missing or non-numeric value'))
+
+    open_, high, low, close = (df[col].to_numpy() for col in PRICE_COLUMNS)
+    with np.errstate(invalid='ignore'):
+        checks.extend([
+            ('high', high < np.maximum(open_, close), 'high is below open or close'),
+            ('low', low > np.minimum(open_, close), 'low is above open or close'),
+            ('high', high < low, 'high is below low'),
+            ('low', np.min([open_, high, low, close], axis=0) <= 0, 'prices must be positive'),
+            ('volume', df['volume'].to_numpy() < 0, 'volume is negative')
+        ])
+
+    # A date is a duplicate only if an earlier row with that date passed every
+    # other check, as in the Netlify parser (parseOhlcvRows)
+    valid = pd.Series(~np.any([np.asarray(mask, dtype=bool) for _, mask, _ in checks], axis=0), index=df.index)
+    earlier_valid = valid.groupby(df['date']).cumsum() - valid
+    checks.insert(1, ('date', (earlier_valid > 0) & df['date'].notna(), 'duplicate date'))
+
+    invalid = np.zeros(len(df), dtype=bool)
+    errors = []
+    for column, mask, message in checks:
+        mask = np.asarray(mask, dtype=bool)
+        if not mask.any():
+            continue
+        invalid |= mask
+        for i in np.flatnonzero(mask):
+            errors.append({'row': int(i) + 2, 'column': column, 'error': message})
+
+    errors.sort(key=lambda error: error['row'])
+    return invalid, errors
+
+
+def read_ohlcv_csv(source, drop_invalid=True):
+    """Read and validate an OHLCV CSV file
+
+    source may be a path, a file object, raw bytes or CSV text. Returns
+    (df, errors): df has a datetime64 date column and float64 OHLCV
+    columns sorted by date, with invalid rows dropped unless drop_invalid
+    is False; errors lists the per-row problems found.
+    """
+    df = _read_csv(source)
+    df.columns = [str(col).strip().lower() for col in df.columns]
+
+    missing = [col for col in REQUIRED_COLUMNS if col not in df.columns]
+    if missing:
+        raise ValueError(f"Missing required columns: {', '.join(missing)}")
+
+    for col in NUMERIC_COLUMNS:
+        if df[col].dtype != np.float64:
+            df[col] = pd.to_numeric(df[col], errors='coerce').astype(np.float64)
+    df['date'] = pd.to_datetime(df['date'], format=DATE_FORMAT, errors='coerce')
+    invalid, errors = validate_ohlcv(df)
+
+    if drop_invalid and errors:
+        df = df[~invalid]
+    if not df['date'].is_monotonic_increasing:
+        df = df.sort_values('date', kind='stable')
+    return df.reset_index(drop=True), errors
+
+
+def format_errors(errors, limit=5):
+    """Summarize ingestion errors in one line"""
+    if not errors:
+        return ''
+    shown = '; '.join(f"line {e['row']} {e['column']}: {e['error']}" for e in errors[:limit])
+    more = f" (+{len(errors) - limit} more)" if len(errors) > limit else ''
+    return f"{len(errors)} invalid value(s): {shown}{more}"
@@ -0,0 +1,165 @@
+import time
+import threading
+import functools
+import tracemalloc
+from contextlib import nullcontext
+
+# Shared by every disabled span; entering it does nothing
+_NULL_SPAN = nullcontext()
+
+
+class _Span:
+    """Timing of one entered span; nested spans keep their parent's memory peak intact"""
+
+    __slots__ = ('recorder', 'name', 'wall', 'cpu', 'base', 'child_peak')
+
+    def __init__(self, recorder, name):
+        self.recorder = recorder
+        self.name = name
+
+    def __enter__(self):
+        self.base = None
+        self.child_peak = 0
+        if self.recorder.memory and tracemalloc.is_tracing():
+            # The peak counter is global, so remember the peak so far for the enclosing span
+            current, peak = tracemalloc.get_traced_memory()
+            stack = self.recorder._stack()
+            if stack:
+                stack[-1].child_peak = max(stack[-1].child_peak, peak)
+            tracemalloc.reset_peak()
+            self.base = current
+        self.recorder._stack().append(self)
+        self.cpu = time.thread_time()
+        self.wall = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        wall = time.perf_counter() - self.wall
+        cpu = time.thread_time() - self.cpu
+        peak = 0
+        if self.base is not None:
+            peak = max(tracemalloc.get_traced_memory()[1], self.child_peak) - self.base
+        stack = self.recorder._stack()
+        stack.pop()
+        if stack and self.base is not None:
+            stack[-1].child_peak = max(stack[-1].child_peak, peak + self.base)
+        self.recorder._record(self.name, wall, cpu, peak)
+        return False
+
+
+class Instrumentation:
+    """Per-stage wall time, CPU time and memory peak of instrumented code
+
+    Spans are context managers (or the instrument decorator) named after
+    the stage they wrap. While disabled, span() returns a shared no-op
+    context and instrumented functions run undecorated apart from one
+    flag check, so the hooks can stay in hot paths. With memory set,
+    tracemalloc is started and each span records the peak memory
+    allocated above its starting point (tracing itself slows Python
+    allocation noticeably, so it is off by default).
+
+    Totals are aggregated per span name across calls and threads.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.memory = False
+        self.lock = threading.Lock()
+        self.local = threading.local()
+        self.stats = {}
+
+    def enable(self, memory=False):
+        self.memory = memory
+        if memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+        if self.memory and tracemalloc.is_tracing():
+            tracemalloc.stop()
+        self.memory = False
+
+    def reset(self):
+        with self.lock:
+            self.stats = {}
+
+    def _stack(self):
+        stack = getattr(self.local, 'stack', None)
+        if stack is None:
+            stack = self.local.stack = []
+        return stack
+
+    def span(self, name):
+        """Context manager timing the enclosed block under name"""
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, name)
+
+    def _record(self, name, wall, cpu, peak):
+        with self.lock:
+            stats = self.stats.get(name)
+            if stats is None:
+                stats = self.stats[name] = {'count': 0, 'wall_s': 0.0, 'cpu_s': 0.0,
+                                            'max_wall_s': 0.0, 'peak_bytes': 0}
+            stats['count'] += 1
+            stats['wall_s'] += wall
+            stats['cpu_s'] += cpu
+            stats['max_wall_s'] = max(stats['max_wall_s'], wall)
+            stats['peak_bytes'] = max(stats['peak_bytes'], peak)
+
+    def merge(self, breakdown):
+        """Add statistics recorded elsewhere, e.g. a breakdown returned by a worker process"""
+        with self.lock:
+            for name, values in breakdown.items():
+                stats = self.stats.setdefault(name, {'count': 0, 'wall_s': 0.0, 'cpu_s': 0.0,
+                                                     'max_wall_s': 0.0, 'peak_bytes': 0})
+                stats['count'] += values['count']
+                stats['wall_s'] += values['wall_s']
+                stats['cpu_s'] += values['cpu_s']
+                stats['max_wall_s'] = max(stats['max_wall_s'], values['max_wall_s'])
+                stats['peak_bytes'] = max(stats['peak_bytes'], values['peak_bytes'])
+
+    def breakdown(self):
+        """Aggregated span statistics keyed by span name, slowest first"""
+        with self.lock:
+            stats = {name: dict(values) for name, values in self.stats.items()}
+        for values in stats.values():
+            values['mean_wall_s'] = values['wall_s'] / values['count']
+        return dict(sorted(stats.items(), key=lambda item: item[1]['wall_s'], reverse=True))
+
+    def prometheus_text(self, prefix='egx_span'):
+        """Span statistics in the Prometheus text exposition format"""
+        metrics = [
+            ('calls_total', 'counter', 'Number of completed spans', 'count'),
+            ('seconds_total', 'counter', 'Wall-clock time spent in spans', 'wall_s'),
+            ('cpu_seconds_total', 'counter', 'CPU time of the calling thread spent in spans', 'cpu_s'),
+            ('max_seconds', 'gauge', 'Slowest single span', 'max_wall_s'),
+            ('peak_bytes', 'gauge', 'Largest traced memory peak of a span (0 without tracing)', 'peak_bytes')
+        ]
+        stats = self.breakdown()
+        lines = []
+        for suffix, kind, help_text, key in metrics:
+            lines.append(f'# HELP {prefix}_{suffix} {help_text}')
+            lines.append(f'# TYPE {prefix}_{suffix} {kind}')
+            for name, values in stats.items():
+                lines.append(f'{prefix}_{suffix}{{span="{name}"}} {values[key]}')
+        return '\n'.join(lines) + '\n'
+
+
+# Process-wide recorder used by the instrumented modules
+instrumentation = Instrumentation()
+span = instrumentation.span
+
+
+def instrument(name):
+    """Decorator recording every call of a function as a span"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not instrumentation.enabled:
+                return func(*args, **kwargs)
+            with _Span(instrumentation, name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,229 @@
+import os
+import pickle
+import sqlite3
+import time
+import uuid
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+SCHEMA = """
+create table if not exists jobs (
+  id text primary key,
+  status text not null,
+  progress real not null default 0,
+  message text,
+  partial blob,
+  result blob,
+  error text,
+  created_at real not null,
+  updated_at real not null
+);
+create index if not exists idx_jobs_created_at on jobs(created_at);
+"""
+
+
+def _connect(db_path):
+    conn = sqlite3.connect(db_path, timeout=10, check_same_thread=False)
+    conn.execute('pragma journal_mode=wal')
+    conn.execute('pragma synchronous=normal')
+    return conn
+
+
+class JobContext:
+    """Handle passed to a running job for reporting progress"""
+
+    def __init__(self, db_path, job_id):
+        self.db_path = db_path
+        self.job_id = job_id
+        self.conn = _connect(db_path)
+
+    def report(self, progress, message=None, partial=None):
+        """Record progress (0-1), a status message and optional partial results"""
+        with self.conn:
+            if partial is None:
+                self.conn.execute(
+                    'update jobs set progress = ?, message = ?, updated_at = ? where id = ?',
+                    (progress, message, time.time(), self.job_id)
+                )
+            else:
+                self.conn.execute(
+                    'update jobs set progress = ?, message = ?, partial = ?, updated_at = ? where id = ?',
+                    (progress, message, pickle.dumps(partial), time.time(), self.job_id)
+                )
+
+    def _finish(self, status, result=None, error=None):
+        with self.conn:
+            if status == 'done':
+                self.conn.execute(
+                    'update jobs set status = ?, progress = 1, result = ?, updated_at = ? where id = ?',
+                    (status, pickle.dumps(result), time.time(), self.job_id)
+                )
+            else:
+                self.conn.execute(
+                    'update jobs set status = ?, error = ?, updated_at = ? where id = ?',
+                    (status, error, time.time(), self.job_id)
+                )
+        self.conn.close()
+
+
+def _run_job(db_path, job_id, func, args):
+    """Entry point executed in a pool process"""
+    job = JobContext(db_path, job_id)
+    with job.conn:
+        job.conn.execute(
+            "update jobs set status = 'running', updated_at = ? where id = ?",
+            (time.time(), job_id)
+        )
+    try:
+        result = func(job, *args)
+    except Exception as e:
+        job._finish('failed', error=str(e))
+    else:
+        job._finish('done', result=result)
+
+
+class JobQueue:
+    """Runs jobs in a local process pool and tracks them in SQLite
+
+    Job state lives in a SQLite file, so any web worker can poll a job
+    submitted by another one and no external broker is needed. The pool is
+    created lazily in each process, which keeps it safe to construct the
+    queue before gunicorn forks its workers.
+
+    Jobs older than max_age are deleted on submit, at most every
+    cleanup_interval seconds. A job whose pool process died is marked
+    failed (and the broken pool replaced), and a queued or running job
+    with no progress for stale_after seconds is reported as failed, so
+    pollers never wait forever.
+    """
+
+    def __init__(self, db_path='data/jobs.db', max_workers=None, initializer=None,
+                 max_age=3600, cleanup_interval=300, stale_after=600):
+        self.db_path = db_path
+        self.max_workers = max_workers
+        self.initializer = initializer
+        self.max_age = max_age
+        self.cleanup_interval = cleanup_interval
+        self.stale_after = stale_after
+        self.last_cleanup = 0.0
+        self.executor = None
+        self.broken = False
+        self.conn = None
+        self.pid = None
+        self.lock = threading.Lock()
+        conn = _connect(db_path)
+        conn.executescript(SCHEMA)
+        conn.close()
+
+    def _ensure_process_state(self):
+        # Connections and pools must not be shared across a fork
+        with self.lock:
+            if self.pid == os.getpid():
+                return
+            self.pid = os.getpid()
+            self.conn = _connect(self.db_path)
+            self._create_executor()
+
+    def _create_executor(self):
+        methods = multiprocessing.get_all_start_methods()
+        context = multiprocessing.get_context('fork' if 'fork' in methods else None)
+        self.executor = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=context,
+                                            initializer=self.initializer)
+        self.broken = False
+
+    def _replace_broken_executor(self):
+        with self.lock:
+            if self.broken:
+                self.executor.shutdown(wait=False)
+                self._create_executor()
+
+    def _fail(self, job_id, error):
+        """Mark a job failed unless it already finished"""
+        with self.lock, self.conn:
+            self.conn.execute(
+                "update jobs set status = 'failed', error = ?, updated_at = ? "
+                "where id = ? and status in ('queued', 'running')",
+                (error, time.time(), job_id)
+            )
+
+    def _watch(self, job_id, future):
+        # Exceptions inside func are recorded by _run_job; this catches the
+        # pool itself failing, e.g. a worker killed by the OOM killer
+        error = future.exception()
+        if error is None:
+            return
+        if isinstance(error, BrokenProcessPool):
+            self.broken = True
+        self._fail(job_id, f"Job worker failed: {type(error).__name__}: {error}")
+
+    def submit(self, func, *args):
+        """Queue func(job, *args) and return its job id
+
+        func must be a module-level function; job is a JobContext used to
+        report progress.
+        """
+        self._ensure_process_state()
+        self._replace_broken_executor()
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        if now - self.last_cleanup > self.cleanup_interval:
+            self.last_cleanup = now
+            self.cleanup(self.max_age)
+        with self.lock, self.conn:
+            self.conn.execute(
+                "insert into jobs (id, status, progress, created_at, updated_at) "
+                "values (?, 'queued', 0, ?, ?)",
+                (job_id, now, now)
+            )
+        try:
+            future = self.executor.submit(_run_job, self.db_path, job_id, func, args)
+        except BrokenProcessPool:
+            self.broken = True
+            self._replace_broken_executor()
+            future = self.executor.submit(_run_job, self.db_path, job_id, func, args)
+        future.add_done_callback(lambda future: self._watch(job_id, future))
+        return job_id
+
+    def status(self, job_id):
+        """Return a job's status, progress, partial results and final result"""
+        self._ensure_process_state()
+        with self.lock:
+            row = self.conn.execute(
+                'select status, progress, message, partial, result, error, created_at, updated_at '
+                'from jobs where id = ?', (job_id,)
+            ).fetchone()
+        if row is None:
+            return None
+
+        status, progress, message, partial, result, error, created_at, updated_at = row
+        if status in ('queued', 'running') and time.time() - updated_at > self.stale_after:
+            error = f"Job made no progress for {self.stale_after} seconds"
+            self._fail(job_id, error)
+            status = 'failed'
+        return {
+            'id': job_id,
+            'status': status,
+            'progress': progress,
+            'message': message,
+            'partial': pickle.loads(partial) if partial is not None else None,
+            'result': pickle.loads(result) if result is not None else None,
+            'error': error,
+            'elapsed': updated_at - created_at
+        }
+
+    def cleanup(self, max_age=3600):
+        """Delete jobs older than max_age seconds"""
+        self._ensure_process_state()
+        with self.lock, self.conn:
+            cursor = self.conn.execute('delete from jobs where created_at < ?',
+                                       (time.time() - max_age,))
+        return cursor.rowcount
+
+    def shutdown(self, wait=True):
+        """Stop the process pool of the current process"""
+        if self.executor is not None and self.pid == os.getpid():
+            self.executor.shutdown(wait=wait)
+            self.executor = None
+            self.pid = None
@@ -0,0 +1,96 @@
+import hashlib
+import pickle
+import threading
+from collections import OrderedDict
+import numpy as np
+
+OHLCV_COLUMNS = ['open', 'high', 'low', 'close', 'volume']
+
+
+def hash_ohlcv(data, columns=OHLCV_COLUMNS):
+    """Fast content hash of the OHLCV columns of a DataFrame"""
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(str(len(data)).encode())
+    for col in columns:
+        values = np.ascontiguousarray(data[col].to_numpy(dtype=np.float64))
+        digest.update(col.encode())
+        digest.update(values.tobytes())
+    return digest.hexdigest()
+
+
+class ResultCache:
+    """LRU cache for analysis results with a byte budget and optional disk tier
+
+    Values are stored pickled, which gives their size for eviction and
+    hands every caller its own copy. A DiskCache passed as disk_cache keeps
+    results across restarts and shares them between processes.
+    """
+
+    def __init__(self, max_entries=128, max_bytes=64 * 1024 * 1024, disk_cache=None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.disk_cache = disk_cache
+        self.entries = OrderedDict()
+        self.total_bytes = 0
+        self.lock = threading.Lock()
+        self.stats = {'hits': 0, 'disk_hits': 0, 'misses': 0, 'evictions': 0}
+
+    def _store(self, key, blob):
+        if key in self.entries:
+            self.total_bytes -= len(self.entries.pop(key))
+        if len(blob) > self.max_bytes:
+            return
+        self.entries[key] = blob
+        self.total_bytes += len(blob)
+        while len(self.entries) > self.max_entries or self.total_bytes > self.max_bytes:
+            _, evicted = self.entries.popitem(last=False)
+            self.total_bytes -= len(evicted)
+            self.stats['evictions'] += 1
+
+    def get(self, key):
+        """Return the cached value for a key, or None when missing"""
+        with self.lock:
+            blob = self.entries.get(key)
+            if blob is not None:
+                self.entries.move_to_end(key)
+                self.stats['hits'] += 1
+                return pickle.loads(blob)
+
+        if self.disk_cache is not None:
+            entry = self.disk_cache.get(key)
+            if entry is not None:
+                value = entry[0]
+                with self.lock:
+                    self._store(key, pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+                    self.stats['disk_hits'] += 1
+                return value
+
+        with self.lock:
+            self.stats['misses'] += 1
+        return None
+
+    def set(self, key, value):
+        """Cache a value in memory and, if configured, on disk"""
+        blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        with self.lock:
+            self._store(key, blob)
+        if self.disk_cache is not None:
+            self.disk_cache.set(key, value)
+
+    def clear(self):
+        """Drop every cached result"""
+        with self.lock:
+            self.entries.clear()
+            self.total_bytes = 0
+        if self.disk_cache is not None:
+            self.disk_cache.clear()
+
+    def get_stats(self):
+        """Return hit, miss and size statistics"""
+        with self.lock:
+            stats = dict(self.stats)
+            stats['entries'] = len(self.entries)
+            stats['bytes'] = self.total_bytes
+        lookups = stats['hits'] + stats['disk_hits'] + stats['misses']
+        stats['hit_rate'] = (stats['hits'] + stats['disk_hits']) / lookups if lookups else 0.0
+        return stats